@@ -1,211 +1,467 @@
-import numpy as np
-import pickle
-import math
-
-
-from ctypes import c_int, c_double, POINTER
-from .CoreClasses import *
-
-def create_reaction_system(filename):
-    '''Reads a saved Reaction System and returns the CRS object
-
-    Arguements:
-        - filename: the path to the saved Reaction System file (str)
-
-    Returns:
-        - CRS: Reaction System Object of the CRS class.'''
-    CRS = CRS(molecule_list=[], molecule_dict=dict(), reactions=[])
-    print(filename)
-    CRS.readtxt(filename)
-    return CRS
-
-def read_concentration_files_old(file_prefix):
-    '''Opens a concentration file (.npy array) and a molecule list file
-    returns the numpy array with concentrations the last index identifying the molecular species
-    the molecules list maps array indexes to molecular identities'''
-    concentration_arr = np.load(file_prefix + '_concentrations.npy')
-    with open(file_prefix + '_molecules.txt', 'rb') as f:
-        molecules = pickle.load(f)
-    return molecules, concentration_arr
-
-def read_concentration_files(file_prefix):
-    '''Opens a concentration file (.dat pickle list) and a molecule list file
-    returns the numpy array with concentrations the last index identifying the molecular species
-    the molecules list maps array indexes to molecular identities'''
-    fname = file_prefix + '_concentrations.dat'
-    infile1 = open(fname, 'r+b')
-    file1 = pickle.load(infile1)  # This is a list
-    infile1.close()
-    concentration_arr = np.array(file1)
-    concentration_arr = np.ascontiguousarray(concentration_arr, np.int32)
-    with open(file_prefix + '_molecules.txt', 'rb') as f:
-        molecules = pickle.load(f)
-
-    return molecules, concentration_arr
-
-def create_concentration_files_old(file_prefix,
-                                   N_L,
-                                   molecules,
-                                   concentrations,
-                                   coordinates,
-                                   dimensions=2):
-    '''Create a concentration file to load as a np array
-    dimensions - int, number of spatial dimensions
-    N_L - int, size of one side of regular lattice
-    molecules - list of strings representing molecules
-    concentrations - list of ints representing abdunace of molecule at a particular site
-    coordinates - list of tuples, coordinates in the lattice '''
-
-    molecule_list = []
-    print(len(molecules), len(concentrations), len(coordinates))
-    assert(len(molecules) == len(concentrations) and len(molecules) == len(coordinates))
-    assert(len(coordinates[0]) == dimensions)
-    # Initialize the lattice
-    shape = [N_L]*dimensions
-    # Add a dimension to index the molecules
-    shape.append(1)
-    concentration_arr = np.zeros(shape)
-
-    for m in range(len(molecules)):
-        assert(type(molecules[m]) == str)
-
-        if molecules[m] in molecule_list:
-            index = molecule_list.index(molecules[m])
-        else:
-            molecule_list.append(molecules[m])
-            index = molecule_list.index(molecules[m])
-            if index == concentration_arr.shape[-1]:
-                concentration_arr = np.dstack((concentration_arr, np.zeros([N_L] * dimensions)))
-        arr_indices = coordinates[m] + (index,)
-
-        concentration_arr[arr_indices] = concentrations[m]
-    np.save(file_prefix + '_concentrations.npy', concentration_arr)
-    with open(file_prefix + '_molecules.txt', 'wb') as f:
-        pickle.dump(molecule_list, f)
-
-def create_concentration_files(file_prefix,
-                               N_L,
-                               molecules,
-                               concentrations,
-                               coordinates,
-                               dimensions=2):
-    '''Create a concentration file to load as a np array
-    dimensions - int, number of spatial dimensions
-    N_L - int, size of one side of regular lattice
-    molecules - list of strings representing molecules
-    concentrations - list of ints representing abdunace of molecule at a particular site
-    coordinates - list of tuples, coordinates in the lattice '''
-
-    molecule_list = []
-    #print len(molecules), len(concentrations), len(coordinates)
-    assert(len(molecules) == len(concentrations) and len(molecules) == len(coordinates))
-    assert(len(coordinates[0]) == dimensions)
-    # Initialize the lattice
-    shape = [N_L]*dimensions
-    # Add a dimension to index the molecules
-    shape.append(1)
-    concentration_arr = np.zeros(shape)
-
-    for m in range(len(molecules)):
-        assert(type(molecules[m]) == str)
-
-        if molecules[m] in molecule_list:
-            index = molecule_list.index(molecules[m])
-        else:
-            molecule_list.append(molecules[m])
-            index = molecule_list.index(molecules[m])
-            if index == concentration_arr.shape[-1]:
-                concentration_arr = np.dstack((concentration_arr, np.zeros([N_L] * dimensions)))
-        arr_indices = coordinates[m] + (index,)
-        concentration_arr[arr_indices] = concentrations[m]
-    fname = file_prefix + '_concentrations.dat'
-    outfile1 = open(fname, 'w+b')
-    pickle.dump(concentration_arr.tolist(), outfile1)
-    outfile1.close()
-    with open(file_prefix + '_molecules.txt', 'wb') as f:
-        pickle.dump(molecule_list, f)
-
-def convert_CRS_to_npArrays(CRS):
-    '''
-    This function converts ChemEvolve CRS objects into 4 numpy arrays. This allows the information
-    to be easily passed to C.
-
-    Input:
-        - CRS: Chemical Reaction System Object
-
-    Output:
-        - constants: np double array with reaction constant values
-        - propensity_ints: np int32 array with integer identifying which propensity function to use
-        - reaction_arr: np int32 array with integers indicating the stochimetry of each reaction.
-            Each row is a reaction, each column is a molecule. Reactants are negative, products are
-            postive
-        - catalyst_arr: np double array with the effect of each molecule for each reaction.
-            Rows are reactions, columns are molecule, non-zero value indicate catalysis
-    '''
-
-    propensity_dict = {'STD': 0, 'RCM': 1}
-
-    num_Reactions = len(CRS.reactions)
-    num_Molecules = len(CRS.molecule_list)
-
-    constants = [x.constant for x in CRS.reactions]
-    constants = np.array(constants, dtype=float, order='C')
-
-    propensity_strs = [x.prop for x in CRS.reactions]
-    propensity_ints = np.array([propensity_dict[s] for s in propensity_strs], dtype=int, order='C')
-
-    reaction_arr = np.zeros((num_Reactions, num_Molecules), dtype=int)
-    catalyst_arr = np.zeros((num_Reactions, num_Molecules), dtype=float)
-
-    for r in range(num_Reactions):
-        reactants = CRS.reactions[r].reactants
-        reactant_coeff = CRS.reactions[r].reactant_coeff
-        products = CRS.reactions[r].products
-        product_coeff = CRS.reactions[r].product_coeff
-        cat_IDs = CRS.reactions[r].catalysts
-        cat_constants = CRS.reactions[r].catalyzed_constants
-
-        for i in range(len(reactants)):
-            reaction_arr[r, reactants[i]] = -reactant_coeff[i]
-
-        for i in range(len(products)):
-            reaction_arr[r, products[i]] = product_coeff[i]
-
-        for i in range(len(cat_IDs)):
-            catalyst_arr[r, cat_IDs[i]] = cat_constants[i]
-
-    constants = np.ascontiguousarray(constants, np.float64)
-    propensity_ints = np.ascontiguousarray(propensity_ints, np.int32)
-    reaction_arr = np.ascontiguousarray(reaction_arr, np.int32)
-    catalyst_arr = np.ascontiguousarray(catalyst_arr, np.float64)
-
-    return constants, propensity_ints, reaction_arr, catalyst_arr
-
-def get_c_pointers(concentrations, constants, propensity_ints, reaction_arr, catalyst_arr):
-    '''This function returns the C pointers to the input arrays. Pointers must be pasted to SSA
-       library functions
-
-    Arguments:
-        - concentrations: array of doubles containing molecule abundances
-        - constants: array of np doubles containing reaction constants
-        - propensity_ints: array of np int32 containing propesity integer codes
-        - reaction_arr: np int32 array with integers indicating the stochimetry of each reaction.
-            Each row is a reaction, each column is a molecule. Reactants are negative, products are
-            postive
-        - catalyst_arr: np double array with the effect of each molecule for each reaction.
-            Rows are reactions, columns are molecule, non-zero value indicate catalysis
-    Return:
-        - concentrations_ptr: points to concentration array
-        - constants_ptr: points to constants array
-        - propensity_ints_ptr: points to propensity_ints array
-        - reaction_arr_ptr: points to reaction_arr array
-        - catalyst_arr_ptr: points to catalyst_arr
-    '''
-
-    concentrations_pt = concentrations.ctypes.data_as(POINTER(c_double))
-    constants_pt = constants.ctypes.data_as(POINTER(c_double))
-    propensity_ints_pt = propensity_ints.ctypes.data_as(POINTER(c_int))
-    reaction_arr_pt = reaction_arr.ctypes.data_as(POINTER(c_int))
-    catalyst_arr_pt = catalyst_arr.ctypes.data_as(POINTER(c_double))
-
-    return concentrations_pt, constants_pt, propensity_ints_pt, reaction_arr_pt, catalyst_arr_pt
+import numpy as np
+import pickle
+import math
+import hashlib
+
+
+from ctypes import c_int, c_double, POINTER
+from .CoreClasses import *
+
+def create_reaction_system(filename):
+    '''Reads a saved Reaction System and returns the CRS object
+
+    Arguements:
+        - filename: the path to the saved Reaction System file (str)
+
+    Returns:
+        - CRS: Reaction System Object of the CRS class.'''
+    CRS = CRS(molecule_list=[], molecule_dict=dict(), reactions=[])
+    print(filename)
+    CRS.readtxt(filename)
+    return CRS
+
+def read_concentration_files_old(file_prefix):
+    '''Opens a concentration file (.npy array) and a molecule list file
+    returns the numpy array with concentrations the last index identifying the molecular species
+    the molecules list maps array indexes to molecular identities'''
+    concentration_arr = np.load(file_prefix + '_concentrations.npy')
+    with open(file_prefix + '_molecules.txt', 'rb') as f:
+        molecules = pickle.load(f)
+    return molecules, concentration_arr
+
+def read_concentration_files(file_prefix):
+    '''Opens a concentration file (.dat pickle list) and a molecule list file
+    returns the numpy array with concentrations the last index identifying the molecular species
+    the molecules list maps array indexes to molecular identities'''
+    fname = file_prefix + '_concentrations.dat'
+    infile1 = open(fname, 'r+b')
+    file1 = pickle.load(infile1)  # This is a list
+    infile1.close()
+    concentration_arr = np.array(file1)
+    concentration_arr = np.ascontiguousarray(concentration_arr, np.int32)
+    with open(file_prefix + '_molecules.txt', 'rb') as f:
+        molecules = pickle.load(f)
+
+    return molecules, concentration_arr
+
+def create_concentration_files_old(file_prefix,
+                                   N_L,
+                                   molecules,
+                                   concentrations,
+                                   coordinates,
+                                   dimensions=2):
+    '''Create a concentration file to load as a np array
+    dimensions - int, number of spatial dimensions
+    N_L - int, size of one side of regular lattice
+    molecules - list of strings representing molecules
+    concentrations - list of ints representing abdunace of molecule at a particular site
+    coordinates - list of tuples, coordinates in the lattice '''
+
+    molecule_list = []
+    print(len(molecules), len(concentrations), len(coordinates))
+    assert(len(molecules) == len(concentrations) and len(molecules) == len(coordinates))
+    assert(len(coordinates[0]) == dimensions)
+    # Initialize the lattice
+    shape = [N_L]*dimensions
+    # Add a dimension to index the molecules
+    shape.append(1)
+    concentration_arr = np.zeros(shape)
+
+    for m in range(len(molecules)):
+        assert(type(molecules[m]) == str)
+
+        if molecules[m] in molecule_list:
+            index = molecule_list.index(molecules[m])
+        else:
+            molecule_list.append(molecules[m])
+            index = molecule_list.index(molecules[m])
+            if index == concentration_arr.shape[-1]:
+                concentration_arr = np.dstack((concentration_arr, np.zeros([N_L] * dimensions)))
+        arr_indices = coordinates[m] + (index,)
+
+        concentration_arr[arr_indices] = concentrations[m]
+    np.save(file_prefix + '_concentrations.npy', concentration_arr)
+    with open(file_prefix + '_molecules.txt', 'wb') as f:
+        pickle.dump(molecule_list, f)
+
+def create_concentration_files(file_prefix,
+                               N_L,
+                               molecules,
+                               concentrations,
+                               coordinates,
+                               dimensions=2):
+    '''Create a concentration file to load as a np array
+    dimensions - int, number of spatial dimensions
+    N_L - int, size of one side of regular lattice
+    molecules - list of strings representing molecules
+    concentrations - list of ints representing abdunace of molecule at a particular site
+    coordinates - list of tuples, coordinates in the lattice '''
+
+    molecule_list = []
+    #print len(molecules), len(concentrations), len(coordinates)
+    assert(len(molecules) == len(concentrations) and len(molecules) == len(coordinates))
+    assert(len(coordinates[0]) == dimensions)
+    # Initialize the lattice
+    shape = [N_L]*dimensions
+    # Add a dimension to index the molecules
+    shape.append(1)
+    concentration_arr = np.zeros(shape)
+
+    for m in range(len(molecules)):
+        assert(type(molecules[m]) == str)
+
+        if molecules[m] in molecule_list:
+            index = molecule_list.index(molecules[m])
+        else:
+            molecule_list.append(molecules[m])
+            index = molecule_list.index(molecules[m])
+            if index == concentration_arr.shape[-1]:
+                concentration_arr = np.dstack((concentration_arr, np.zeros([N_L] * dimensions)))
+        arr_indices = coordinates[m] + (index,)
+        concentration_arr[arr_indices] = concentrations[m]
+    fname = file_prefix + '_concentrations.dat'
+    outfile1 = open(fname, 'w+b')
+    pickle.dump(concentration_arr.tolist(), outfile1)
+    outfile1.close()
+    with open(file_prefix + '_molecules.txt', 'wb') as f:
+        pickle.dump(molecule_list, f)
+
+def convert_CRS_to_npArrays(CRS):
+    '''
+    This function converts ChemEvolve CRS objects into 4 numpy arrays. This allows the information
+    to be easily passed to C.
+
+    Input:
+        - CRS: Chemical Reaction System Object
+
+    Output:
+        - constants: np double array with reaction constant values
+        - propensity_ints: np int32 array with integer identifying which propensity function to use
+        - reaction_arr: np int32 array with integers indicating the stochimetry of each reaction.
+            Each row is a reaction, each column is a molecule. Reactants are negative, products are
+            postive
+        - catalyst_arr: np double array with the effect of each molecule for each reaction.
+            Rows are reactions, columns are molecule, non-zero value indicate catalysis
+    '''
+
+    propensity_dict = {'STD': 0, 'RCM': 1}
+
+    num_Reactions = len(CRS.reactions)
+    num_Molecules = len(CRS.molecule_list)
+
+    constants = [x.constant for x in CRS.reactions]
+    constants = np.array(constants, dtype=float, order='C')
+
+    propensity_strs = [x.prop for x in CRS.reactions]
+    propensity_ints = np.array([propensity_dict[s] for s in propensity_strs], dtype=int, order='C')
+
+    reaction_arr = np.zeros((num_Reactions, num_Molecules), dtype=int)
+    catalyst_arr = np.zeros((num_Reactions, num_Molecules), dtype=float)
+
+    for r in range(num_Reactions):
+        reactants = CRS.reactions[r].reactants
+        reactant_coeff = CRS.reactions[r].reactant_coeff
+        products = CRS.reactions[r].products
+        product_coeff = CRS.reactions[r].product_coeff
+        cat_IDs = CRS.reactions[r].catalysts
+        cat_constants = CRS.reactions[r].catalyzed_constants
+
+        for i in range(len(reactants)):
+            reaction_arr[r, reactants[i]] = -reactant_coeff[i]
+
+        for i in range(len(products)):
+            reaction_arr[r, products[i]] = product_coeff[i]
+
+        for i in range(len(cat_IDs)):
+            catalyst_arr[r, cat_IDs[i]] = cat_constants[i]
+
+    constants = np.ascontiguousarray(constants, np.float64)
+    propensity_ints = np.ascontiguousarray(propensity_ints, np.int32)
+    reaction_arr = np.ascontiguousarray(reaction_arr, np.int32)
+    catalyst_arr = np.ascontiguousarray(catalyst_arr, np.float64)
+
+    return constants, propensity_ints, reaction_arr, catalyst_arr
+
+def convert_CRS_to_sparse_arrays(CRS):
+    '''
+    This function converts ChemEvolve CRS objects into compressed sparse row (CSR) numpy arrays.
+    Unlike convert_CRS_to_npArrays, memory scales with the number of nonzero entries rather than
+    num_reactions x num_molecules. Each CSR triple (ptr, idx, values) stores the entries of
+    reaction r in idx[ptr[r]:ptr[r+1]] and values[ptr[r]:ptr[r+1]].
+
+    Input:
+        - CRS: Chemical Reaction System Object
+
+    Output:
+        - constants: np double array with reaction constant values
+        - propensity_ints: np int32 array with integer identifying which propensity function to use
+        - reactant_csr: tuple of np int32 arrays (ptr, idx, coeff) giving the reactant IDs and
+            their (positive) coefficients, used to evaluate propensities
+        - stoich_csr: tuple of np int32 arrays (ptr, idx, coeff) giving the net change of each
+            molecule when the reaction fires. Molecules which are both reactants and products
+            are combined into a single entry
+        - catalyst_csr: tuple (ptr, idx, constants) giving the catalyst IDs (np int32) and their
+            catalytic effect (np double)
+    '''
+
+    propensity_dict = {'STD': 0, 'RCM': 1}
+
+    num_Reactions = len(CRS.reactions)
+
+    constants = np.ascontiguousarray([x.constant for x in CRS.reactions], np.float64)
+    propensity_ints = np.ascontiguousarray([propensity_dict[x.prop] for x in CRS.reactions],
+                                           np.int32)
+
+    reactant_ptr = [0]
+    reactant_idx = []
+    reactant_coeff = []
+    stoich_ptr = [0]
+    stoich_idx = []
+    stoich_coeff = []
+    catalyst_ptr = [0]
+    catalyst_idx = []
+    catalyst_constants = []
+
+    for r in range(num_Reactions):
+        rxn = CRS.reactions[r]
+
+        reactant_idx.extend(rxn.reactants)
+        reactant_coeff.extend(rxn.reactant_coeff)
+        reactant_ptr.append(len(reactant_idx))
+
+        # Net stoichiometry, reactants are negative and products are positive
+        net_change = {}
+        for m, coeff in zip(rxn.reactants, rxn.reactant_coeff):
+            net_change[m] = net_change.get(m, 0) - coeff
+        for m, coeff in zip(rxn.products, rxn.product_coeff):
+            net_change[m] = net_change.get(m, 0) + coeff
+        for m in sorted(net_change):
+            if net_change[m] != 0:
+                stoich_idx.append(m)
+                stoich_coeff.append(net_change[m])
+        stoich_ptr.append(len(stoich_idx))
+
+        catalyst_idx.extend(rxn.catalysts)
+        catalyst_constants.extend(rxn.catalyzed_constants)
+        catalyst_ptr.append(len(catalyst_idx))
+
+    reactant_csr = (np.ascontiguousarray(reactant_ptr, np.int32),
+                    np.ascontiguousarray(reactant_idx, np.int32),
+                    np.ascontiguousarray(reactant_coeff, np.int32))
+    stoich_csr = (np.ascontiguousarray(stoich_ptr, np.int32),
+                  np.ascontiguousarray(stoich_idx, np.int32),
+                  np.ascontiguousarray(stoich_coeff, np.int32))
+    catalyst_csr = (np.ascontiguousarray(catalyst_ptr, np.int32),
+                    np.ascontiguousarray(catalyst_idx, np.int32),
+                    np.ascontiguousarray(catalyst_constants, np.float64))
+
+    return constants, propensity_ints, reactant_csr, stoich_csr, catalyst_csr
+
+def get_c_pointers(concentrations, constants, propensity_ints, reaction_arr, catalyst_arr):
+    '''This function returns the C pointers to the input arrays. Pointers must be pasted to SSA
+       library functions
+
+    Arguments:
+        - concentrations: array of doubles containing molecule abundances
+        - constants: array of np doubles containing reaction constants
+        - propensity_ints: array of np int32 containing propesity integer codes
+        - reaction_arr: np int32 array with integers indicating the stochimetry of each reaction.
+            Each row is a reaction, each column is a molecule. Reactants are negative, products are
+            postive
+        - catalyst_arr: np double array with the effect of each molecule for each reaction.
+            Rows are reactions, columns are molecule, non-zero value indicate catalysis
+    Return:
+        - concentrations_ptr: points to concentration array
+        - constants_ptr: points to constants array
+        - propensity_ints_ptr: points to propensity_ints array
+        - reaction_arr_ptr: points to reaction_arr array
+        - catalyst_arr_ptr: points to catalyst_arr
+    '''
+
+    concentrations_pt = concentrations.ctypes.data_as(POINTER(c_double))
+    constants_pt = constants.ctypes.data_as(POINTER(c_double))
+    propensity_ints_pt = propensity_ints.ctypes.data_as(POINTER(c_int))
+    reaction_arr_pt = reaction_arr.ctypes.data_as(POINTER(c_int))
+    catalyst_arr_pt = catalyst_arr.ctypes.data_as(POINTER(c_double))
+
+    return concentrations_pt, constants_pt, propensity_ints_pt, reaction_arr_pt, catalyst_arr_pt
+
+def replicator_mutation_weights(nA, nB, mu):
+    '''Mutation weights of the replicator composition propensity. Copying a replicator with nA A
+       residues and nB B residues makes eA errors on A residues (using B instead) and eB errors on B
+       residues (using A instead). Collecting terms by the number of A residues used, the
+       propensity of replicator_composition_propensity_envMutation is
+
+           Ap = replicator * sum_j weights[j] * (k*A)**j * (k*B)**(nA + nB - j)
+
+    Arguments:
+        - nA: int, number of A residues of the replicator
+        - nB: int, number of B residues of the replicator
+        - mu: float, per residue mutation probability
+    Return:
+        - weights: np double array of length nA + nB + 1
+    '''
+    R_L = nA + nB
+    weights = np.zeros(R_L + 1)
+    for eA in range(nA + 1):
+        for eB in range(nB + 1):
+            errors = eA + eB
+            binomialA = math.factorial(nA) / (math.factorial(nA - eA) * math.factorial(eA))
+            binomialB = math.factorial(nB) / (math.factorial(nB - eB) * math.factorial(eB))
+            weights[nA - eA + eB] += binomialA * binomialB * mu**errors * (1.0 - mu)**(R_L - errors)
+    return weights
+
+def build_replicator_tables(CRS, mu=0.001):
+    '''Precomputes the tables needed to evaluate replicator (RCM) propensities in C. An RCM
+       reaction has the two resource monomers A and B as its first two reactants, with the
+       composition of the replicator as their coefficients, and the replicator as its first product.
+
+    Arguments:
+        - CRS: Chemical Reaction System Object
+        - mu (optional): float, per residue mutation probability, default: 0.001
+    Return:
+        - replicator_tables: tuple of np arrays (species, weight_ptr, weights). species (int32)
+            holds the (A, B, replicator) IDs of reaction r at species[3*r:3*r+3], -1 for other
+            propensity functions. The mutation weights of reaction r are
+            weights[weight_ptr[r]:weight_ptr[r+1]]
+    '''
+    species = []
+    weight_ptr = [0]
+    weights = []
+    for rxn in CRS.reactions:
+        if rxn.prop == 'RCM':
+            if len(rxn.reactants) != 2 or len(rxn.products) == 0:
+                raise ValueError('RCM reaction %i needs the reactants A and B and the replicator '
+                                 'as its first product' % rxn.ID)
+            species.extend([rxn.reactants[0], rxn.reactants[1], rxn.products[0]])
+            nA, nB = rxn.reactant_coeff[0], rxn.reactant_coeff[1]
+            weights.extend(replicator_mutation_weights(nA, nB, mu))
+        else:
+            species.extend([-1, -1, -1])
+        weight_ptr.append(len(weights))
+
+    replicator_tables = (np.ascontiguousarray(species, np.int32),
+                         np.ascontiguousarray(weight_ptr, np.int32),
+                         np.ascontiguousarray(weights, np.float64))
+    return replicator_tables
+
+def build_dependency_graph(reactant_csr, stoich_csr, catalyst_csr, num_molecules,
+                           replicator_tables=None):
+    '''Builds the reaction dependency graph of a sparse reaction network. Reaction d depends on
+       reaction r if r changes the abundance of a molecule which d reads (as a reactant, as a
+       catalyst or as the replicator of an RCM reaction), so after r fires only the propensities of
+       its dependents need to be updated.
+
+    Arguments:
+        - reactant_csr: tuple of np int32 arrays (ptr, idx, coeff) from convert_CRS_to_sparse_arrays
+        - stoich_csr: tuple of np int32 arrays (ptr, idx, coeff) from convert_CRS_to_sparse_arrays
+        - catalyst_csr: tuple (ptr, idx, constants) from convert_CRS_to_sparse_arrays
+        - num_molecules: int, number of molecules in the CRS
+        - replicator_tables (optional): tuple (species, weight_ptr, weights) from
+            build_replicator_tables
+    Return:
+        - dependency_csr: tuple of np int32 arrays (ptr, idx), the reactions to update after
+            reaction r fires are idx[ptr[r]:ptr[r+1]]
+    '''
+    reactant_ptr, reactant_idx = reactant_csr[0], reactant_csr[1]
+    stoich_ptr, stoich_idx = stoich_csr[0], stoich_csr[1]
+    catalyst_ptr, catalyst_idx = catalyst_csr[0], catalyst_csr[1]
+    num_reactions = len(reactant_ptr) - 1
+
+    # Map each molecule to the reactions whose propensity reads it
+    readers = [set() for m in range(num_molecules)]
+    for r in range(num_reactions):
+        for m in reactant_idx[reactant_ptr[r]:reactant_ptr[r + 1]]:
+            readers[m].add(r)
+        for m in catalyst_idx[catalyst_ptr[r]:catalyst_ptr[r + 1]]:
+            readers[m].add(r)
+        if replicator_tables is not None:
+            for m in replicator_tables[0][3 * r:3 * r + 3]:
+                if m >= 0:
+                    readers[m].add(r)
+
+    dependency_ptr = [0]
+    dependency_idx = []
+    for r in range(num_reactions):
+        dependents = set()
+        for m in stoich_idx[stoich_ptr[r]:stoich_ptr[r + 1]]:
+            dependents.update(readers[m])
+        dependency_idx.extend(sorted(dependents))
+        dependency_ptr.append(len(dependency_idx))
+
+    dependency_csr = (np.ascontiguousarray(dependency_ptr, np.int32),
+                      np.ascontiguousarray(dependency_idx, np.int32))
+    return dependency_csr
+
+def build_sparse_network(CRS, mu=0.001):
+    '''Builds every array the sparse SSA engines need from a CRS. The result depends only on the
+       CRS, so it can be built once and shared by many simulations of the same system.
+
+    Arguments:
+        - CRS: Chemical Reaction System Object
+        - mu (optional): float, per residue mutation probability of RCM reactions, default: 0.001
+    Return:
+        - network: tuple (constants, propensity_ints, reactant_csr, stoich_csr, catalyst_csr,
+            dependency_csr, replicator_tables)
+    '''
+    (constants, propensity_ints, reactant_csr, stoich_csr,
+     catalyst_csr) = convert_CRS_to_sparse_arrays(CRS)
+    replicator_tables = build_replicator_tables(CRS, mu=mu)
+    dependency_csr = build_dependency_graph(reactant_csr, stoich_csr, catalyst_csr,
+                                            len(CRS.molecule_list),
+                                            replicator_tables=replicator_tables)
+    return (constants, propensity_ints, reactant_csr, stoich_csr, catalyst_csr, dependency_csr,
+            replicator_tables)
+
+def CRS_fingerprint(CRS, mu=0.001):
+    '''SHA-256 fingerprint of everything that decides the dynamics of a CRS: the molecule names and
+       the reaction arrays simulated by the engines. Checkpoints record it so that a run is never
+       resumed with a different system.
+
+    Arguments:
+        - CRS: Chemical Reaction System Object
+        - mu (optional): float, per residue mutation probability of RCM reactions, default: 0.001
+    Return:
+        - fingerprint: string, hexadecimal digest
+    '''
+    network = build_sparse_network(CRS, mu=mu)
+    digest = hashlib.sha256()
+    digest.update('\n'.join(CRS.molecule_list).encode('utf-8'))
+    arrays = [network[0], network[1]] + [arr for csr in network[2:] for arr in csr]
+    for arr in arrays:
+        arr = np.ascontiguousarray(arr)
+        digest.update(str((arr.dtype.str, arr.shape)).encode('utf-8'))
+        digest.update(arr.tobytes())
+    return digest.hexdigest()
+
+def get_sparse_c_pointers(reactant_csr, stoich_csr, catalyst_csr, dependency_csr,
+                          replicator_tables=None):
+    '''This function returns the C pointers to the CSR arrays produced by
+       convert_CRS_to_sparse_arrays, build_dependency_graph and build_replicator_tables, in the
+       order expected by the sparse SSA library functions
+
+    Arguments:
+        - reactant_csr: tuple of np int32 arrays (ptr, idx, coeff)
+        - stoich_csr: tuple of np int32 arrays (ptr, idx, coeff)
+        - catalyst_csr: tuple (ptr, idx, constants) of np int32, np int32 and np double arrays
+        - dependency_csr: tuple of np int32 arrays (ptr, idx)
+        - replicator_tables (optional): tuple (species, weight_ptr, weights) of np int32, np int32
+            and np double arrays
+    Return:
+        - sparse_ptrs: list of 11 pointers, reactant ptr/idx/coeff, stoich ptr/idx/coeff,
+            catalyst ptr/idx/constants and dependency ptr/idx, followed by the 3 replicator table
+            pointers if replicator_tables is given
+    '''
+    sparse_ptrs = []
+    for csr in (reactant_csr, stoich_csr):
+        sparse_ptrs.extend([arr.ctypes.data_as(POINTER(c_int)) for arr in csr])
+    sparse_ptrs.append(catalyst_csr[0].ctypes.data_as(POINTER(c_int)))
+    sparse_ptrs.append(catalyst_csr[1].ctypes.data_as(POINTER(c_int)))
+    sparse_ptrs.append(catalyst_csr[2].ctypes.data_as(POINTER(c_double)))
+    sparse_ptrs.extend([arr.ctypes.data_as(POINTER(c_int)) for arr in dependency_csr])
+    if replicator_tables is not None:
+        sparse_ptrs.append(replicator_tables[0].ctypes.data_as(POINTER(c_int)))
+        sparse_ptrs.append(replicator_tables[1].ctypes.data_as(POINTER(c_int)))
+        sparse_ptrs.append(replicator_tables[2].ctypes.data_as(POINTER(c_double)))
+
+    return sparse_ptrs
@@ -0,0 +1,190 @@
+import numpy as np
+import math
+
+from .InitializeFunctions import convert_CRS_to_sparse_arrays
+from .OutputFunctions import TIDY_FORMATS, open_trajectory, tidy_timeseries
+from .PropensityFunctions import pad_csr
+
+####################################################
+class MassActionODE(object):
+    '''The deterministic (mean-field) rate equations of a CRS at every lattice site,
+    dC/dt = S^T v(C), where S is the stoichiometry matrix and the rate of reaction r is
+
+        v_r = k_r * prod_i C_i^c_i / c_i! * (1 + sum_j f_j C_j)
+
+    the large copy number limit of the standard propensity used by the stochastic engines.
+    Lattice sites do not exchange molecules, so the state vector y is the concentrations array
+    flattened to (site, molecule ID) and the Jacobian is block diagonal.
+
+    Attributes:
+        - constants: np double array of reaction constants
+        - num_molecules: number of molecules in the CRS
+        - num_reactions: number of reactions in the CRS
+    '''
+    def __init__(self, CRS, constants=None):
+        (network_constants, propensity_ints, reactant_csr, stoich_csr,
+         catalyst_csr) = convert_CRS_to_sparse_arrays(CRS)
+        if np.any(propensity_ints != 0):
+            raise ValueError('The deterministic solver only supports standard (STD) propensities')
+        if constants is None:
+            constants = network_constants
+        constants = np.ascontiguousarray(constants, np.float64)
+        if constants.shape != network_constants.shape:
+            raise ValueError('constants must hold one rate constant for each of the %i reactions'
+                             % len(network_constants))
+        self.constants = constants
+        self.num_molecules = len(CRS.molecule_list)
+        self.num_reactions = len(constants)
+
+        # Reactants and catalysts padded to (reaction, entry), padded entries read a column of ones
+        self._reactant_idx, self._reactant_coeff = pad_csr(*reactant_csr,
+                                                           pad_idx=self.num_molecules,
+                                                           pad_value=0)
+        self._inverse_factorial = np.array([1.0 / math.factorial(c)
+                                            for c in self._reactant_coeff.ravel()])
+        self._inverse_factorial = self._inverse_factorial.reshape(self._reactant_coeff.shape)
+        self._catalyst_idx, self._catalyst_constants = pad_csr(*catalyst_csr,
+                                                               pad_idx=self.num_molecules,
+                                                               pad_value=0.0)
+        # Positions of the real (unpadded) entries, the nonzero pattern of dv/dC
+        self._reactant_entries = np.nonzero(self._reactant_coeff > 0)
+        self._catalyst_entries = np.nonzero(np.arange(self._catalyst_idx.shape[1])
+                                            < np.diff(catalyst_csr[0])[:, None])
+        stoich = np.zeros((self.num_reactions, self.num_molecules))
+        rows = np.repeat(np.arange(self.num_reactions), np.diff(stoich_csr[0]))
+        np.add.at(stoich, (rows, stoich_csr[1]), stoich_csr[2])
+        self._stoich = stoich
+        self._num_sites = None
+
+    def _terms(self, concentrations):
+        # Per reactant factor C^c / c!, the enhancement 1 + sum f C and the padded concentrations
+        ones = np.ones(concentrations.shape[:-1] + (1,))
+        padded_conc = np.concatenate([concentrations, ones], axis=-1)
+        terms = (padded_conc[..., self._reactant_idx] ** self._reactant_coeff
+                 * self._inverse_factorial)
+        catalysis = self._catalyst_constants * padded_conc[..., self._catalyst_idx]
+        enhancement = 1.0 + np.sum(catalysis, axis=-1)
+        return padded_conc, terms, enhancement
+
+    def rates(self, concentrations):
+        '''Rate of every reaction
+
+        Arguements:
+            - concentrations: array of molecule concentrations indexed by (..., molecule ID)
+
+        Return:
+            - rates: np double array indexed by (..., reaction ID)
+        '''
+        padded_conc, terms, enhancement = self._terms(np.asarray(concentrations, dtype=np.float64))
+        return self.constants * np.prod(terms, axis=-1) * enhancement
+
+    def rhs(self, t, y):
+        '''Right-hand side dy/dt of the flattened (site, molecule ID) state vector y'''
+        concentrations = y.reshape(-1, self.num_molecules)
+        return np.dot(self.rates(concentrations), self._stoich).ravel()
+
+    def jacobian(self, t, y):
+        '''Analytic Jacobian d(dy/dt)/dy of the flattened state vector y as a scipy sparse matrix'''
+        from scipy import sparse
+        concentrations = y.reshape(-1, self.num_molecules)
+        num_sites = concentrations.shape[0]
+        padded_conc, terms, enhancement = self._terms(concentrations)
+
+        # d v_r / d C_i for reactant i: the product of the other factors times c C_i^(c-1) / c!
+        ones = np.ones(terms.shape[:-1] + (1,))
+        left = np.cumprod(np.concatenate([ones, terms[..., :-1]], axis=-1), axis=-1)
+        right = np.cumprod(np.concatenate([ones, terms[..., :0:-1]], axis=-1), axis=-1)[..., ::-1]
+        lowered_coeff = np.maximum(self._reactant_coeff - 1, 0)
+        derivative = (self._reactant_coeff * padded_conc[..., self._reactant_idx]**lowered_coeff
+                      * self._inverse_factorial)
+        reactant_values = (self.constants[:, None] * left * right * derivative
+                           * enhancement[..., None])
+        # d v_r / d C_j for catalyst j: f_j times the uncatalysed rate
+        mass_action = self.constants * np.prod(terms, axis=-1)
+        catalyst_values = mass_action[..., None] * self._catalyst_constants
+
+        sites = np.arange(num_sites)[:, None]
+        r_rows = sites * self.num_reactions + self._reactant_entries[0]
+        r_cols = sites * self.num_molecules + self._reactant_idx[self._reactant_entries]
+        c_rows = sites * self.num_reactions + self._catalyst_entries[0]
+        c_cols = sites * self.num_molecules + self._catalyst_idx[self._catalyst_entries]
+        values = np.concatenate([reactant_values[:, self._reactant_entries[0],
+                                                 self._reactant_entries[1]].ravel(),
+                                 catalyst_values[:, self._catalyst_entries[0],
+                                                 self._catalyst_entries[1]].ravel()])
+        rows = np.concatenate([r_rows.ravel(), c_rows.ravel()])
+        cols = np.concatenate([r_cols.ravel(), c_cols.ravel()])
+        rate_jacobian = sparse.coo_matrix((values, (rows, cols)),
+                                          shape=(num_sites * self.num_reactions,
+                                                 num_sites * self.num_molecules))
+        if self._num_sites != num_sites:
+            # Stoichiometry of every site, built once per lattice size
+            self._stoich_T = sparse.kron(sparse.identity(num_sites),
+                                         sparse.csr_matrix(self._stoich.T), format='csr')
+            self._num_sites = num_sites
+        return (self._stoich_T @ rate_jacobian.tocsc()).tocsc()
+
+####################################################
+def ODE_evolve(tau, tau_max, concentrations, CRS, output_prefix=None, t_out=None, method='BDF',
+               rtol=1e-6, atol=1e-8, constants=None, output_format='csv'):
+    ''' Evolves the concentrations in place by integrating the deterministic mass-action rate
+    equations with a stiff solver (requires scipy). The mean-field counterpart of SSA_evolve for
+    systems with large copy numbers
+
+    Arguements:
+        - tau: float, current time
+        - tau_max: float, time to stop the simulation
+        - concentrations: np double array of molecule concentrations indexed by (x, y, molecule ID)
+        - CRS: CRS object containing the entire system, only standard (STD) propensities
+        - output_prefix (optional): string which will be the prefix to the saved files, written
+            like those of SSA_evolve
+        - t_out (optional): float, time between outputs
+        - method (optional): scipy.integrate.solve_ivp method, 'BDF' (default) and 'Radau' use the
+            sparse Jacobian, 'LSODA' a dense copy of it
+        - rtol, atol (optional): relative and absolute tolerances of the solver
+        - constants (optional): np double array of reaction constants replacing those of the CRS,
+            e.g. for parameter scans
+        - output_format (optional): format of the tidy file, 'csv' (default) or 'parquet'
+
+    Return:
+        - concentrations: updated array of molecule concentrations '''
+    from scipy.integrate import solve_ivp
+    from .ReactionFunctions import get_output_times
+
+    if (output_prefix is not None and t_out is None):
+        raise ValueError('Output file prefix specified but no output frequency given, please '
+                         'provide an output time frequency')
+    elif (output_prefix is None and t_out is not None):
+        raise ValueError('Output frequency provided but output file prefix was not provided, '
+                         'please provide a file prefix name')
+    if output_format not in TIDY_FORMATS:
+        raise ValueError('Unknown output format "%s", please choose one of %s'
+                         % (output_format, TIDY_FORMATS))
+
+    system = MassActionODE(CRS, constants=constants)
+    if method == 'LSODA':
+        # LSODA only accepts a dense Jacobian
+        def jacobian(t, y):
+            return system.jacobian(t, y).toarray()
+    else:
+        jacobian = system.jacobian
+    if tau_max <= tau:
+        return concentrations
+    output_times = [] if output_prefix is None else get_output_times(tau, tau_max, t_out)
+    # The final state at tau_max is evaluated as well when it is not an output time
+    eval_times = output_times
+    if not output_times or output_times[-1] < tau_max:
+        eval_times = output_times + [tau_max]
+    solution = solve_ivp(system.rhs, (tau, tau_max), concentrations.ravel(), method=method,
+                         t_eval=eval_times, rtol=rtol, atol=atol, jac=jacobian)
+    if not solution.success:
+        raise RuntimeError('The ODE solver failed: %s' % solution.message)
+
+    if output_prefix is not None:
+        with open_trajectory(output_prefix, concentrations.shape, mode='w') as trajectory:
+            for i, output_time in enumerate(output_times):
+                trajectory.append(solution.y[:, i].reshape(concentrations.shape), output_time)
+        tidy_timeseries(CRS.molecule_list, output_prefix, delete_dat=False,
+                        file_format=output_format)
+    concentrations[...] = solution.y[:, -1].reshape(concentrations.shape)
+    return concentrations
@@ -1,112 +1,712 @@
-import numpy as np
-import pandas as pd
-import glob
-import os
-
-import pickle
-########################################################################################
-
-
-def output_concentrations(concentrations, prefix, time=None):
-    '''Outputs an .dat file
-
-    Arguements:
-        - concentrations: a numpy array which contains the concentrations of all molecules indexed
-            by (position, molecule)
-        - prefix: a string which will be the prefix to the saved file
-        - time (optional): number which will be inserted into the file name '''
-    fname = prefix + '_ts.dat'
-    if time is not None:
-        fname = prefix + '_ts_' + str(time) + '.dat'
-    # np.save(fname, concentrations)
-    outfile1 = open(fname, 'w+b')
-    pickle.dump(concentrations.tolist(), outfile1)
-    outfile1.close()
-########################################################################################
-
-
-def tidy_timeseries(molecules, prefix, delete_dat=True):
-    ''' This function replaces the seperate time-series .dat files with a tidy dataframe containing
-        all the time series data
-
-    Arguements:
-        - prefix: string which is the prefix used to save the time-series data files
-        - delete_dat (optional): if False the .npy files will be saved, otherwise they will be
-            deleted, default: True
-        '''
-
-    # Get the moleucles list
-    # with open(prefix+ '_molecules.txt', 'rb') as f:
-    # 	molecules = pickle.load(f)
-    num_molecules = len(molecules)
-
-    # Initialize the tidy dataframe
-    features = ['time', 'position', 'molecule', 'abundance']
-
-    # Get all the time series files
-    ts_prefix = prefix + '_ts_'
-
-    fnames = glob.glob(ts_prefix + '*.dat')
-    index = 0
-    tidy_df_dict = {}
-    # Get all the data
-    for f in fnames:
-        infile1 = open(f, 'r+b')
-        file1 = pickle.load(infile1)  # This is a list
-        infile1.close()
-        concentrations = np.array(file1)
-        t = f.replace('.dat', '')
-        t = t.replace(ts_prefix, '')
-        # The time value is embedded in the filename
-
-        time = float(t)
-        # Initialize a dummy lattice to make iteration over the indices of the concentration array
-        # easier
-        lattice_size = np.product(concentrations.shape[:-1])
-        lattice_shape = concentrations.shape[:-1]
-        dummy_arr = np.zeros(lattice_size).reshape(lattice_shape)
-        # Iterate over the dummy array, use only index information
-        for position_index, dummy_site in np.ndenumerate(dummy_arr):
-            position_index = tuple([int(i) for i in position_index])
-            positions = [position_index] * len(molecules)
-            times = [time] * len(molecules)
-            observations = list(zip(times,
-                                    positions,
-                                    molecules,
-                                    concentrations[position_index].tolist()))
-            for m in range(num_molecules):
-                observation = list(observations[m])
-                tidy_df_dict[index] = observation
-                index += 1
-                # raw_input("Enter")
-        if delete_dat:
-            # Delete the File when we're done with it
-            os.remove(f)
-    tidy_df = pd.DataFrame.from_dict(tidy_df_dict, orient='index')
-    tidy_df.columns = features
-    # Name the dataframe and save it
-    df_name = prefix + '_time_series_df.csv'
-    tidy_df.to_csv(df_name, index_label=False)  # index label = False is better for importing to R
-
-########################################################################################
-
-
-def generate_ts_df(infile, outname):
-
-    # Load Tidy Data File
-    tidy_df = pd.read_csv(infile)
-
-    # Get the times
-    times = tidy_df['time'].unique()
-    # Get Molecules
-    molecules = tidy_df['molecule'].unique()
-
-    timeseries_df = pd.DataFrame(index=molecules, columns=times)
-    # For each time, construct a new entry in the time series df
-    for t in times:
-        t_df = tidy_df[tidy_df.time == t].filter(items=['abundance'])
-        t_df = t_df.set_index(molecules)
-        timeseries_df[t] = t_df
-    # print timeseries_df
-    # raw_input("Enter")
-    timeseries_df.to_csv(outname)
+import numpy as np
+import pandas as pd
+import ast
+import copy
+import os
+
+########################################################################################
+
+CHECKPOINT_VERSION = 1
+
+# Sparse trajectory files, the header and the (time, kind, size) record preceding each snapshot
+SPARSE_MAGIC = b'\x93SPARSE\x01'
+SPARSE_RECORD = np.dtype([('time', '<f8'), ('kind', '<i8'), ('size', '<i8')])
+
+
+def save_checkpoint(fname, concentrations, tau, output_index, rng_state, engine_state, **metadata):
+    ''' Writes a binary checkpoint of a simulation. The file is written under a temporary name
+        and moved into place, so an interrupted write never replaces a good checkpoint
+
+    Arguements:
+        - fname: string, name of the checkpoint file
+        - concentrations: np array of molecule abundances indexed by (x, y, molecule ID)
+        - tau: float, time of the simulation
+        - output_index: int, number of output times already written
+        - rng_state, engine_state: arrays from the get_state method of the simulation
+        - metadata: further scalars stored with the checkpoint, e.g. engine and fingerprint '''
+    tmp_name = fname + '.tmp'
+    with open(tmp_name, 'wb') as f:
+        np.savez_compressed(f, version=CHECKPOINT_VERSION, concentrations=concentrations, tau=tau,
+                            output_index=output_index, rng_state=rng_state,
+                            engine_state=engine_state, **metadata)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_name, fname)
+########################################################################################
+
+
+def load_checkpoint(fname):
+    ''' Reads a checkpoint written by save_checkpoint
+
+    Arguements:
+        - fname: string, name of the checkpoint file
+
+    Return:
+        - checkpoint: dict of the stored arrays, scalars are returned as python scalars '''
+    with np.load(fname, allow_pickle=False) as data:
+        checkpoint = dict((key, data[key][()] if data[key].ndim == 0 else data[key])
+                          for key in data.files)
+    if checkpoint.get('version') != CHECKPOINT_VERSION:
+        raise ValueError('%s is not a version %i checkpoint' % (fname, CHECKPOINT_VERSION))
+    return checkpoint
+########################################################################################
+
+
+class TrajectoryStore(object):
+    ''' An appendable binary file of concentration snapshots. The file is a NumPy .npy array of
+    records (time, concentrations), so each snapshot is written as raw bytes without conversion
+    and the whole trajectory can be memory mapped with load_trajectory or
+    np.load(fname, mmap_mode='r'). The file grows in chunks of chunk_size snapshots and the
+    header always holds the number of snapshots written so far.
+
+    Attributes:
+        - fname: string, name of the trajectory file
+        - shape: tuple, shape of a single snapshot, (x, y, molecule ID) for SSA runs
+        - dtype: np dtype of the concentrations
+        - count: int, number of snapshots in the file
+    '''
+    def __init__(self, fname, shape=None, dtype=np.float64, mode='a', chunk_size=64):
+        if mode not in ('a', 'w'):
+            raise ValueError('mode must be "a" (append) or "w" (new file)')
+        if chunk_size < 1:
+            raise ValueError('chunk_size must be at least one snapshot')
+        self.fname = fname
+        self.chunk_size = int(chunk_size)
+        if mode == 'a' and os.path.exists(fname):
+            self._file = open(fname, 'r+b')
+            if np.lib.format.read_magic(self._file) != (1, 0):
+                raise ValueError('%s is not a trajectory file' % fname)
+            file_shape, fortran_order, record = np.lib.format.read_array_header_1_0(self._file)
+            if record.names != ('time', 'concentrations'):
+                raise ValueError('%s is not a trajectory file' % fname)
+            self._offset = self._file.tell()
+            self._record = record
+            self.shape = record['concentrations'].shape
+            self.dtype = record['concentrations'].base
+            if shape is not None and tuple(shape) != self.shape:
+                raise ValueError('%s holds snapshots of shape %s' % (fname, self.shape))
+            self.count = file_shape[0]
+            self._file.seek(0, os.SEEK_END)
+            self._capacity = (self._file.tell() - self._offset) // self._record.itemsize
+        else:
+            if shape is None:
+                raise ValueError('The snapshot shape is needed to create %s' % fname)
+            self.shape = tuple(shape)
+            self.dtype = np.dtype(dtype)
+            self._record = np.dtype([('time', np.float64),
+                                     ('concentrations', self.dtype, self.shape)])
+            self._file = open(fname, 'w+b')
+            self.count = 0
+            self._capacity = 0
+            self._offset = len(self._header(10**20))
+        self._write_header()
+
+    def _header(self, count, size=None):
+        # .npy version 1.0 header, padded so its size does not change as the count grows
+        header = "{'descr': %r, 'fortran_order': False, 'shape': (%i,), }" % (
+            np.lib.format.dtype_to_descr(self._record), count)
+        if size is None:
+            size = 64*((len(header) + 11)//64 + 1)
+        if len(header) + 11 > size:
+            raise ValueError('The header of %s has no room for %i snapshots' % (self.fname, count))
+        header = header.ljust(size - 11) + '\n'
+        header_len = np.uint16(len(header)).astype('<u2').tobytes()
+        return np.lib.format.MAGIC_PREFIX + bytes([1, 0]) + header_len + header.encode('latin1')
+
+    def _write_header(self):
+        self._file.seek(0)
+        self._file.write(self._header(self.count, self._offset))
+
+    def __len__(self):
+        return self.count
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def append(self, concentrations, time=None):
+        '''Appends a snapshot
+
+        Arguements:
+            - concentrations: np array of molecule abundances of shape self.shape
+            - time (optional): float, time of the snapshot, default: the snapshot number '''
+        self.extend(np.asarray(concentrations)[np.newaxis], None if time is None else [time])
+
+    def extend(self, snapshots, times=None):
+        '''Appends a block of snapshots with a single header update
+
+        Arguements:
+            - snapshots: np array of molecule abundances indexed by (snapshot,) + self.shape
+            - times (optional): sequence of the times of the snapshots, default: the snapshot
+                numbers '''
+        snapshots = np.ascontiguousarray(snapshots, dtype=self.dtype)
+        if snapshots.shape[1:] != self.shape:
+            raise ValueError('Snapshots of %s have shape %s, not %s' % (self.fname, self.shape,
+                                                                        snapshots.shape[1:]))
+        if times is None:
+            times = np.arange(self.count, self.count + len(snapshots))
+        if len(times) != len(snapshots):
+            raise ValueError('%i times given for %i snapshots' % (len(times), len(snapshots)))
+        if self.count + len(snapshots) > self._capacity:
+            self._capacity = -(-(self.count + len(snapshots))//self.chunk_size)*self.chunk_size
+            self._file.truncate(self._offset + self._capacity*self._record.itemsize)
+        self._file.seek(self._offset + self.count*self._record.itemsize)
+        for time, snapshot in zip(times, snapshots):
+            self._file.write(np.float64(time).tobytes())
+            self._file.write(snapshot.data)
+        # Data first, so the header never counts a partly written snapshot
+        self.count += len(snapshots)
+        self._write_header()
+        self._file.flush()
+
+    @property
+    def times(self):
+        '''Copy of the times of the snapshots in the file'''
+        self._file.flush()
+        if self.count == 0:
+            return np.zeros(0)
+        records = np.memmap(self.fname, dtype=self._record, mode='r', offset=self._offset,
+                            shape=(self.count,))
+        times = np.array(records['time'])
+        del records
+        return times
+
+    def truncate(self, count):
+        '''Drops all but the first count snapshots, e.g. those written after a checkpoint'''
+        self.count = min(self.count, int(count))
+        self._write_header()
+
+    def close(self):
+        '''Trims the unused part of the last chunk and closes the file'''
+        if not self._file.closed:
+            self._write_header()
+            self._file.truncate(self._offset + self.count*self._record.itemsize)
+            self._file.close()
+########################################################################################
+
+
+class SparseTrajectoryStore(object):
+    ''' An appendable binary file of sparse concentration snapshots. Each snapshot is stored as the
+    flat indices and values of its nonzero entries (a keyframe) or, when it is smaller, of the
+    entries that changed since the previous snapshot (a delta). A keyframe is written at least
+    every keyframe_interval snapshots, which bounds the number of deltas decoded to read any
+    snapshot. Read the file with load_trajectory.
+
+    Attributes:
+        - fname: string, name of the trajectory file
+        - shape: tuple, shape of a single snapshot, (x, y, molecule ID) for SSA runs
+        - dtype: np dtype of the concentrations
+        - keyframe_interval: int, largest number of snapshots between keyframes, 1 stores every
+            snapshot as a keyframe (no delta encoding)
+        - count: int, number of snapshots in the file
+    '''
+    def __init__(self, fname, shape=None, dtype=np.float64, mode='a', keyframe_interval=100):
+        if mode not in ('a', 'w'):
+            raise ValueError('mode must be "a" (append) or "w" (new file)')
+        if keyframe_interval < 1:
+            raise ValueError('keyframe_interval must be at least one snapshot')
+        self.fname = fname
+        self.keyframe_interval = int(keyframe_interval)
+        if mode == 'a' and os.path.exists(fname):
+            existing = SparseTrajectory(fname)
+            if shape is not None and tuple(shape) != existing.shape[1:]:
+                raise ValueError('%s holds snapshots of shape %s' % (fname, existing.shape[1:]))
+            self.shape = existing.shape[1:]
+            self.dtype = existing.dtype
+            self._index_dtype = existing._index_dtype
+            self._offsets = list(existing._offsets)
+            self._times = existing.times.tolist()
+            self._kinds = existing._kinds.tolist()
+            self._end = existing._end
+            del existing
+            self._file = open(fname, 'r+b')
+            # Drops a snapshot that was only partly written
+            self._file.truncate(self._end)
+        else:
+            if shape is None:
+                raise ValueError('The snapshot shape is needed to create %s' % fname)
+            self.shape = tuple(shape)
+            self.dtype = np.dtype(dtype)
+            size = int(np.prod(self.shape))
+            self._index_dtype = np.dtype('<i4' if size < 2**31 else '<i8')
+            header = "{'descr': %r, 'index_descr': %r, 'shape': %r, }" % (
+                self.dtype.str, self._index_dtype.str, self.shape)
+            # Magic string, 4 byte length and newline, padded to a multiple of 64 bytes
+            prefix_size = len(SPARSE_MAGIC) + 5
+            header = header.ljust(64*((len(header) + prefix_size)//64 + 1) - prefix_size) + '\n'
+            header_len = np.uint32(len(header)).astype('<u4').tobytes()
+            self._file = open(fname, 'w+b')
+            self._file.write(SPARSE_MAGIC + header_len + header.encode('latin1'))
+            self._end = self._file.tell()
+            self._offsets = []
+            self._times = []
+            self._kinds = []
+        self._file.flush()
+        self._load_previous()
+
+    def _load_previous(self):
+        # The last snapshot, the reference of the next delta
+        self._previous = None
+        self._since_keyframe = 0
+        if self._kinds:
+            self._file.flush()
+            self._previous = SparseTrajectory(self.fname)[len(self._kinds) - 1].ravel()
+            last_keyframe = max(i for i, kind in enumerate(self._kinds) if kind == 0)
+            self._since_keyframe = len(self._kinds) - 1 - last_keyframe
+
+    @property
+    def count(self):
+        return len(self._offsets)
+
+    def __len__(self):
+        return self.count
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def append(self, concentrations, time=None):
+        '''Appends a snapshot
+
+        Arguements:
+            - concentrations: np array of molecule abundances of shape self.shape
+            - time (optional): float, time of the snapshot, default: the snapshot number '''
+        self.extend(np.asarray(concentrations)[np.newaxis], None if time is None else [time])
+
+    def extend(self, snapshots, times=None):
+        '''Appends a block of snapshots
+
+        Arguements:
+            - snapshots: np array of molecule abundances indexed by (snapshot,) + self.shape
+            - times (optional): sequence of the times of the snapshots, default: the snapshot
+                numbers '''
+        snapshots = np.ascontiguousarray(snapshots, dtype=self.dtype)
+        if snapshots.shape[1:] != self.shape:
+            raise ValueError('Snapshots of %s have shape %s, not %s' % (self.fname, self.shape,
+                                                                        snapshots.shape[1:]))
+        if times is None:
+            times = np.arange(self.count, self.count + len(snapshots))
+        if len(times) != len(snapshots):
+            raise ValueError('%i times given for %i snapshots' % (len(times), len(snapshots)))
+        self._file.seek(self._end)
+        for time, snapshot in zip(times, snapshots):
+            self._write(snapshot.ravel(), time)
+        self._file.flush()
+
+    def _write(self, flat, time):
+        # Writes one record at the end of the file, a delta when it is smaller than a keyframe
+        indices = np.flatnonzero(flat)
+        kind = 0
+        if self._previous is not None and self._since_keyframe + 1 < self.keyframe_interval:
+            changed = np.flatnonzero(flat != self._previous)
+            if len(changed) < len(indices):
+                indices = changed
+                kind = 1
+        record = np.array([(time, kind, len(indices))], dtype=SPARSE_RECORD)
+        padding = -(len(indices)*(self._index_dtype.itemsize + self.dtype.itemsize)) % 8
+        self._file.write(record.tobytes())
+        self._file.write(indices.astype(self._index_dtype).tobytes())
+        self._file.write(flat[indices].tobytes())
+        self._file.write(bytes(padding))
+        self._offsets.append(self._end)
+        self._times.append(record['time'][0])
+        self._kinds.append(kind)
+        self._end = self._file.tell()
+        self._since_keyframe = 0 if kind == 0 else self._since_keyframe + 1
+        if self.keyframe_interval > 1:
+            self._previous = flat.copy()
+
+    @property
+    def times(self):
+        '''Copy of the times of the snapshots in the file'''
+        return np.array(self._times, dtype=np.float64)
+
+    def truncate(self, count):
+        '''Drops all but the first count snapshots, e.g. those written after a checkpoint'''
+        count = int(count)
+        if count < self.count:
+            self._end = self._offsets[count]
+            del self._offsets[count:], self._times[count:], self._kinds[count:]
+            self._file.truncate(self._end)
+            self._load_previous()
+
+    def close(self):
+        '''Closes the file'''
+        if not self._file.closed:
+            self._file.close()
+########################################################################################
+
+
+class SparseTrajectory(object):
+    ''' Reader of the files written by SparseTrajectoryStore. Indexing decodes the snapshots into
+    dense arrays, e.g. snapshots[i] is the snapshot i and snapshots[a:b, x, y] the time series of
+    site (x, y). The file is memory mapped and the last decoded snapshot is kept, so reading the
+    snapshots in order only decodes each record once.
+
+    Attributes:
+        - fname: string, name of the trajectory file
+        - times: np array of the times of the snapshots
+        - shape: tuple, (snapshot,) + shape of a single snapshot
+        - dtype: np dtype of the concentrations
+    '''
+    def __init__(self, fname):
+        self.fname = fname
+        self._data = np.memmap(fname, dtype=np.uint8, mode='r')
+        start = len(SPARSE_MAGIC) + 4
+        if bytes(self._data[:len(SPARSE_MAGIC)]) != SPARSE_MAGIC:
+            raise ValueError('%s is not a sparse trajectory file' % fname)
+        header_size = int(np.frombuffer(self._data, '<u4', count=1, offset=len(SPARSE_MAGIC))[0])
+        header = ast.literal_eval(bytes(self._data[start:start + header_size]).decode('latin1'))
+        self.dtype = np.dtype(header['descr'])
+        self._index_dtype = np.dtype(header['index_descr'])
+        snapshot_shape = tuple(header['shape'])
+        self._size = int(np.prod(snapshot_shape))
+
+        # Walk the records, a record cut short by an interrupted write is ignored
+        offsets, times, kinds = [], [], []
+        position = start + header_size
+        entry_size = self._index_dtype.itemsize + self.dtype.itemsize
+        while position + SPARSE_RECORD.itemsize <= len(self._data):
+            record = np.frombuffer(self._data, SPARSE_RECORD, count=1, offset=position)[0]
+            length = SPARSE_RECORD.itemsize + int(record['size'])*entry_size
+            length += -length % 8
+            if position + length > len(self._data):
+                break
+            offsets.append(position)
+            times.append(record['time'])
+            kinds.append(record['kind'])
+            position += length
+        self._end = position
+        self._offsets = np.array(offsets, dtype=np.int64)
+        self._kinds = np.array(kinds, dtype=np.int64)
+        self._keyframes = np.flatnonzero(self._kinds == 0)
+        self.times = np.array(times, dtype=np.float64)
+        self.shape = (len(offsets),) + snapshot_shape
+        self._first = 0
+        self._cache = (-1, None)
+
+    def __len__(self):
+        return self.shape[0]
+
+    @property
+    def ndim(self):
+        return len(self.shape)
+
+    def select(self, start, stop):
+        '''Reader of the snapshots start to stop - 1, without decoding them'''
+        start, stop, step = slice(start, stop).indices(len(self))
+        selection = copy.copy(self)
+        selection._first = self._first + start
+        selection.times = self.times[start:max(start, stop)]
+        selection.shape = (len(selection.times),) + self.shape[1:]
+        return selection
+
+    def _record(self, i):
+        # Flat indices and values of the record i of the file
+        position = int(self._offsets[i]) + SPARSE_RECORD.itemsize
+        record = np.frombuffer(self._data, SPARSE_RECORD, count=1, offset=int(self._offsets[i]))
+        size = int(record[0]['size'])
+        indices = np.frombuffer(self._data, self._index_dtype, count=size, offset=position)
+        values = np.frombuffer(self._data, self.dtype, count=size,
+                               offset=position + size*self._index_dtype.itemsize)
+        return indices, values
+
+    def _decode(self, records):
+        # Dense snapshots of an increasing list of records of the file
+        snapshots = np.zeros((len(records), self._size), dtype=self.dtype)
+        if not len(records):
+            return snapshots
+        keyframe = self._keyframes[np.searchsorted(self._keyframes, records[0], side='right') - 1]
+        cached, state = self._cache
+        if cached < keyframe or cached > records[0]:
+            cached, state = keyframe - 1, np.zeros(self._size, dtype=self.dtype)
+        else:
+            state = state.copy()
+        for n, i in enumerate(records):
+            for j in range(cached + 1, i + 1):
+                indices, values = self._record(j)
+                if self._kinds[j] == 0:
+                    state[:] = 0
+                state[indices] = values
+            cached = i
+            snapshots[n] = state
+        self._cache = (cached, state)
+        return snapshots
+
+    def __getitem__(self, key):
+        if not isinstance(key, tuple):
+            key = (key,)
+        if isinstance(key[0], slice):
+            records = range(*key[0].indices(len(self)))
+            if records.step < 0:
+                snapshots = self._decode([self._first + i for i in reversed(records)])[::-1]
+            else:
+                snapshots = self._decode([self._first + i for i in records])
+            return snapshots.reshape((len(records),) + self.shape[1:])[(slice(None),) + key[1:]]
+        i = int(key[0])
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError('snapshot %i is out of range for %i snapshots'
+                             % (int(key[0]), len(self)))
+        return self._decode([self._first + i])[0].reshape(self.shape[1:])[key[1:]]
+
+    def __array__(self, dtype=None):
+        snapshots = self[:]
+        return snapshots if dtype is None else snapshots.astype(dtype)
+########################################################################################
+
+
+TRAJECTORY_ENCODINGS = ('dense', 'sparse', 'delta')
+
+
+def trajectory_name(prefix, encoding='dense'):
+    '''Name of the trajectory file written for an output prefix and one of TRAJECTORY_ENCODINGS'''
+    if encoding == 'dense':
+        return prefix + '_trajectory.npy'
+    return prefix + '_trajectory.sparse'
+########################################################################################
+
+
+def open_trajectory(prefix, shape, mode='a', encoding='dense', keyframe_interval=100):
+    ''' Opens the trajectory file of an output prefix for appending snapshots
+
+    Arguements:
+        - prefix: string, the output prefix
+        - shape: tuple, shape of a single snapshot
+        - mode (optional): 'a' to append to an existing file or 'w' for a new file, default: 'a'
+        - encoding (optional): one of TRAJECTORY_ENCODINGS. 'dense' writes whole arrays that can be
+            memory mapped, 'sparse' only the nonzero entries of each snapshot and 'delta' the
+            entries that changed since the previous snapshot with a keyframe every
+            keyframe_interval snapshots, default: 'dense'
+
+    Return:
+        - trajectory: TrajectoryStore or SparseTrajectoryStore '''
+    if encoding not in TRAJECTORY_ENCODINGS:
+        raise ValueError('Unknown encoding "%s", please choose one of %s'
+                         % (encoding, TRAJECTORY_ENCODINGS))
+    if mode == 'w':
+        # A new run replaces the trajectory of any encoding
+        for fname in set(trajectory_name(prefix, other) for other in TRAJECTORY_ENCODINGS):
+            if os.path.exists(fname):
+                os.remove(fname)
+    if encoding == 'dense':
+        return TrajectoryStore(trajectory_name(prefix), shape, mode=mode)
+    return SparseTrajectoryStore(trajectory_name(prefix, encoding), shape, mode=mode,
+                                 keyframe_interval=1 if encoding == 'sparse' else keyframe_interval)
+########################################################################################
+
+
+def find_trajectory(prefix):
+    '''Name of the existing trajectory file of an output prefix, dense or sparse'''
+    for encoding in TRAJECTORY_ENCODINGS[:2]:
+        if os.path.exists(trajectory_name(prefix, encoding)):
+            return trajectory_name(prefix, encoding)
+    raise IOError('No trajectory file found for the prefix %s' % prefix)
+########################################################################################
+
+
+def load_trajectory(fname, t_start=None, t_end=None):
+    ''' Opens a trajectory file. Dense files are memory mapped, snapshots are only read from disk
+        when they are used and slices such as snapshots[:, x, y] (one site) or snapshots[..., m]
+        (one molecule) are views of the file. Sparse files return a SparseTrajectory, which
+        decodes the snapshots when it is indexed
+
+    Arguements:
+        - fname: string, name of the trajectory file
+        - t_start, t_end (optional): floats, only the snapshots with t_start <= time <= t_end
+            are returned, default: the whole trajectory
+
+    Return:
+        - times: np array of the times of the snapshots
+        - snapshots: read-only np array (dense files) or SparseTrajectory (sparse files) of
+            concentrations indexed by (snapshot, x, y, molecule ID) '''
+    with open(fname, 'rb') as f:
+        sparse = f.read(len(SPARSE_MAGIC)) == SPARSE_MAGIC
+    if sparse:
+        snapshots = SparseTrajectory(fname)
+        times = snapshots.times
+    else:
+        records = np.load(fname, mmap_mode='r')
+        if records.dtype.names != ('time', 'concentrations'):
+            raise ValueError('%s is not a trajectory file' % fname)
+        times = records['time']
+        snapshots = records['concentrations']
+    start = 0 if t_start is None else np.searchsorted(times, t_start, side='left')
+    end = len(times) if t_end is None else np.searchsorted(times, t_end, side='right')
+    if sparse:
+        return times[start:end], snapshots.select(start, end)
+    return times[start:end], snapshots[start:end]
+########################################################################################
+
+
+def output_concentrations(concentrations, prefix, time=None):
+    '''Appends a snapshot to the trajectory file of the prefix
+
+    Arguements:
+        - concentrations: a numpy array which contains the concentrations of all molecules indexed
+            by (position, molecule)
+        - prefix: a string which will be the prefix to the saved file
+        - time (optional): number stored in the time index of the trajectory '''
+    with TrajectoryStore(trajectory_name(prefix), concentrations.shape,
+                         dtype=concentrations.dtype) as trajectory:
+        trajectory.append(concentrations, time)
+########################################################################################
+
+
+TIDY_FORMATS = ('csv', 'parquet')
+
+
+def tidy_timeseries(molecules, prefix, delete_dat=True, chunk_rows=1000000, file_format='csv'):
+    ''' This function converts the binary trajectory file into a tidy dataframe containing
+        all the time series data. The rows of a block of snapshots are built at once by reshaping
+        the arrays and appended to the output file, so the memory used is bounded by chunk_rows
+
+    Arguements:
+        - prefix: string which is the prefix used to save the time-series data files
+        - delete_dat (optional): if False the trajectory file will be kept, otherwise it will be
+            deleted, default: True
+        - chunk_rows (optional): int, approximate number of rows converted and written at once,
+            default: 1000000
+        - file_format (optional): 'csv' writes prefix_time_series_df.csv with the columns time,
+            position, molecule and abundance. 'parquet' (requires pyarrow) writes the columnar
+            file prefix_time_series.parquet with the columns time, x, y, molecule (dictionary
+            encoded) and abundance, one row group per block of snapshots so that readers can skip
+            the times and molecules they do not need (see read_timeseries), default: 'csv'
+        '''
+    if file_format not in TIDY_FORMATS:
+        raise ValueError('Unknown file format "%s", please choose one of %s'
+                         % (file_format, TIDY_FORMATS))
+    num_molecules = len(molecules)
+    features = ['time', 'position', 'molecule', 'abundance']
+
+    fname = find_trajectory(prefix)
+    times, snapshots = load_trajectory(fname)
+    lattice_shape = snapshots.shape[1:-1]
+    if snapshots.shape[-1] != num_molecules:
+        raise ValueError('The trajectory %s holds %i molecules, not %i'
+                         % (fname, snapshots.shape[-1], num_molecules))
+    # Every snapshot has the same positions and molecules, one category code per row
+    positions = list(np.ndindex(lattice_shape))
+    rows_per_snapshot = len(positions)*num_molecules
+    position_codes = np.repeat(np.arange(len(positions)), num_molecules)
+    molecule_codes = np.tile(np.arange(num_molecules), len(positions))
+    snapshots_per_chunk = max(1, chunk_rows//max(rows_per_snapshot, 1))
+
+    if file_format == 'parquet':
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        axes = ['x', 'y', 'z'][:len(lattice_shape)]
+        if len(axes) < len(lattice_shape):
+            raise ValueError('The parquet format supports lattices of up to three dimensions')
+        coordinates = np.array(positions, dtype=np.int32).reshape(len(positions), len(axes))
+        molecule_names = pa.array([str(m) for m in molecules], pa.string())
+        schema = pa.schema([('time', pa.float64())] + [(axis, pa.int32()) for axis in axes]
+                           + [('molecule', pa.dictionary(pa.int32(), pa.string())),
+                              ('abundance', pa.float64())])
+        df_name = prefix + '_time_series.parquet'
+        writer = pq.ParquetWriter(df_name, schema)
+    else:
+        positions = [str(position) for position in positions]
+        df_name = prefix + '_time_series_df.csv'
+        writer = open(df_name, 'w', newline='')
+        writer.write(','.join(features) + os.linesep)
+    try:
+        for first in range(0, len(times), snapshots_per_chunk):
+            chunk_times = times[first:first + snapshots_per_chunk]
+            num_rows = len(chunk_times)*rows_per_snapshot
+            chunk_positions = np.tile(position_codes, len(chunk_times))
+            chunk_molecules = np.tile(molecule_codes, len(chunk_times))
+            abundances = snapshots[first:first + snapshots_per_chunk].reshape(num_rows)
+            if file_format == 'parquet':
+                molecule_column = pa.DictionaryArray.from_arrays(chunk_molecules.astype(np.int32),
+                                                                 molecule_names)
+                columns = ([pa.array(np.repeat(chunk_times, rows_per_snapshot))]
+                           + [pa.array(coordinates[chunk_positions, i]) for i in range(len(axes))]
+                           + [molecule_column, pa.array(abundances)])
+                writer.write_table(pa.Table.from_arrays(columns, schema=schema),
+                                   row_group_size=num_rows)
+            else:
+                first_row = first*rows_per_snapshot
+                tidy_df = pd.DataFrame({'time': np.repeat(chunk_times, rows_per_snapshot),
+                                        'position': pd.Categorical.from_codes(chunk_positions,
+                                                                              positions),
+                                        'molecule': pd.Categorical.from_codes(chunk_molecules,
+                                                                              molecules),
+                                        'abundance': abundances},
+                                       index=np.arange(first_row, first_row + num_rows),
+                                       columns=features)
+                # the unnamed index column is better for importing to R
+                tidy_df.to_csv(writer, header=False)
+    finally:
+        writer.close()
+    del times, snapshots
+    if delete_dat:
+        # Delete the File when we're done with it
+        os.remove(fname)
+
+########################################################################################
+
+
+def read_timeseries(fname, molecules=None, t_start=None, t_end=None, columns=None):
+    ''' Reads a tidy time series written by tidy_timeseries. Parquet files (requires pyarrow) only
+        read the requested columns and skip the row groups outside of the requested times and
+        molecules
+
+    Arguements:
+        - fname: string, name of the .csv or .parquet file
+        - molecules (optional): list of molecule names to read, default: all molecules
+        - t_start, t_end (optional): floats, only the rows with t_start <= time <= t_end are read,
+            default: all times
+        - columns (optional): list of the columns to return, default: all columns
+
+    Return:
+        - tidy_df: pandas DataFrame of the time series '''
+    if fname.endswith('.parquet'):
+        import pyarrow.parquet as pq
+        filters = []
+        if molecules is not None:
+            filters.append(('molecule', 'in', [str(m) for m in molecules]))
+        if t_start is not None:
+            filters.append(('time', '>=', t_start))
+        if t_end is not None:
+            filters.append(('time', '<=', t_end))
+        return pq.read_table(fname, columns=columns, filters=filters or None).to_pandas()
+
+    tidy_df = pd.read_csv(fname)
+    if molecules is not None:
+        tidy_df = tidy_df[tidy_df['molecule'].isin(molecules)]
+    if t_start is not None:
+        tidy_df = tidy_df[tidy_df['time'] >= t_start]
+    if t_end is not None:
+        tidy_df = tidy_df[tidy_df['time'] <= t_end]
+    if columns is not None:
+        tidy_df = tidy_df[columns]
+    return tidy_df
+########################################################################################
+
+
+def generate_ts_df(infile, outname, molecules=None):
+
+    # Load Tidy Data File
+    tidy_df = read_timeseries(infile, molecules=molecules,
+                              columns=['time', 'molecule', 'abundance'])
+
+    # Get the times
+    times = tidy_df['time'].unique()
+    # Get Molecules
+    molecules = np.asarray(tidy_df['molecule'].unique())
+
+    timeseries_df = pd.DataFrame(index=molecules, columns=times)
+    # For each time, construct a new entry in the time series df
+    for t in times:
+        t_df = tidy_df[tidy_df.time == t].filter(items=['abundance'])
+        t_df = t_df.set_index(molecules)
+        timeseries_df[t] = t_df
+    # print timeseries_df
+    # raw_input("Enter")
+    timeseries_df.to_csv(outname)
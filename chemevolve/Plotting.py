@@ -3,10 +3,12 @@ import numpy as np
 import pandas as pd
 import seaborn as sns
 
+from .OutputFunctions import generate_ts_df, read_timeseries
+
 def plot_length_distribution(filename, savename=None):
     '''Plots the time averaged length distribution of molecules in the entire system. Shows plot
         unless a savename is specified '''
-    ts_df = pd.read_csv(filename)
+    ts_df = read_timeseries(filename, columns=['molecule', 'abundance'])
 
     static_df = ts_df.filter(items=['molecule', 'abundance'])
 
@@ -37,7 +39,7 @@ def plot_length_distribution(filename, savename=None):
 def plot_molecule_distribution(filename, savename=None):
     '''Plots the time averaged molecule distribution of molecules in the entire system. Shows plot
         unless a savename is specified '''
-    ts_df = pd.read_csv(filename)
+    ts_df = read_timeseries(filename, columns=['molecule', 'abundance'])
     max_length = 0
     static_df = ts_df.filter(items=['molecule', 'abundance'])
 
@@ -113,7 +115,7 @@ def plot_time_series(filename, print_molcules, savename=None):
     import random
     color_palette = sns.color_palette("husl", len(print_molcules))
     colorindex = [x for x in range(len(print_molcules))]
-    generate_ts_df(filename, 'temp_TS.csv')
+    generate_ts_df(filename, 'temp_TS.csv', molecules=print_molcules)
     ts_df = pd.read_csv('temp_TS.csv', index_col=0)
     ts_df = ts_df.T
 
@@ -144,21 +146,3 @@ def plot_time_series(filename, print_molcules, savename=None):
     else:
         plt.show()
     plt.close()
-
-########################################################################################
-def generate_ts_df(infile, outname):
-    # Load Tidy Data File
-    tidy_df = pd.read_csv(infile)
-
-    # Get the times
-    times = tidy_df['time'].unique()
-    # Get Molecules
-    molecules = tidy_df['molecule'].unique()
-
-    timeseries_df = pd.DataFrame(index=molecules, columns=times)
-    # For each time, construct a new entry in the time series df
-    for t in times:
-        t_df = tidy_df[tidy_df.time == t].filter(items=['abundance'])
-        t_df = t_df.set_index(molecules)
-        timeseries_df[t] = t_df
-    timeseries_df.to_csv(outname)
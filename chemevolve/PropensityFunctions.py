@@ -1,137 +1,242 @@
-import numpy as np
-import math
-
-def standard_propensity(rxn, CRS, concentrations):
-	''' Standard Propensity function calculates propensity as the concentrations of the reactants raised to their coefficients 
-
-	Arguements:
-		- rxn: Reaction object
-		- CRS: CRS object for system
-		- concentrations: list of molecule concentrations indexed by ID
-
-	Return:
-		- Ap: float, propensity of rxn given the current concentrations
-
-	'''
-	# Get data out of rxn and concentration objects
-	reactant_concentrations = concentrations[rxn.reactants]
-	catalyst_concentrations = concentrations[rxn.catalysts]
-	reactant_coeff = rxn.reactant_coeff
-	catalyzed_constants = rxn.catalyzed_constants
-
-	#Calculate Propensity
-	Ap = 1.0 #rxn.constant #*np.prod( np.power(reactant_concentrations, reactant_coeff) )
-	num_reactants = len(reactant_concentrations)
-	for i in range(num_reactants):
-		Ap = Ap*np.power(rxn.constant*reactant_concentrations[i],reactant_coeff[i])
-	
-	# Ap = rxn.constant
-	#Ap = Ap*np.prod(std_propensity_helper1(reactant_concentrations, reactant_coeff))
-	
-	enhancement = 0.0
-	#if catalyst_concentrations != [] and sum(catalyst_concentrations) != 0.0:
-	
-	num_cats = len(catalyst_concentrations)
-	for i in range(num_cats):
-		#print 'catalyst: ', rxn.catalysts[i]
-
-		enhancement += catalyst_concentrations[i]*catalyzed_constants[i]
-		#print 'enhancement: ', enhancement
-		#enhancement += np.sum( std_propensity_helper2(catalyst_concentrations,catalyzed_constants) )
-	Ap = Ap*(1+enhancement)
-	return Ap
-
-
-	
-def calculate_propensities(CRS, concentrations, **kwargs):
-	''' Calculate the propensity of a reaction according to the concentrations and propensity function
-
-	Arguements: 
-		- CRS: CRS object
-		- concentrations: array of molecule concentrations indexed by (position,ID) 
-		- propensity_function: function option used to calculate reaction propensities
-
-	Return:
-		propensity_arr: an array of floats giving the total reaction propensity at each point in the system '''
-	# Initialize an Empty Array to store propensities for each lattice site
-	lattice_size = np.product(concentrations.shape[:-1])
-	lattice_shape = concentrations.shape[:-1]
-	propensity_arr = np.zeros(lattice_size).reshape(lattice_shape)
-	
-	# Iterate over each lattice site. Site is the propensity and index gives its location
-	for site_index, site_Ap in np.ndenumerate(propensity_arr):
-		(x,y) = site_index
-		# Iterate over each reactation
-		for rxn in CRS.reactions:
-
-			if rxn.prop == 'STD':
-				Ap = standard_propensity(rxn, CRS, concentrations[site_index])
-				
-			elif rxn.prop == 'RCM':
-				mu = kwargs['mu']
-				Ap = replicator_composition_propensity_envMutation(rxn, CRS, concentrations[site_index], mu = mu)
-				
-			site_Ap += Ap
-
-		propensity_arr[site_index] = site_Ap
-		#print site_Ap
-	
-	return propensity_arr
-
-
-def replicator_composition_propensity_envMutation(rxn, CRS, concentrations, mu = 0.001):
-	''' Replication Propensity function calculates propensity as the concentrations of the replicator and the composition of the enivornment 
-		This propensity function calcuates the mutation propensity as a function of the resources availible
-	Arguements:
-		- rxn: Reaction object
-		- CRS: CRS object for system
-		- concentrations: list of molecule concentrations indexed by ID
-
-	Return:
-		- Ap: float, propensity of rxn given the current concentrations
-
-	'''
-	#from ReplicatorFunctions import get_composition
-
-	# Get data out of rxn and concentration objects
-	reactant_concentrations = concentrations[rxn.reactants]
-	replicator_concentration = concentrations[rxn.products]
-	reactant_coeff = rxn.reactant_coeff
-
-	#catalyzed_constants = rxn.catalyzed_constants
-
-	#Calculate Propensity
-	Ap = rxn.constant 
-
-	nA = reactant_coeff[0] # If you're reading this you should confirm that 'A' is stored at index 0
-	nB = reactant_coeff[1] # If you're reading this you should confirm that 'B' is stored at index 1
-	R_L = nA + nB
-	if mu != 0:
-
-	    binomialA = 0    #Used for calculating the contribution from copying A-residues
-	    binomialB = 0   #Used for calculating the intermediate of contribution from copying A-residues and B-residues
-	    q_error = 0.0
-	    
-	    for eA in range(0, nA + 1):
-	        #Here eA is the number of errors in copying A-residues
-	        binomialA = (math.factorial(nA)/(math.factorial(nA - eA)*math.factorial(eA)))*pow(rxn.constant*reactant_concentrations[0], nA - eA)*pow(rxn.constant*reactant_concentrations[1], eA)  #calculates number of sequences with eA errors in copying A and the resource contribution to these sequences
-
-	        for eB in range(0, nB + 1):
-	            # Here eB is the number of errors in copying B-residues
-	            if eA == 0 and eB == 0:
-	                # Keeps perfect copying probability seperate from copies made with errors
-	                q_p = pow(1 - mu, R_L)*pow(rxn.constant*reactant_concentrations[0], nA)*pow(rxn.constant*reactant_concentrations[1], nB)
-	                
-	            else:
-	                binomialB = (math.factorial(nB)/(math.factorial(nB - eB)*math.factorial(eB)))*pow(rxn.constant*reactant_concentrations[1], nB - eB)*pow(rxn.constant*reactant_concentrations[0], eB) #adds number of mutants with eB B-errors
-	                
-	                q_error += pow(mu, eA + eB)*pow(1 - mu, R_L - eA - eB)*binomialA*binomialB
-
-	elif mu == 0:
-	    q_p = pow(sequences[ID].kr*monomers['A'].tot_count, nA)*pow(sequences[ID].kr*monomers['B'].tot_count, nB)
-	    q_error = 0
-
-	Ap = (q_p + q_error)*replicator_concentration 
-
-	
+import numpy as np
+import math
+
+def reactant_combinations(n, c):
+	''' Number of distinct ways to choose c reactant molecules out of n, the falling factorial
+	n(n-1)...(n-c+1)/c! which matches the standard propensity of the C engines
+
+	Arguements:
+		- n: number of molecules of the reactant
+		- c: integer reactant coefficient
+
+	Return:
+		- float, n choose c (zero when n < c)
+	'''
+	if n < c:
+		return 0.0
+	combinations = 1.0
+	for i in range(c):
+		combinations = combinations*(n - i)/(i + 1)
+	return combinations
+
+def standard_propensity(rxn, CRS, concentrations):
+	''' Standard Propensity function calculates the mass-action propensity as the rate constant
+	times the number of distinct combinations of reactant molecules, (n choose coefficient) for
+	each reactant
+
+	Arguements:
+		- rxn: Reaction object
+		- CRS: CRS object for system
+		- concentrations: list of molecule concentrations indexed by ID
+
+	Return:
+		- Ap: float, propensity of rxn given the current concentrations
+
+	'''
+	# Get data out of rxn and concentration objects
+	reactant_concentrations = concentrations[rxn.reactants]
+	catalyst_concentrations = concentrations[rxn.catalysts]
+	reactant_coeff = rxn.reactant_coeff
+	catalyzed_constants = rxn.catalyzed_constants
+
+	#Calculate Propensity
+	Ap = rxn.constant
+	num_reactants = len(reactant_concentrations)
+	for i in range(num_reactants):
+		Ap = Ap*reactant_combinations(reactant_concentrations[i], reactant_coeff[i])
+	
+	enhancement = 0.0
+	#if catalyst_concentrations != [] and sum(catalyst_concentrations) != 0.0:
+	
+	num_cats = len(catalyst_concentrations)
+	for i in range(num_cats):
+		#print 'catalyst: ', rxn.catalysts[i]
+
+		enhancement += catalyst_concentrations[i]*catalyzed_constants[i]
+		#print 'enhancement: ', enhancement
+		#enhancement += np.sum( std_propensity_helper2(catalyst_concentrations,catalyzed_constants) )
+	Ap = Ap*(1+enhancement)
+	return Ap
+
+
+	
+def pad_csr(ptr, idx, values, pad_idx, pad_value):
+	''' Converts a CSR triple into dense (reaction, entry) matrices, rows shorter than the longest
+	are padded so that array operations can treat every reaction alike
+
+	Arguements:
+		- ptr, idx, values: CSR arrays, the entries of reaction r are idx[ptr[r]:ptr[r+1]]
+		- pad_idx: index stored in the padded entries
+		- pad_value: value stored in the padded entries
+
+	Return:
+		- idx_matrix: np int array indexed by (reaction, entry)
+		- value_matrix: np array indexed by (reaction, entry)
+	'''
+	counts = np.diff(ptr)
+	num_reactions = len(counts)
+	width = counts.max() if num_reactions > 0 else 0
+	idx_matrix = np.full((num_reactions, width), pad_idx, dtype=np.intp)
+	value_matrix = np.full((num_reactions, width), pad_value, dtype=np.asarray(values).dtype)
+	rows = np.repeat(np.arange(num_reactions), counts)
+	cols = np.arange(len(idx)) - np.repeat(ptr[:-1], counts)
+	idx_matrix[rows, cols] = idx
+	value_matrix[rows, cols] = values
+	return idx_matrix, value_matrix
+
+def vectorized_reactant_combinations(n, c):
+	''' Elementwise n choose c for arrays of abundances n and integer coefficients c, the vectorized
+	form of reactant_combinations
+
+	Return:
+		- np double array, n choose c (zero where n < c)
+	'''
+	n, c = np.broadcast_arrays(np.asarray(n, dtype=np.float64), c)
+	combinations = np.ones(n.shape)
+	for i in range(int(c.max()) if c.size > 0 else 0):
+		active = c > i
+		combinations[active] *= (n[active] - i) / (i + 1)
+	combinations[n < c] = 0.0
+	return combinations
+
+def sparse_propensities(concentrations, constants, propensity_ints, reactant_csr, catalyst_csr,
+		replicator_tables=None):
+	''' Propensity of every reaction at every lattice site in a handful of array operations, using the
+	sparse arrays of build_sparse_network. Matches the propensities of the C engines
+
+	Arguements:
+		- concentrations: array of molecule abundances indexed by (..., molecule ID), e.g. (x, y, ID)
+		- constants: np double array of reaction constants
+		- propensity_ints: np int array of propensity codes (0 standard, 1 replicator)
+		- reactant_csr: tuple (ptr, idx, coeff) of the reactants
+		- catalyst_csr: tuple (ptr, idx, constants) of the catalysts
+		- replicator_tables (optional): tuple (species, weight_ptr, weights) from
+			build_replicator_tables, needed for replicator reactions
+
+	Return:
+		- propensities: np double array indexed by (..., reaction ID)
+	'''
+	concentrations = np.asarray(concentrations, dtype=np.float64)
+	num_molecules = concentrations.shape[-1]
+	# A trailing column of ones is used by the padded entries
+	padded_conc = np.concatenate([concentrations, np.ones(concentrations.shape[:-1] + (1,))], axis=-1)
+
+	# Standard propensities, k * prod(n choose c) * (1 + sum(f * catalyst))
+	reactant_idx, reactant_coeff = pad_csr(*reactant_csr, pad_idx=num_molecules, pad_value=0)
+	combinations = vectorized_reactant_combinations(padded_conc[..., reactant_idx], reactant_coeff)
+	catalyst_idx, catalyst_constants = pad_csr(*catalyst_csr, pad_idx=num_molecules, pad_value=0.0)
+	enhancement = np.sum(catalyst_constants * padded_conc[..., catalyst_idx], axis=-1)
+	propensities = constants * np.prod(combinations, axis=-1) * (1.0 + enhancement)
+	propensities[..., propensity_ints != 0] = 0.0
+
+	# Replicator propensities, replicator * sum_j W[j] (k A)^j (k B)^(R_L - j)
+	rcm = np.flatnonzero(propensity_ints == 1)
+	if len(rcm) > 0 and replicator_tables is not None:
+		species = replicator_tables[0].reshape(-1, 3)[rcm]
+		weight_ptr = replicator_tables[1]
+		starts = weight_ptr[rcm]
+		lengths = weight_ptr[rcm + 1] - starts
+		j = np.arange(lengths.max())
+		in_table = j < lengths[:, None]
+		entries = np.minimum(starts[:, None] + j, len(replicator_tables[2]) - 1)
+		weights = np.where(in_table, replicator_tables[2][entries], 0.0)
+		b_powers = np.where(in_table, lengths[:, None] - 1 - j, 0)
+		a = constants[rcm] * concentrations[..., species[:, 0]]
+		b = constants[rcm] * concentrations[..., species[:, 1]]
+		polynomial = np.sum(weights * a[..., None]**j * b[..., None]**b_powers, axis=-1)
+		# A copy can only be made if all of its resources are present
+		enough = np.all(padded_conc[..., reactant_idx[rcm]] >= reactant_coeff[rcm], axis=-1)
+		propensities[..., rcm] = np.where(enough, polynomial * concentrations[..., species[:, 2]], 0.0)
+	return propensities
+
+def calculate_reaction_propensities(CRS, concentrations, **kwargs):
+	''' Calculate the propensity of every reaction at every lattice site
+
+	Arguements:
+		- CRS: CRS object
+		- concentrations: array of molecule concentrations indexed by (x, y, ID)
+		- mu (optional): mutation probability of replicator reactions, default: 0.001
+		- network (optional): arrays from build_sparse_network(CRS), built if not given
+
+	Return:
+		propensity_arr: an array of floats indexed by (x, y, reaction ID) '''
+	from .InitializeFunctions import build_sparse_network
+	network = kwargs.get('network')
+	if network is None:
+		network = build_sparse_network(CRS, mu=kwargs.get('mu', 0.001))
+	(constants, propensity_ints, reactant_csr, stoich_csr, catalyst_csr, dependency_csr,
+		replicator_tables) = network
+	return sparse_propensities(concentrations, constants, propensity_ints, reactant_csr, catalyst_csr,
+		replicator_tables)
+
+def calculate_propensities(CRS, concentrations, **kwargs):
+	''' Calculate the propensity of a reaction according to the concentrations and propensity function
+
+	Arguements: 
+		- CRS: CRS object
+		- concentrations: array of molecule concentrations indexed by (position,ID) 
+		- mu (optional): mutation probability of replicator reactions, default: 0.001
+		- network (optional): arrays from build_sparse_network(CRS), built if not given
+
+	Return:
+		propensity_arr: an array of floats giving the total reaction propensity at each point in the system '''
+	return calculate_reaction_propensities(CRS, concentrations, **kwargs).sum(axis=-1)
+
+
+def replicator_composition_propensity_envMutation(rxn, CRS, concentrations, mu = 0.001):
+	''' Replication Propensity function calculates propensity as the concentrations of the replicator and the composition of the enivornment 
+		This propensity function calcuates the mutation propensity as a function of the resources availible
+	Arguements:
+		- rxn: Reaction object
+		- CRS: CRS object for system
+		- concentrations: list of molecule concentrations indexed by ID
+
+	Return:
+		- Ap: float, propensity of rxn given the current concentrations
+
+	'''
+	#from ReplicatorFunctions import get_composition
+
+	# Get data out of rxn and concentration objects
+	reactant_concentrations = concentrations[rxn.reactants]
+	replicator_concentration = concentrations[rxn.products]
+	reactant_coeff = rxn.reactant_coeff
+
+	#catalyzed_constants = rxn.catalyzed_constants
+
+	#Calculate Propensity
+	Ap = rxn.constant 
+
+	nA = reactant_coeff[0] # If you're reading this you should confirm that 'A' is stored at index 0
+	nB = reactant_coeff[1] # If you're reading this you should confirm that 'B' is stored at index 1
+	R_L = nA + nB
+	if mu != 0:
+
+	    binomialA = 0    #Used for calculating the contribution from copying A-residues
+	    binomialB = 0   #Used for calculating the intermediate of contribution from copying A-residues and B-residues
+	    q_error = 0.0
+	    
+	    for eA in range(0, nA + 1):
+	        #Here eA is the number of errors in copying A-residues
+	        binomialA = (math.factorial(nA)/(math.factorial(nA - eA)*math.factorial(eA)))*pow(rxn.constant*reactant_concentrations[0], nA - eA)*pow(rxn.constant*reactant_concentrations[1], eA)  #calculates number of sequences with eA errors in copying A and the resource contribution to these sequences
+
+	        for eB in range(0, nB + 1):
+	            # Here eB is the number of errors in copying B-residues
+	            if eA == 0 and eB == 0:
+	                # Keeps perfect copying probability seperate from copies made with errors
+	                q_p = pow(1 - mu, R_L)*pow(rxn.constant*reactant_concentrations[0], nA)*pow(rxn.constant*reactant_concentrations[1], nB)
+	                
+	            else:
+	                binomialB = (math.factorial(nB)/(math.factorial(nB - eB)*math.factorial(eB)))*pow(rxn.constant*reactant_concentrations[1], nB - eB)*pow(rxn.constant*reactant_concentrations[0], eB) #adds number of mutants with eB B-errors
+	                
+	                q_error += pow(mu, eA + eB)*pow(1 - mu, R_L - eA - eB)*binomialA*binomialB
+
+	elif mu == 0:
+	    q_p = (pow(rxn.constant*reactant_concentrations[0], nA)
+	           *pow(rxn.constant*reactant_concentrations[1], nB))
+	    q_error = 0
+
+	Ap = (q_p + q_error)*replicator_concentration 
+
+	
 	return Ap
\ No newline at end of file
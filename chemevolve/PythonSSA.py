@@ -0,0 +1,330 @@
+import math
+import numpy as np
+
+from .InitializeFunctions import build_sparse_network
+
+# Numba is optional, without it the engine runs as (much slower) plain Python
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+    def njit(*args, **kwargs):
+        '''Stand-in for numba.njit which leaves the function as plain Python'''
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda function: function
+
+####################################################
+# Direct method engine, a line by line port of the direct method in clibs/SSA.c. The same
+# random numbers and floating point operations are used, so a simulation gives the same
+# trajectory for a seed and stream as the C library.
+####################################################
+MASK32 = np.uint64(0xFFFFFFFF)
+PCG_MULTIPLIER = np.uint64(6364136223846793005)
+INVERSE_FACTORIAL = np.array([1.0, 1.0, 1.0/2.0, 1.0/6.0, 1.0/24.0, 1.0/120.0, 1.0/720.0,
+                              1.0/5040.0, 1.0/40320.0])
+
+@njit(cache=True, nogil=True)
+def pcg32_random(rng):
+    '''Next 32 bit output of the PCG32 generator whose (state, inc) are stored in rng'''
+    oldstate = rng[0]
+    rng[0] = oldstate * PCG_MULTIPLIER + rng[1]
+    xorshifted = (((oldstate >> np.uint64(18)) ^ oldstate) >> np.uint64(27)) & MASK32
+    rot = oldstate >> np.uint64(59)
+    return ((xorshifted >> rot) | (xorshifted << ((np.uint64(32) - rot) & np.uint64(31)))) & MASK32
+
+@njit(cache=True, nogil=True)
+def pcg32_seed(rng, seed, stream):
+    rng[0] = np.uint64(0)
+    rng[1] = (stream << np.uint64(1)) | np.uint64(1)
+    pcg32_random(rng)
+    rng[0] = rng[0] + seed
+    pcg32_random(rng)
+
+@njit(cache=True, nogil=True)
+def rng_uniform(rng):
+    '''Uniform double in the open interval (0, 1) with 53 random bits'''
+    a = pcg32_random(rng) >> np.uint64(5)
+    b = pcg32_random(rng) >> np.uint64(6)
+    return (float((a << np.uint64(26)) + b) + 0.5) * (1.0 / 9007199254740992.0)
+
+@njit(cache=True, nogil=True)
+def exponential_wait(rng, Ap):
+    if Ap > 0.0:
+        return -math.log(rng_uniform(rng)) / Ap
+    return np.inf
+
+@njit(cache=True, nogil=True)
+def reactant_combinations(n, c):
+    '''Number of ways to choose c molecules out of n'''
+    if n < c:
+        return 0.0
+    if c == 0:
+        return 1.0
+    if c == 1:
+        return n
+    if c == 2:
+        return 0.5 * n * (n - 1.0)
+    if c == 3:
+        return n * (n - 1.0) * (n - 2.0) * (1.0 / 6.0)
+    falling = n
+    for i in range(1, c):
+        falling *= n - i
+    if c < len(INVERSE_FACTORIAL):
+        return falling * INVERSE_FACTORIAL[c]
+    inverse = 1.0
+    for i in range(2, c + 1):
+        inverse /= i
+    return falling * inverse
+
+@njit(cache=True, nogil=True)
+def sparse_propensity(network, site_conc, r):
+    '''Propensity of reaction r given the concentrations at a single lattice site'''
+    (constants, propensity_ints, reactant_ptr, reactant_idx, reactant_coeff, stoich_ptr, stoich_idx,
+     stoich_coeff, catalyst_ptr, catalyst_idx, catalyst_constants, dependency_ptr, dependency_idx,
+     replicator_species, weight_ptr, weights) = network
+    current_Ap = constants[r]
+    if propensity_ints[r] == 0:
+        # Standard propensity
+        for i in range(reactant_ptr[r], reactant_ptr[r + 1]):
+            n = site_conc[reactant_idx[i]]
+            current_Ap = current_Ap * reactant_combinations(n, reactant_coeff[i])
+        cat_enhance = 0.0
+        for i in range(catalyst_ptr[r], catalyst_ptr[r + 1]):
+            cat_enhance += catalyst_constants[i] * site_conc[catalyst_idx[i]]
+        return current_Ap * (1.0 + cat_enhance)
+    elif propensity_ints[r] == 1:
+        # Replicator propensity, the copy can only be made if all of its resources are present
+        for i in range(reactant_ptr[r], reactant_ptr[r + 1]):
+            if site_conc[reactant_idx[i]] < reactant_coeff[i]:
+                return 0.0
+        a = constants[r] * site_conc[replicator_species[3 * r]]
+        b = constants[r] * site_conc[replicator_species[3 * r + 1]]
+        R_L = weight_ptr[r + 1] - weight_ptr[r] - 1
+        b_power = 1.0
+        current_Ap = weights[weight_ptr[r] + R_L]
+        for j in range(R_L - 1, -1, -1):
+            b_power *= b
+            current_Ap = current_Ap * a + weights[weight_ptr[r] + j] * b_power
+        return current_Ap * site_conc[replicator_species[3 * r + 2]]
+    return 0.0
+
+@njit(cache=True, nogil=True)
+def sumtree_build(tree, num_leaves):
+    tree[0] = 0.0
+    for i in range(num_leaves - 1, 0, -1):
+        tree[i] = tree[2 * i] + tree[2 * i + 1]
+
+@njit(cache=True, nogil=True)
+def sumtree_update(tree, num_leaves, leaf, value):
+    i = num_leaves + leaf
+    tree[i] = value
+    i = i // 2
+    while i >= 1:
+        tree[i] = tree[2 * i] + tree[2 * i + 1]
+        i = i // 2
+
+@njit(cache=True, nogil=True)
+def sumtree_sample(tree, num_leaves, dice_roll):
+    i = 1
+    while i < num_leaves:
+        if (dice_roll < tree[2 * i] or tree[2 * i + 1] <= 0.0) and tree[2 * i] > 0.0:
+            i = 2 * i
+        else:
+            dice_roll -= tree[2 * i]
+            i = 2 * i + 1
+    return i - num_leaves
+
+@njit(cache=True, nogil=True)
+def direct_init(network, concentrations, site_tree, rxn_trees, clock, rng):
+    '''Fill the sum trees from the concentrations (num_sites, num_molecules) and draw the first
+    event. clock holds (current_t, next_event_t, rxn_count)'''
+    num_reactions = len(network[0])
+    site_leaves = len(site_tree) // 2
+    rxn_leaves = rxn_trees.shape[1] // 2
+    for site in range(concentrations.shape[0]):
+        for r in range(num_reactions):
+            rxn_trees[site, rxn_leaves + r] = sparse_propensity(network, concentrations[site], r)
+        sumtree_build(rxn_trees[site], rxn_leaves)
+        site_tree[site_leaves + site] = rxn_trees[site, 1]
+    sumtree_build(site_tree, site_leaves)
+    clock[1] = clock[0] + exponential_wait(rng, site_tree[1])
+
+@njit(cache=True, nogil=True)
+def direct_fire(network, concentrations, site_tree, rxn_trees, clock, rng):
+    stoich_ptr, stoich_idx, stoich_coeff = network[5], network[6], network[7]
+    dependency_ptr, dependency_idx = network[11], network[12]
+    site_leaves = len(site_tree) // 2
+    rxn_leaves = rxn_trees.shape[1] // 2
+    # Pick the Lattice site first, then the reaction at that lattice site
+    picked_site = sumtree_sample(site_tree, site_leaves, site_tree[1] * rng_uniform(rng))
+    rxn_tree = rxn_trees[picked_site]
+    picked_r = sumtree_sample(rxn_tree, rxn_leaves, rxn_tree[1] * rng_uniform(rng))
+    site_conc = concentrations[picked_site]
+
+    clock[0] = clock[1]
+    for i in range(stoich_ptr[picked_r], stoich_ptr[picked_r + 1]):
+        site_conc[stoich_idx[i]] += stoich_coeff[i]
+    # Update only the reactions which read a molecule changed by the picked reaction
+    for i in range(dependency_ptr[picked_r], dependency_ptr[picked_r + 1]):
+        r = dependency_idx[i]
+        sumtree_update(rxn_tree, rxn_leaves, r, sparse_propensity(network, site_conc, r))
+    sumtree_update(site_tree, site_leaves, picked_site, rxn_tree[1])
+    clock[1] = clock[0] + exponential_wait(rng, site_tree[1])
+
+@njit(cache=True, nogil=True)
+def direct_advance(network, concentrations, site_tree, rxn_trees, clock, rng, next_t):
+    '''Fire events until next_t, the pending event is kept so the state is the state at next_t'''
+    while clock[1] < next_t:
+        direct_fire(network, concentrations, site_tree, rxn_trees, clock, rng)
+        clock[2] += 1
+    if next_t > clock[0]:
+        clock[0] = next_t
+
+@njit(cache=True, nogil=True)
+def direct_advance_reactions(network, concentrations, site_tree, rxn_trees, clock, rng, num_events):
+    i = 0
+    while i < num_events and clock[1] < np.inf:
+        direct_fire(network, concentrations, site_tree, rxn_trees, clock, rng)
+        clock[2] += 1
+        i += 1
+
+@njit(cache=True, nogil=True)
+def direct_run_schedule(network, concentrations, site_tree, rxn_trees, clock, rng, times, out):
+    for i in range(len(times)):
+        direct_advance(network, concentrations, site_tree, rxn_trees, clock, rng, times[i])
+        out[i] = concentrations
+
+def sumtree_leaves(n):
+    '''Smallest power of two which can hold n leaves'''
+    num_leaves = 1
+    while num_leaves < n:
+        num_leaves *= 2
+    return num_leaves
+
+####################################################
+class PythonSSASimulation(object):
+    '''A persistent stochastic simulation of a CRS which runs without the C library, using the
+    direct method compiled with Numba when it is installed (plain Python otherwise). It has the
+    interface of SSASimulation and gives the same trajectories as its 'direct' engine.
+
+    Attributes:
+        - concentrations: np double array of molecule abundances indexed by (x, y, molecule ID)
+        - engine: name of the engine, always 'direct'
+        - tau: current time of the simulation
+        - reaction_count: number of reaction events so far
+    '''
+    def __init__(self, concentrations, CRS, random_seed, tau=0.0, engine='direct', epsilon=0.03,
+                 stream=0, mu=0.001, diffusion_rates=None, network=None, constants=None):
+        if engine != 'direct':
+            raise ValueError('The python backend only implements the "direct" engine, not "%s"'
+                             % engine)
+        if diffusion_rates is not None and np.any(np.asarray(diffusion_rates) > 0):
+            raise ValueError('Diffusion is only simulated by the "nsm" engine')
+        if (concentrations.ndim != 3 or concentrations.dtype != np.float64
+                or not concentrations.flags['C_CONTIGUOUS']):
+            raise ValueError('concentrations must be a C contiguous float64 array indexed by '
+                             '(x, y, molecule ID)')
+        if concentrations.shape[2] != len(CRS.molecule_list):
+            raise ValueError('concentrations has %i molecules but the CRS has %i'
+                             % (concentrations.shape[2], len(CRS.molecule_list)))
+        if random_seed < 0 or stream < 0:
+            raise ValueError('random_seed and stream must be non-negative integers')
+
+        self.concentrations = concentrations
+        self.engine = engine
+        if network is None:
+            network = build_sparse_network(CRS, mu=mu)
+        (network_constants, propensity_ints, reactant_csr, stoich_csr, catalyst_csr, dependency_csr,
+         replicator_tables) = network
+        if constants is None:
+            constants = network_constants
+        else:
+            constants = np.ascontiguousarray(constants, np.float64)
+            if constants.shape != network_constants.shape:
+                raise ValueError('constants must hold one rate constant for each of the %i '
+                                 'reactions' % len(network_constants))
+        # Empty arrays are given a dummy entry so that every array has a concrete type
+        self._network = (constants, propensity_ints) + tuple(reactant_csr) + tuple(stoich_csr) + \
+            tuple(catalyst_csr) + tuple(dependency_csr) + tuple(replicator_tables)
+        self._network = tuple(arr if len(arr) > 0 else np.zeros(1, arr.dtype)
+                              for arr in self._network)
+
+        num_sites = concentrations.shape[0] * concentrations.shape[1]
+        self._sites = concentrations.reshape(num_sites, concentrations.shape[2])
+        self._site_tree = np.zeros(2 * sumtree_leaves(num_sites))
+        self._rxn_trees = np.zeros((num_sites, 2 * sumtree_leaves(len(constants))))
+        self._clock = np.array([tau, tau, 0.0])
+        self._rng = np.zeros(2, dtype=np.uint64)
+        with np.errstate(over='ignore'):
+            pcg32_seed(self._rng, np.uint64(random_seed), np.uint64(stream))
+        self.refresh()
+
+    def _call(self, function, *args):
+        # Plain Python PCG arithmetic wraps around like the C code, silence numpy about it
+        with np.errstate(over='ignore'):
+            function(self._network, self._sites, self._site_tree, self._rxn_trees, self._clock,
+                     self._rng, *args)
+
+    @property
+    def tau(self):
+        return self._clock[0]
+
+    @property
+    def reaction_count(self):
+        return int(self._clock[2])
+
+    def advance(self, next_t):
+        '''Evolves the simulation to time next_t and returns the new time'''
+        self._call(direct_advance, float(next_t))
+        return self.tau
+
+    def advance_reactions(self, num_events):
+        '''Evolves the simulation by num_events reaction events and returns the new time'''
+        self._call(direct_advance_reactions, int(num_events))
+        return self.tau
+
+    def run_schedule(self, times, out=None):
+        '''Evolves the simulation through the non-decreasing output times, see
+        SSASimulation.run_schedule'''
+        times = np.ascontiguousarray(times, dtype=np.float64)
+        if times.ndim != 1 or np.any(np.diff(times) < 0):
+            raise ValueError('times must be a one dimensional non-decreasing sequence')
+        shape = (len(times),) + self.concentrations.shape
+        if out is None:
+            out = np.empty(shape)
+        elif out.shape != shape or out.dtype != np.float64 or not out.flags['C_CONTIGUOUS']:
+            raise ValueError('out must be a C contiguous float64 array of shape %s' % (shape,))
+        self._call(direct_run_schedule, times, out.reshape((len(times),) + self._sites.shape))
+        return out
+
+    def refresh(self):
+        '''Recomputes all propensities, call after changing the concentrations array by hand'''
+        self._call(direct_init)
+
+    def read_state(self, out=None):
+        '''Returns a copy of the current concentrations, written into out if it is given'''
+        if out is None:
+            out = np.empty_like(self.concentrations)
+        out[...] = self.concentrations
+        return out
+
+    def get_state(self):
+        '''Everything besides the concentrations needed to continue the simulation, see
+        SSASimulation.get_state'''
+        return self._rng.copy(), self._clock.copy()
+
+    def set_state(self, rng_state, engine_state):
+        '''Restores the result of get_state, see SSASimulation.set_state'''
+        rng_state = np.asarray(rng_state, dtype=np.uint64)
+        engine_state = np.asarray(engine_state, dtype=np.float64)
+        if rng_state.shape != self._rng.shape or engine_state.shape != self._clock.shape:
+            raise ValueError('The state does not belong to a python backend simulation')
+        self._rng[:] = rng_state
+        self._clock[:] = engine_state
+
+    def close(self):
+        '''Nothing to free, kept for the interface of SSASimulation'''
+        pass
@@ -1,136 +1,761 @@
-import numpy as np
-from .PropensityFunctions import *
-from .OutputFunctions import *
-from .InitializeFunctions import *
-
-import os
-import re
-from os.path import dirname, abspath, realpath, join
-from platform import system
-
-####################################################
-# Load C library
-####################################################
-from ctypes import cdll
-from ctypes import byref, c_int, c_ulong, c_double, POINTER
-
-def get_libpath():
-    """
-    Get the library path of the the distributed SSA library.
-    """
-    root = dirname(abspath(realpath(__file__)))
-
-    if system() == 'Linux':
-        library = 'Linux-SSA.so'
-    elif system() == 'Darwin':
-        library = 'OSX-SSA.so'
-    elif system() == 'Windows':
-        library = "Win-SSA.so"
-    else:
-        raise RuntimeError("unsupported platform - \"{}\"".format(system()))
-
-    return os.path.join(root, 'clibs', library)
-
-
-_SSA_LIB = cdll.LoadLibrary(get_libpath())
-_SSA_LIB.SSA_update.argtypes = (c_double,  # current_t,
-                                c_double,  # next_t
-                                c_int,  # r_seed
-                                c_int,  # max_x
-                                c_int,  # max_y
-                                c_int,  # num_m
-                                c_int,  # num_r
-                                POINTER(c_double),  # concentrations
-                                POINTER(c_double),  # constants
-                                POINTER(c_int),  # propensity_ints
-                                POINTER(c_int),  # reaction_arr
-                                POINTER(c_double))  # catalyst_arr
-_SSA_LIB.SSA_update.restype = c_double
-SSA_update = _SSA_LIB.SSA_update  # Renaming function for convinence
-####################################################
-####################################################
-def pick_reaction(dice_roll, CRS, concentrations, **kwargs):
-    ''' Picks a reaction to occur stochastically
-
-    Arguements:
-        - dice_roll: float which should be a number between zero and the total propensity of reactions
-        - CRS: the CRS object which contains all possible reactions and molecules
-        - concentrations: the list of concentrations indexed by molecule ID
-        - propensity_function: which propensity function to use, default: standard
-
-    Return:
-        - rxn: a Reaction object'''
-
-    checkpoint = 0.0
-    for rxn in CRS.reactions:
-        reactant_concentrations = [concentrations[i] for i in rxn.reactants]
-        catalyst_concentrations = [concentrations[i] for i in rxn.catalysts]
-        reactant_coeff = rxn.reactant_coeff
-        catalyzed_constants = rxn.catalyzed_constants
-        #print rxn.catalysts
-        if rxn.prop == 'STD':
-            # print "Reactant concentrations: ", reactant_concentrations
-            # print 'Product ID numbers: ',rxn.products
-            checkpoint += standard_propensity(rxn, CRS, concentrations)
-            #print "dice_roll: ", dice_roll, ' checkpoint: ', checkpoint
-            if checkpoint >= dice_roll:
-                break
-    return rxn
-####################################################
-def execute_rxn(rxn, CRS, concentrations):
-    ''' Executes a single reaction instance
-
-    Arguements:
-        - rxn: Reaction object to execute_rxn
-        - CRS: CRS object containing the entire system
-        - concentrations: list of molecule concentrations indexed by ID
-
-    Return:
-        - concentrations: updated list of molecule concentrations indexed by ID '''
-    num_reactants = len(rxn.reactants)
-
-    num_products = len(rxn.products)
-
-    # Reduce Reactants
-    for i in range(num_reactants):
-        reactant_index = rxn.reactants[i]
-        concentrations[reactant_index] -= rxn.reactant_coeff[i]
-        
-    # Increase Products	
-    for i in range(num_products):
-        product_index =rxn.products[i]
-        concentrations[product_index] += rxn.product_coeff[i]
-        
-    return concentrations
-####################################################
-def SSA_evolve(tau, tau_max, concentrations, CRS, random_seed, output_prefix= None,  t_out= None):
-
-    if (output_prefix != None and t_out == None):
-        raise ValueError('Output file prefix specified but no output frequency given, please provide an output time frequency')
-        
-    elif (output_prefix == None and type(t_out) == float):
-        raise ValueError('Output frequency provided but output file prefix was not provided, please provide a file prefix name')
-        
-    import sys
-    import random
-    from ctypes import c_int,  c_double, POINTER
-    constants, propensity_ints, reaction_arr, catalyst_arr = convert_CRS_to_npArrays(CRS)
-    concentrations_ptr, constants_ptr, propensity_ints_ptr, reaction_arr_ptr, catalyst_arr_ptr= get_c_pointers(concentrations, constants, propensity_ints, reaction_arr, catalyst_arr)
-    freq_counter = 0.0
-    random.seed(random_seed)
-    while tau < tau_max:
-        # Get seed
-        r_seed = random.randint(0, sys.maxsize)
-        # Update concentrations in place using C function
-        c_tau = SSA_update(c_double(tau), c_double(freq_counter),r_seed, c_int(1),c_int(1), c_int(len(CRS.molecule_list)), c_int(len(constants)), concentrations_ptr, constants_ptr, propensity_ints_ptr, reaction_arr_ptr, catalyst_arr_ptr )
-        # Update Time
-        tau = c_tau
-        # Update random seed
-        random.seed(tau-freq_counter)
-        print(tau)
-        # Output data
-        output_concentrations(concentrations, 'tutorial_data',time = freq_counter)
-        freq_counter += t_out
-    tidy_timeseries(CRS.molecule_list, 'tutorial_data', delete_dat = True)
-
-    return concentrations
\ No newline at end of file
+import numpy as np
+from .PropensityFunctions import *
+from .OutputFunctions import *
+from .InitializeFunctions import *
+from .PythonSSA import PythonSSASimulation
+
+import os
+import re
+import time
+import pandas as pd
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from os.path import dirname, abspath, realpath, join
+from platform import system
+
+####################################################
+# Load C library
+####################################################
+from ctypes import cdll
+from ctypes import byref, c_int, c_long, c_ulong, c_uint64, c_double, c_void_p, POINTER
+
+def get_libpath():
+    """
+    Get the library path of the the distributed SSA library.
+    """
+    root = dirname(abspath(realpath(__file__)))
+
+    if system() == 'Linux':
+        library = 'Linux-SSA.so'
+    elif system() == 'Darwin':
+        library = 'OSX-SSA.so'
+    elif system() == 'Windows':
+        library = "Win-SSA.so"
+    else:
+        raise RuntimeError("unsupported platform - \"{}\"".format(system()))
+
+    return os.path.join(root, 'clibs', library)
+
+
+def load_SSA_library():
+    ''' Loads the SSA shared library and declares the signature of every function it exports.
+    Raises OSError if the library is missing and AttributeError if it is an older build without
+    the functions used here '''
+    lib = cdll.LoadLibrary(get_libpath())
+    lib.SSA_update.argtypes = (c_double,  # current_t,
+                               c_double,  # next_t
+                               c_int,  # r_seed
+                               c_int,  # max_x
+                               c_int,  # max_y
+                               c_int,  # num_m
+                               c_int,  # num_r
+                               POINTER(c_double),  # concentrations
+                               POINTER(c_double),  # constants
+                               POINTER(c_int),  # propensity_ints
+                               POINTER(c_int),  # reaction_arr
+                               POINTER(c_double))  # catalyst_arr
+    lib.SSA_update.restype = c_double
+    lib.SSA_create.argtypes = (c_int,  # engine
+                               c_double,  # current_t
+                               c_uint64,  # r_seed
+                               c_uint64,  # r_stream
+                               c_int,  # max_x
+                               c_int,  # max_y
+                               c_int,  # num_m
+                               c_int,  # num_r
+                               POINTER(c_double),  # concentrations
+                               POINTER(c_double),  # constants
+                               POINTER(c_int),  # propensity_ints
+                               POINTER(c_int),  # reactant_ptr
+                               POINTER(c_int),  # reactant_idx
+                               POINTER(c_int),  # reactant_coeff
+                               POINTER(c_int),  # stoich_ptr
+                               POINTER(c_int),  # stoich_idx
+                               POINTER(c_int),  # stoich_coeff
+                               POINTER(c_int),  # catalyst_ptr
+                               POINTER(c_int),  # catalyst_idx
+                               POINTER(c_double),  # catalyst_constants
+                               POINTER(c_int),  # dependency_ptr
+                               POINTER(c_int),  # dependency_idx
+                               POINTER(c_int),  # replicator_species
+                               POINTER(c_int),  # weight_ptr
+                               POINTER(c_double),  # weights
+                               POINTER(c_double),  # diffusion_rates
+                               c_double)  # epsilon
+    lib.SSA_create.restype = c_void_p
+    lib.SSA_advance.argtypes = (c_void_p, c_double)
+    lib.SSA_advance.restype = c_double
+    lib.SSA_advance_reactions.argtypes = (c_void_p, c_long)
+    lib.SSA_advance_reactions.restype = c_double
+    lib.SSA_run_schedule.argtypes = (c_void_p, c_int, POINTER(c_double), POINTER(c_double))
+    lib.SSA_run_schedule.restype = c_double
+    lib.SSA_refresh.argtypes = (c_void_p,)
+    lib.SSA_refresh.restype = None
+    lib.SSA_read_state.argtypes = (c_void_p, POINTER(c_double))
+    lib.SSA_read_state.restype = None
+    lib.SSA_get_time.argtypes = (c_void_p,)
+    lib.SSA_get_time.restype = c_double
+    lib.SSA_get_reaction_count.argtypes = (c_void_p,)
+    lib.SSA_get_reaction_count.restype = c_long
+    lib.SSA_destroy.argtypes = (c_void_p,)
+    lib.SSA_destroy.restype = None
+    lib.SSA_state_size.argtypes = (c_void_p,)
+    lib.SSA_state_size.restype = c_long
+    lib.SSA_save_state.argtypes = (c_void_p, POINTER(c_uint64), POINTER(c_double))
+    lib.SSA_save_state.restype = None
+    lib.SSA_load_state.argtypes = (c_void_p, POINTER(c_uint64), POINTER(c_double))
+    lib.SSA_load_state.restype = None
+    return lib
+
+
+try:
+    _SSA_LIB = load_SSA_library()
+    SSA_update = _SSA_LIB.SSA_update  # Renaming function for convinence
+except (OSError, RuntimeError, AttributeError):
+    # Missing or incompatible library, simulations fall back to the python backend
+    _SSA_LIB = None
+    SSA_update = None
+
+# Stochastic engines which can be selected in SSA_evolve, maps names to the engine codes in SSA.c
+SSA_ENGINES = {'direct': 0,  # Gillespie direct method
+               'nrm': 1,  # Gibson-Bruck next reaction method
+               'cr': 2,  # Composition-rejection
+               'tau_leap': 3,  # Adaptive tau-leaping (approximate)
+               'nsm': 4,  # Next subvolume method, reaction-diffusion on the lattice
+               'hybrid': 5}  # Langevin fast reactions with exact slow reactions (approximate)
+# Largest block of snapshots SSA_evolve samples in one call before writing them out, in bytes
+SCHEDULE_CHUNK_BYTES = 64*2**20
+####################################################
+class SSASimulation(object):
+    '''A persistent stochastic simulation of a CRS. The propensities, random number state and
+    engine indexes live in C between calls, so the simulation can be advanced to many output times
+    without being re-initialized. The concentrations array is evolved in place.
+
+    Every simulation owns a PCG32 random number generator, a trajectory is bit-reproducible for a
+    given (random_seed, stream) pair and independent simulations can be advanced concurrently from
+    several threads. Replicates sharing a seed should use different streams.
+
+    Simulations of the same CRS can share the arrays from build_sparse_network(CRS) through the
+    network argument. constants overrides the rate constant of every reaction.
+
+    Attributes:
+        - concentrations: np double array of molecule abundances indexed by (x, y, molecule ID)
+        - engine: name of the engine, a key of SSA_ENGINES
+        - tau: current time of the simulation
+        - reaction_count: number of reaction events so far
+    '''
+    def __init__(self, concentrations, CRS, random_seed, tau=0.0, engine='direct', epsilon=0.03,
+                 stream=0, mu=0.001, diffusion_rates=None, network=None, constants=None):
+        self._handle = None
+        if _SSA_LIB is None:
+            raise RuntimeError('The SSA library %s could not be loaded, use the python backend '
+                               'instead' % get_libpath())
+        if engine not in SSA_ENGINES:
+            raise ValueError('Unknown engine "%s", please choose one of %s'
+                             % (engine, sorted(SSA_ENGINES)))
+        if (concentrations.ndim != 3 or concentrations.dtype != np.float64
+                or not concentrations.flags['C_CONTIGUOUS']):
+            raise ValueError('concentrations must be a C contiguous float64 array indexed by '
+                             '(x, y, molecule ID)')
+        if concentrations.shape[2] != len(CRS.molecule_list):
+            raise ValueError('concentrations has %i molecules but the CRS has %i'
+                             % (concentrations.shape[2], len(CRS.molecule_list)))
+
+        self.concentrations = concentrations
+        self.engine = engine
+        if random_seed < 0 or stream < 0:
+            raise ValueError('random_seed and stream must be non-negative integers')
+        if diffusion_rates is not None:
+            diffusion_rates = np.broadcast_to(diffusion_rates, (len(CRS.molecule_list),))
+            diffusion_rates = np.ascontiguousarray(diffusion_rates, np.float64)
+            if np.any(diffusion_rates < 0):
+                raise ValueError('diffusion_rates must be non-negative')
+            if engine != 'nsm' and np.any(diffusion_rates > 0):
+                raise ValueError('Diffusion is only simulated by the "nsm" engine')
+        if network is None:
+            network = build_sparse_network(CRS, mu=mu)
+        (network_constants, propensity_ints, reactant_csr, stoich_csr, catalyst_csr, dependency_csr,
+         replicator_tables) = network
+        if constants is None:
+            constants = network_constants
+        else:
+            constants = np.ascontiguousarray(constants, np.float64)
+            if constants.shape != network_constants.shape:
+                raise ValueError('constants must hold one rate constant for each of the %i '
+                                 'reactions' % len(network_constants))
+        # Keep references to every array the C state points to
+        self._arrays = (constants, propensity_ints, reactant_csr, stoich_csr, catalyst_csr,
+                        dependency_csr, replicator_tables, diffusion_rates)
+        sparse_pointers = get_sparse_c_pointers(reactant_csr, stoich_csr, catalyst_csr,
+                                                dependency_csr, replicator_tables)
+        diffusion_pointer = None
+        if diffusion_rates is not None:
+            diffusion_pointer = diffusion_rates.ctypes.data_as(POINTER(c_double))
+        self._handle = _SSA_LIB.SSA_create(SSA_ENGINES[engine],
+                                           tau,
+                                           random_seed,
+                                           stream,
+                                           concentrations.shape[0],
+                                           concentrations.shape[1],
+                                           concentrations.shape[2],
+                                           len(constants),
+                                           concentrations.ctypes.data_as(POINTER(c_double)),
+                                           constants.ctypes.data_as(POINTER(c_double)),
+                                           propensity_ints.ctypes.data_as(POINTER(c_int)),
+                                           *sparse_pointers,
+                                           diffusion_pointer,
+                                           epsilon)
+
+    @property
+    def tau(self):
+        return _SSA_LIB.SSA_get_time(self._handle)
+
+    @property
+    def reaction_count(self):
+        return _SSA_LIB.SSA_get_reaction_count(self._handle)
+
+    def advance(self, next_t):
+        '''Evolves the simulation to time next_t and returns the new time'''
+        return _SSA_LIB.SSA_advance(self._handle, next_t)
+
+    def advance_reactions(self, num_events):
+        '''Evolves the simulation by num_events reaction events and returns the new time'''
+        return _SSA_LIB.SSA_advance_reactions(self._handle, num_events)
+
+    def run_schedule(self, times, out=None):
+        '''Evolves the simulation through the non-decreasing output times in a single call into C
+
+        Arguements:
+            - times: sequence of output times
+            - out (optional): preallocated C contiguous float64 array of shape
+                (len(times), x, y, molecule ID) which will hold the state at each output time
+
+        Return:
+            - out: array of snapshots, out[i] is the exact state at times[i]'''
+        times = np.ascontiguousarray(times, dtype=np.float64)
+        if times.ndim != 1 or np.any(np.diff(times) < 0):
+            raise ValueError('times must be a one dimensional non-decreasing sequence')
+        shape = (len(times),) + self.concentrations.shape
+        if out is None:
+            out = np.empty(shape)
+        elif out.shape != shape or out.dtype != np.float64 or not out.flags['C_CONTIGUOUS']:
+            raise ValueError('out must be a C contiguous float64 array of shape %s' % (shape,))
+        _SSA_LIB.SSA_run_schedule(self._handle,
+                                  len(times),
+                                  times.ctypes.data_as(POINTER(c_double)),
+                                  out.ctypes.data_as(POINTER(c_double)))
+        return out
+
+    def refresh(self):
+        '''Recomputes all propensities, call after changing the concentrations array by hand'''
+        _SSA_LIB.SSA_refresh(self._handle)
+
+    def read_state(self, out=None):
+        '''Returns a copy of the current concentrations, written into out if it is given'''
+        if out is None:
+            out = np.empty_like(self.concentrations)
+        _SSA_LIB.SSA_read_state(self._handle, out.ctypes.data_as(POINTER(c_double)))
+        return out
+
+    def get_state(self):
+        ''' Everything besides the concentrations needed to continue the simulation bit-identically
+
+        Return:
+            - rng_state: np uint64 array, state of the random number generator
+            - engine_state: np double array, clock and event times of the engine '''
+        rng_state = np.zeros(2, dtype=np.uint64)
+        engine_state = np.zeros(_SSA_LIB.SSA_state_size(self._handle))
+        _SSA_LIB.SSA_save_state(self._handle, rng_state.ctypes.data_as(POINTER(c_uint64)),
+                                engine_state.ctypes.data_as(POINTER(c_double)))
+        return rng_state, engine_state
+
+    def set_state(self, rng_state, engine_state):
+        ''' Restores the result of get_state, the simulation must have been created from the
+        concentrations and time at which the state was taken '''
+        rng_state = np.ascontiguousarray(rng_state, dtype=np.uint64)
+        engine_state = np.ascontiguousarray(engine_state, dtype=np.float64)
+        state_size = _SSA_LIB.SSA_state_size(self._handle)
+        if rng_state.shape != (2,) or engine_state.shape != (state_size,):
+            raise ValueError('The state does not belong to a "%s" simulation of this size'
+                             % self.engine)
+        _SSA_LIB.SSA_load_state(self._handle, rng_state.ctypes.data_as(POINTER(c_uint64)),
+                                engine_state.ctypes.data_as(POINTER(c_double)))
+
+    def close(self):
+        '''Frees the C state, the simulation cannot be advanced afterwards'''
+        if self._handle is not None:
+            _SSA_LIB.SSA_destroy(self._handle)
+            self._handle = None
+
+    def __del__(self):
+        self.close()
+
+
+####################################################
+####################################################
+# Simulation backends which can be selected in SSA_evolve, every backend is a class with the
+# constructor and methods of SSASimulation
+SSA_BACKENDS = {}
+
+def register_backend(name, simulation_class):
+    ''' Makes a simulation class selectable as a backend of SSA_evolve and SSA_ensemble
+
+    Arguements:
+        - name: string, name of the backend
+        - simulation_class: class with the constructor arguments and methods of SSASimulation '''
+    SSA_BACKENDS[name] = simulation_class
+
+def get_backend(backend=None):
+    ''' Returns the simulation class of a backend
+
+    Arguements:
+        - backend (optional): string, name of a registered backend, default: 'c' when the SSA
+            library could be loaded and 'python' otherwise
+
+    Return:
+        - simulation_class: class used to create simulations '''
+    if backend is None:
+        backend = 'c' if _SSA_LIB is not None else 'python'
+    if backend not in SSA_BACKENDS:
+        raise ValueError('Unknown backend "%s", please choose one of %s'
+                         % (backend, sorted(SSA_BACKENDS)))
+    if backend == 'c' and _SSA_LIB is None:
+        raise RuntimeError('The SSA library %s could not be loaded' % get_libpath())
+    return SSA_BACKENDS[backend]
+
+
+# C library, all engines
+register_backend('c', SSASimulation)
+# Numba or pure python, 'direct' engine only
+register_backend('python', PythonSSASimulation)
+
+####################################################
+def pick_reaction(dice_roll, CRS, concentrations, **kwargs):
+    ''' Picks a reaction to occur stochastically
+
+    Arguements:
+        - dice_roll: float which should be a number between zero and the total propensity of
+            reactions
+        - CRS: the CRS object which contains all possible reactions and molecules
+        - concentrations: the list of concentrations indexed by molecule ID
+        - propensity_function: which propensity function to use, default: standard
+
+    Return:
+        - rxn: a Reaction object'''
+
+    checkpoint = 0.0
+    for rxn in CRS.reactions:
+        reactant_concentrations = [concentrations[i] for i in rxn.reactants]
+        catalyst_concentrations = [concentrations[i] for i in rxn.catalysts]
+        reactant_coeff = rxn.reactant_coeff
+        catalyzed_constants = rxn.catalyzed_constants
+        #print rxn.catalysts
+        if rxn.prop == 'STD':
+            # print "Reactant concentrations: ", reactant_concentrations
+            # print 'Product ID numbers: ',rxn.products
+            checkpoint += standard_propensity(rxn, CRS, concentrations)
+            #print "dice_roll: ", dice_roll, ' checkpoint: ', checkpoint
+            if checkpoint >= dice_roll:
+                break
+    return rxn
+####################################################
+def execute_rxn(rxn, CRS, concentrations):
+    ''' Executes a single reaction instance
+
+    Arguements:
+        - rxn: Reaction object to execute_rxn
+        - CRS: CRS object containing the entire system
+        - concentrations: list of molecule concentrations indexed by ID
+
+    Return:
+        - concentrations: updated list of molecule concentrations indexed by ID '''
+    num_reactants = len(rxn.reactants)
+
+    num_products = len(rxn.products)
+
+    # Reduce Reactants
+    for i in range(num_reactants):
+        reactant_index = rxn.reactants[i]
+        concentrations[reactant_index] -= rxn.reactant_coeff[i]
+        
+    # Increase Products	
+    for i in range(num_products):
+        product_index =rxn.products[i]
+        concentrations[product_index] += rxn.product_coeff[i]
+        
+    return concentrations
+####################################################
+def get_output_times(tau, tau_max, t_out, eps=1e-9):
+    ''' Output times of a simulation, tau + i*t_out for every i up to tau_max. Each time is computed
+    from its index, so round off does not accumulate over long runs, and no time is past tau_max
+
+    Arguements:
+        - tau: float, current time
+        - tau_max: float, time to stop the simulation
+        - t_out: float, time between outputs
+        - eps (optional): float, tolerance in units of t_out, a grid time within eps*t_out past
+            tau_max is kept and clipped to tau_max, default: 1e-9
+
+    Return:
+        - output_times: list of floats '''
+    if t_out <= 0:
+        raise ValueError('The output frequency t_out must be positive')
+    num_outputs = max(int(np.floor((tau_max - tau)/t_out + eps)), 0) + 1
+    output_times = tau + np.arange(num_outputs, dtype=np.float64)*t_out
+    output_times = np.minimum(output_times, max(tau, tau_max))
+    return output_times.tolist()
+
+
+####################################################
+# Bound on the autocorrelation of steady state samples, keeps their standard error finite
+MAX_AUTOCORRELATION = 0.99
+
+class SteadyStateDetector(object):
+    '''Online detection of a steady state. Every interval time units the simulation is sampled
+    through an observable, and the system is taken to be steady once the mean of each component
+    over the last window samples agrees with its mean over the window samples before them within
+    the standard error of their difference,
+
+        |mean_new - mean_old| <= rtol * sqrt(2 * var_new/window * (1 + rho)/(1 - rho)) + atol
+
+    The variance var_new and lag one autocorrelation rho are those of the samples in the newer
+    window, which estimate the fluctuations at the steady state without being inflated by the
+    transient still held in the older window. Samples closer together than the relaxation time of
+    the system are correlated, the factor (1 + rho)/(1 - rho) corrects the standard error for it.
+    Stochastic fluctuations are then tolerated at any sampling interval while a remaining drift of
+    the observable shows up as a difference of the means.
+
+    Attributes:
+        - interval: float, time between samples
+        - window: int, number of samples in each of the two compared windows
+        - rtol: float, tolerated difference of the means in standard errors
+        - atol: float, absolute tolerance of the means (in copies for the default observables),
+            which lets rare molecules whose counts barely fluctuate differ by a fraction of a copy
+        - observable: 'species' for the total count of every molecule on the lattice, 'length'
+            for the number of molecules of each length (len of the molecule name), or a function
+            f(concentrations, CRS) returning a 1D array
+        - equilibration_time: time of the first sample of the newer window once steady, else None.
+            The newer window passed the test, so the system was steady from then on, while the
+            older window may still hold the end of the transient
+        - detection_time: time at which the steady state was detected, else None
+    '''
+    def __init__(self, interval, window=20, rtol=3.0, atol=0.5, observable='species'):
+        if interval <= 0:
+            raise ValueError('The sampling interval must be positive')
+        if window < 2:
+            raise ValueError('The window must hold at least two samples')
+        if observable not in ('species', 'length') and not callable(observable):
+            raise ValueError('observable must be "species", "length" or a function')
+        self.interval = interval
+        self.window = int(window)
+        self.rtol = rtol
+        self.atol = atol
+        self.observable = observable
+        self.reset()
+
+    def reset(self):
+        '''Forgets all samples, call before reusing the detector for another run'''
+        self._times = deque(maxlen=2*self.window)
+        self._samples = deque(maxlen=2*self.window)
+        self.equilibration_time = None
+        self.detection_time = None
+
+    def observe(self, concentrations, CRS):
+        '''Value of the observable for concentrations indexed by (..., molecule ID)'''
+        concentrations = np.asarray(concentrations, dtype=np.float64)
+        totals = concentrations.reshape(-1, len(CRS.molecule_list)).sum(axis=0)
+        if self.observable == 'species':
+            return totals
+        elif self.observable == 'length':
+            lengths = np.array([len(m) for m in CRS.molecule_list])
+            return np.bincount(lengths, weights=totals)
+        return np.asarray(self.observable(concentrations, CRS), dtype=np.float64)
+
+    def update(self, time, concentrations, CRS):
+        ''' Adds the sample at a time and tests for a steady state
+
+        Arguements:
+            - time: float, time of the sample
+            - concentrations: np array of molecule abundances indexed by (x, y, molecule ID)
+            - CRS: CRS object of the system
+
+        Return:
+            - steady: bool, True once a steady state has been detected '''
+        if self.detection_time is not None:
+            return True
+        self._times.append(time)
+        self._samples.append(self.observe(concentrations, CRS))
+        if len(self._samples) < 2*self.window:
+            return False
+        samples = np.array(self._samples)
+        old_mean = samples[:self.window].mean(axis=0)
+        new_mean = samples[self.window:].mean(axis=0)
+        # Variance and lag one autocorrelation of the newer window
+        deviations = samples[self.window:] - new_mean
+        variance = np.sum(deviations**2, axis=0)
+        covariance = np.sum(deviations[1:]*deviations[:-1], axis=0)
+        rho = np.divide(covariance, variance, out=np.zeros_like(variance), where=variance > 0)
+        rho = np.clip(rho, 0.0, MAX_AUTOCORRELATION)
+        standard_error = np.sqrt(2*variance/(self.window - 1)/self.window*(1 + rho)/(1 - rho))
+        if np.all(np.abs(new_mean - old_mean) <= self.rtol*standard_error + self.atol):
+            self.equilibration_time = self._times[self.window]
+            self.detection_time = time
+            return True
+        return False
+####################################################
+def SSA_evolve(tau, tau_max, concentrations, CRS, random_seed, output_prefix= None,  t_out= None,
+               engine='direct', epsilon=0.03, mu=0.001, diffusion_rates=None, backend=None,
+               steady_state=None, checkpoint=None, checkpoint_interval=None, output_format='csv',
+               output_encoding='dense'):
+    ''' Evolves the concentrations in place using a stochastic simulation algorithm
+
+    Arguements:
+        - tau: float, current time
+        - tau_max: float, time to stop the simulation
+        - concentrations: np double array of molecule abundances indexed by (x, y, molecule ID)
+        - CRS: CRS object containing the entire system
+        - random_seed: int, seed for the random number generator
+        - output_prefix: string which will be the prefix to the saved files, the snapshots are
+            appended to the binary trajectory file trajectory_name(output_prefix, output_encoding)
+            (see load_trajectory) and collected in a tidy file
+        - t_out: float, time between outputs
+        - engine (optional): which engine to use, one of SSA_ENGINES. 'direct' (default) is
+            the Gillespie direct method, 'nrm' is the Gibson-Bruck next reaction method which
+            scales better for large networks with widely separated rates, 'cr' is the
+            composition-rejection method whose cost per event is independent of the network size,
+            'tau_leap' is the approximate adaptive tau-leaping method for high copy numbers,
+            'nsm' is the next subvolume method which also simulates diffusion between lattice sites
+            and 'hybrid' repartitions the reactions before every step, advancing those between
+            abundant species with the chemical Langevin equation and the rest (e.g. reactions of
+            rare oligomers) exactly
+        - epsilon (optional): accuracy of the tau_leap and hybrid engines, the largest expected
+            relative change of any propensity during a single step, default: 0.03. The default
+            keeps trajectories qualitatively right, but on nonlinear networks it biases the mean
+            and variance of the abundances by a few percent. Use a smaller value such as 0.003
+            when accurate moments are needed
+        - mu (optional): per residue mutation probability of replicator (RCM) reactions,
+            default: 0.001
+        - diffusion_rates (optional): float or sequence indexed by molecule ID, rate at which a
+            single molecule jumps to each neighbouring site of the periodic lattice (D/h^2), only
+            used by the 'nsm' engine, default: None (no diffusion). In a dimension of size 2 both
+            neighbours are the same site, which is then reached at twice the rate
+        - backend (optional): name of the simulation backend, a key of SSA_BACKENDS. 'c' runs the
+            SSA library, 'python' runs the 'direct' engine with Numba (or plain python) and gives
+            the same trajectory, default: 'c' when the library could be loaded
+        - steady_state (optional): SteadyStateDetector, the run stops early once it detects a
+            steady state, and its equilibration_time and detection_time report when. The state
+            at the stopping time is written as a final output, default: None (run to tau_max)
+        - checkpoint (optional): string, name of a checkpoint file. The full simulation state is
+            written to it every checkpoint_interval and at the end of the run. If the file
+            exists the run resumes from it, continuing bit-identically and writing only the
+            outputs still missing. A steady_state detector starts with empty windows after a
+            resume, default: None (no checkpoints)
+        - checkpoint_interval (optional): float, time between checkpoints, default: every output
+            time
+        - output_format (optional): format of the tidy file, one of TIDY_FORMATS, 'parquet'
+            requires pyarrow, default: 'csv'
+        - output_encoding (optional): encoding of the trajectory file, one of
+            TRAJECTORY_ENCODINGS. 'sparse' stores only the nonzero abundances and 'delta' only
+            those that changed since the previous output, which shrinks the files of large
+            polymer networks where most molecules are absent, default: 'dense'
+
+    Return:
+        - concentrations: updated array of molecule abundances '''
+    if engine not in SSA_ENGINES:
+        raise ValueError('Unknown engine "%s", please choose one of %s'
+                         % (engine, sorted(SSA_ENGINES)))
+    if output_format not in TIDY_FORMATS:
+        raise ValueError('Unknown output format "%s", please choose one of %s'
+                         % (output_format, TIDY_FORMATS))
+    if output_encoding not in TRAJECTORY_ENCODINGS:
+        raise ValueError('Unknown output encoding "%s", please choose one of %s'
+                         % (output_encoding, TRAJECTORY_ENCODINGS))
+
+    if (output_prefix != None and t_out == None):
+        raise ValueError('Output file prefix specified but no output frequency given, please provide an output time frequency')
+        
+    elif (output_prefix == None and type(t_out) == float):
+        raise ValueError('Output frequency provided but output file prefix was not provided, please provide a file prefix name')
+
+    simulation_class = get_backend(backend)
+    if steady_state is None and checkpoint is None:
+        simulation = simulation_class(concentrations, CRS, random_seed, tau=tau, engine=engine,
+                                      epsilon=epsilon, mu=mu, diffusion_rates=diffusion_rates)
+        if output_prefix is None:
+            simulation.advance(tau_max)
+        else:
+            output_times = get_output_times(tau, tau_max, t_out)
+            # The engine samples a block of output times per call into a reused buffer, which is
+            # written out before the next block so memory does not grow with the number of outputs
+            chunk = int(min(len(output_times), max(1, SCHEDULE_CHUNK_BYTES//concentrations.nbytes)))
+            snapshots = np.empty((chunk,) + concentrations.shape)
+            with open_trajectory(output_prefix, concentrations.shape, mode='w',
+                                 encoding=output_encoding) as trajectory:
+                for first in range(0, len(output_times), chunk):
+                    chunk_times = output_times[first:first + chunk]
+                    simulation.run_schedule(chunk_times, out=snapshots[:len(chunk_times)])
+                    trajectory.extend(snapshots[:len(chunk_times)], chunk_times)
+            simulation.advance(tau_max)
+            tidy_timeseries(CRS.molecule_list, output_prefix, delete_dat = False,
+                            file_format = output_format)
+        simulation.close()
+        return concentrations
+
+    # Step through the output, steady state and checkpoint times
+    output_times = [] if output_prefix is None else get_output_times(tau, tau_max, t_out)
+    final_time = max(tau, tau_max)
+    check_times = []
+    if steady_state is not None:
+        steady_state.reset()
+        check_times = get_output_times(tau, tau_max, steady_state.interval)
+    checkpoint_times = []
+    output_index = 0
+    saved = None
+    if checkpoint is not None:
+        if checkpoint_interval is not None:
+            checkpoint_times = get_output_times(tau, final_time, checkpoint_interval)
+        elif output_times:
+            checkpoint_times = output_times
+        else:
+            raise ValueError('Checkpoints need a checkpoint_interval when no outputs are written')
+        fingerprint = CRS_fingerprint(CRS, mu=mu)
+        if os.path.exists(checkpoint):
+            saved = load_checkpoint(checkpoint)
+            if saved['fingerprint'] != fingerprint:
+                raise ValueError('The checkpoint %s was written for a different CRS' % checkpoint)
+            if saved['engine'] != engine or saved['backend'] != simulation_class.__name__:
+                raise ValueError('The checkpoint %s was written by the "%s" engine of %s'
+                                 % (checkpoint, saved['engine'], saved['backend']))
+            if saved['concentrations'].shape != concentrations.shape:
+                raise ValueError('The checkpoint %s holds a lattice of shape %s'
+                                 % (checkpoint, saved['concentrations'].shape))
+            concentrations[...] = saved['concentrations']
+            tau = saved['tau']
+            output_index = int(saved['output_index'])
+
+    simulation = simulation_class(concentrations, CRS, random_seed, tau=tau, engine=engine,
+                                  epsilon=epsilon, mu=mu, diffusion_rates=diffusion_rates)
+    if saved is not None:
+        simulation.set_state(saved['rng_state'], saved['engine_state'])
+    trajectory = None
+    if output_prefix is not None:
+        trajectory = open_trajectory(output_prefix, concentrations.shape,
+                                     mode='w' if saved is None else 'a', encoding=output_encoding)
+        # Snapshots written after the checkpoint are written again
+        trajectory.truncate(np.searchsorted(trajectory.times, tau, side='right'))
+    schedule = (set(output_times[output_index:]) | set(check_times) | set(checkpoint_times)
+                | set([final_time]))
+    last_output = None
+    for sample_time in sorted(t for t in schedule if t >= tau):
+        simulation.advance(sample_time)
+        if output_index < len(output_times) and sample_time == output_times[output_index]:
+            trajectory.append(concentrations, sample_time)
+            output_index += 1
+            last_output = sample_time
+        steady = (sample_time in check_times
+                  and steady_state.update(sample_time, concentrations, CRS))
+        if steady and output_prefix is not None and last_output != sample_time:
+            # Final output at the stopping time
+            trajectory.append(concentrations, sample_time)
+        if checkpoint is not None and (steady or sample_time == final_time
+                                       or (sample_time in checkpoint_times and sample_time > tau)):
+            rng_state, engine_state = simulation.get_state()
+            save_checkpoint(checkpoint, concentrations, simulation.tau, output_index, rng_state,
+                            engine_state, engine=engine, backend=simulation_class.__name__,
+                            fingerprint=fingerprint, random_seed=random_seed)
+        if steady:
+            break
+    if output_prefix is not None:
+        trajectory.close()
+        tidy_timeseries(CRS.molecule_list, output_prefix, delete_dat = False,
+                        file_format = output_format)
+    simulation.close()
+
+    return concentrations
+####################################################
+def SSA_ensemble(tau, tau_max, concentrations, CRS, random_seed, num_replicates=None, t_out=None,
+                 engine='direct', epsilon=0.03, mu=0.001, diffusion_rates=None, constants=None,
+                 num_threads=None, backend=None):
+    ''' Runs many independent replicates of the same CRS in parallel worker threads. All replicates
+    share one converted reaction network, and each writes its snapshots directly into a single
+    preallocated trajectory array
+
+    Arguements:
+        - tau: float, current time
+        - tau_max: float, time to stop the simulation
+        - concentrations: np double array of the initial molecule abundances indexed by
+            (x, y, molecule ID), every replicate starts from a copy
+        - CRS: CRS object containing the entire system
+        - random_seed: int or sequence of ints. An int runs the replicates on independent random
+            number streams 0, 1, ... of that seed, a sequence gives the seed of each replicate
+            (stream 0, so a replicate reproduces SSA_evolve with the same seed)
+        - num_replicates (optional): int, number of replicates, default: len(random_seed) or the
+            number of rows of constants
+        - t_out (optional): float, time between outputs, default: only the state at tau_max
+        - engine, epsilon, mu, diffusion_rates, backend (optional): as in SSA_evolve
+        - constants (optional): np double array indexed by (replicate, reaction ID) giving the rate
+            constants of each replicate, default: the constants of the CRS
+        - num_threads (optional): int, number of worker threads, default: number of cores
+
+    Return:
+        - output_times: np double array of the output times
+        - trajectories: np double array indexed by (replicate, time, site, molecule ID), where site
+            x*y_size + y is lattice site (x, y). Reshaping to
+            (num_replicates, len(output_times)) + concentrations.shape recovers the lattice
+        - metadata: pandas DataFrame with one row per replicate giving its random_seed, stream,
+            reaction_count, final_time and wall_time in seconds '''
+    if engine not in SSA_ENGINES:
+        raise ValueError('Unknown engine "%s", please choose one of %s'
+                         % (engine, sorted(SSA_ENGINES)))
+    if np.ndim(random_seed) == 0:
+        if num_replicates is None:
+            num_replicates = 1 if constants is None else len(constants)
+        seeds = [random_seed] * num_replicates
+        streams = list(range(num_replicates))
+    else:
+        seeds = list(random_seed)
+        if num_replicates is None:
+            num_replicates = len(seeds)
+        if len(seeds) != num_replicates:
+            raise ValueError('random_seed has %i seeds for %i replicates'
+                             % (len(seeds), num_replicates))
+        streams = [0] * num_replicates
+    if constants is not None:
+        constants = np.ascontiguousarray(constants, np.float64)
+        if constants.shape != (num_replicates, len(CRS.reactions)):
+            raise ValueError('constants must be indexed by (replicate, reaction ID), expected '
+                             'shape %s' % ((num_replicates, len(CRS.reactions)),))
+
+    if t_out is None:
+        output_times = np.array([tau_max], dtype=np.float64)
+    else:
+        output_times = np.array(get_output_times(tau, tau_max, t_out), dtype=np.float64)
+    lattice_shape = concentrations.shape
+    trajectories = np.empty((num_replicates, len(output_times), lattice_shape[0] * lattice_shape[1],
+                             lattice_shape[2]))
+    network = build_sparse_network(CRS, mu=mu)
+    simulation_class = get_backend(backend)
+    metadata = [None] * num_replicates
+
+    def run_replicate(replicate):
+        # Snapshots go into a view of this replicate's block of the trajectory array
+        snapshots = trajectories[replicate].reshape((len(output_times),) + lattice_shape)
+        start = time.time()
+        simulation = simulation_class(np.array(concentrations, dtype=np.float64, order='C'), CRS,
+                                      seeds[replicate], tau=tau, engine=engine, epsilon=epsilon,
+                                      stream=streams[replicate], diffusion_rates=diffusion_rates,
+                                      network=network,
+                                      constants=None if constants is None else constants[replicate])
+        simulation.run_schedule(output_times, out=snapshots)
+        metadata[replicate] = (replicate, seeds[replicate], streams[replicate],
+                               simulation.reaction_count, simulation.tau, time.time() - start)
+        simulation.close()
+
+    # ctypes (and Numba's nogil functions) release the GIL while the engine runs, so the replicates
+    # run on separate cores
+    with ThreadPoolExecutor(max_workers=num_threads) as executor:
+        list(executor.map(run_replicate, range(num_replicates)))
+
+    metadata = pd.DataFrame(metadata, columns=['replicate', 'random_seed', 'stream',
+                                               'reaction_count', 'final_time', 'wall_time'])
+    return output_times, trajectories, metadata
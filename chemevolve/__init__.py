@@ -1,11 +1,12 @@
-
-
-
-
-
-## Load all important python Modules
-from .CoreClasses import *
-from .OutputFunctions import *
-from .ReactionFunctions import * #### This module loads the C library!!!!!!
-from .InitializeFunctions import *
-from .PropensityFunctions import *
+
+
+
+
+
+## Load all important python Modules
+from .CoreClasses import *
+from .OutputFunctions import *
+from .ReactionFunctions import * #### This module loads the C library!!!!!!
+from .InitializeFunctions import *
+from .PropensityFunctions import *
+from .ODEFunctions import *
@@ -1,294 +1,2042 @@
-#include <math.h>
-#include <stdio.h>
-#include <stdlib.h>
-//#include "SSA.h"
-
-#define INDEX3(L,M,N, i,j,k) ((N) * ((M) * (i) + (j)) + (k))
-#define INDEX2(L,M, i,j) ( ((M) * (i)) + (j) )
-
-unsigned long long choose(unsigned long long n, unsigned long long k) {
-    if (k > n) {
-        return 0;
-    }
-    unsigned long long r = 1;
-    for (unsigned long long d = 1; d <= k; ++d) {
-        r *= n--;
-        r /= d;
-    }
-    return r;
-}
-
-double r2()
-{  
-    double a = 0.0;
-    while (a == 0.0 || a == 1.0) a = (double)rand() * (1.0 / (double)RAND_MAX);
-    return a;
-}
-
-double SSA_update(double current_t, double  next_t, int const r_seed, const int max_x, const int max_y, const int num_molecules, const int num_reactions, double *concentrations, const double  *reaction_constants, const int  *rxn_props, const int  *reaction_arr, const double  *catalyst_arr){
-	double current_Ap = 0.0;
-	double cat_enhance = 0.0;
-	double* Ap_arr = malloc(max_x*max_y * sizeof(double));
-	double Ap_tot = 0.0;
-	double checkpoint = 0.0; 
-	double dice_roll = 0.0;
-	int x;
-	int y;
-	int r;
-	int m;
-	int picked_x;
-	int picked_y;
-	int picked_r;
-	double tau_step;
-
-	int evolve = 1;
-	int time_evolve = 1;
-	int rxn_count = 0;
-
-	if (next_t < current_t){
-		//printf("Next time is less than current time, assuming next is a number of reactions\n");
-		time_evolve = 0;
-		next_t = abs(next_t);
-	}
-	srand(r_seed);
-	// Initialize Random Number generator
-	
-	/* ########  Initialize Propensities ######## */
-	// Iterate over all lattice sites and all reactions at each site
-	//printf("Begin Initialize Propensities \n");
-  	for (x = 0; x< max_x; ++x){
-  		for ( y = 0; y<max_y; ++y){
-  			Ap_arr[INDEX2(max_x, max_y, x,y)] = 0.0;
-  			//printf("%f \n", current_Ap);
-  			for ( r = 0; r< num_reactions; ++r){
-  				current_Ap =reaction_constants[r];
-  				cat_enhance = 0.0;
-  				// 0 corresponds to Standard propensity
-  				// printf("Current Reaction %d \n", r);
-  				if (rxn_props[r] == 0) {
-  					// The reaction has a standard propensity 
-
-  					for ( m = 0; m< num_molecules; ++m){
-  						//printf("Molecule %d coefficient %d \n", m, -reaction_arr[INDEX2(num_reactions, num_molecules,r,m)]);
-  						// See if molecule is a reactant
-  						if (reaction_arr[INDEX2(num_reactions, num_molecules,r,m)] < 0){
-  							// If molecule is a reactant add concentration^coefficient to current_Ap
-  							current_Ap =  current_Ap*pow(concentrations[INDEX3(max_x, max_y, num_molecules,x,y,m)], -reaction_arr[INDEX2(num_reactions, num_molecules,r,m)]);
-  						} 
-  						if (catalyst_arr[INDEX2(num_reactions, num_molecules,r,m)]> 0){
-  							// If the molcule is a catalsyt, include its effect
-  							//printf("Molecule %d catayltic Effect %f \n", m, catalyst_arr[INDEX2(num_reactions, num_molecules,r,m)]);
-  						
-  							cat_enhance += catalyst_arr[INDEX2(num_reactions, num_molecules,r,m)]*concentrations[INDEX3(max_x, max_y, num_molecules,x,y,m)];
-  						}
-  					}
-  					// printf("Cat Enhance is %f \n", cat_enhance);
-  					current_Ap = current_Ap*(1.0 + cat_enhance);
-  					
-
-  				}
-
-  		// 		else if (propensity_function == 'RCM'){ //Only works for binary sequences
-				// 	int nA = -reaction_arr[r][0];
-				// 	double num_A = concentrations[x][y][0];
-				// 	int nB = -reaction_arr[r][1];
-				// 	double num_B = concentrations[x][y][1];
-				// 	for (int m = 0; m< num_molecules; ++m ){
-				// 		if (reaction_arr[r][m] > 0){
-				// 			double num_replicator = concentrations[x][y][m];
-				// 		}
-				// 	}
-				// 	checkpoint += replicator_composition_propensity_envMutation(constant, mu, num_replicator, num_A, num_B, nA, nB);
-			
-				// }
-
-
-  				Ap_arr[INDEX2(max_x, max_y, x,y)] += current_Ap;
-  				//printf("%f \n", current_Ap);
-  				Ap_tot += current_Ap;
-
-  			}
-  		}
-  	}
-  	//printf("Done with Initialize \n");
-	
-		
-	/* ######## Main Loop ######## */ 
-	while (evolve == 1){
-
-		// Pick Reaction //
-		// Pick the Lattice site first
-		//printf("Pick Reaction \n");
-		dice_roll = Ap_tot*r2();
-		checkpoint = 0.0;
-		//printf("Total Propensity is %f \n", Ap_tot);
-		//printf("Dice Roll is %f \n", dice_roll);
-		for ( x = 0; x < max_x; ++x){
-			//printf("Current x is %d \n",x );
-			if (checkpoint >= dice_roll) {
-				break;
-			}
-			for ( y = 0; y <max_y; ++y){
-				//printf("Current y is %d \n",x );
-				checkpoint += Ap_arr[INDEX2(max_x, max_y, x,y)];
-				if (checkpoint >= dice_roll) {
-					picked_x = x;
-					picked_y = y;
-					break;
-				}
-			}
-		}
-		//printf("Picked x and y are (%d, %d) \n",picked_x, picked_y );
-		// Decide the reaction at that lattice site
-		dice_roll = Ap_arr[INDEX2(max_x, max_y, picked_x,picked_y)]*r2();
-		checkpoint = 0.0;
-		//printf("Total Propensity is %f \n", Ap_arr[INDEX2(max_x, max_y, picked_x,picked_y)]);
-		//printf("Dice Roll is %f \n", dice_roll);
-		//printf("Picking Reaction \n");
-		for ( r = 0; r < num_reactions; ++r){
-			//printf("Current reaction is %d \n", r );
-			current_Ap =reaction_constants[r];
-  			cat_enhance = 0.0;
-  			if (rxn_props[r] == 0){
-  				// The reaction has a standard propensity 
-				for ( m = 0; m< num_molecules; ++m){
-					// See if molecule is a reactant
-					if (reaction_arr[INDEX2(num_reactions, num_molecules,r,m)] < 0){
-						//printf("Molecule %d coefficient %d, abundance %d \n", m, -reaction_arr[INDEX2(num_reactions, num_molecules,r,m)], concentrations[INDEX3(max_x, max_y,num_molecules,picked_x,picked_y,m)]);
-							
-						// If molecule is a reactant add concentration^coefficient to current_Ap
-						current_Ap =  current_Ap*pow(concentrations[INDEX3(max_x, max_y, num_molecules,picked_x,picked_y,m)], -reaction_arr[INDEX2(num_reactions, num_molecules,r,m)]); // Power is expensive 
-					} 
-					if (catalyst_arr[INDEX2(num_reactions, num_molecules,r,m)]> 0){
-						// If the molcule is a catalsyt, include its effect
-						cat_enhance += catalyst_arr[INDEX2(num_reactions, num_molecules,r,m)]*concentrations[INDEX3(max_x, max_y, num_molecules,picked_x,picked_y,m)];
-					}
-				}
-				current_Ap = current_Ap*(1.0 + cat_enhance);
-				////printf("	The propensity is %f  \n", current_Ap);
-				
-
-			}
-
-  		// 		else if (propensity_function == 'RCM'){ //Only works for binary sequences
-				// 	int nA = -reaction_arr[r][0];
-				// 	double num_A = concentrations[x][y][0];
-				// 	int nB = -reaction_arr[r][1];
-				// 	double num_B = concentrations[x][y][1];
-				// 	for (int m = 0; m< num_molecules; ++m ){
-				// 		if (reaction_arr[r][m] > 0){
-				// 			double num_replicator = concentrations[x][y][m];
-				// 		}
-				// 	}
-				// 	checkpoint += replicator_composition_propensity_envMutation(constant, mu, num_replicator, num_A, num_B, nA, nB);
-			
-				// }
-
-			checkpoint += current_Ap;
-			//printf("Dice Roll is %f, checkpoint is %f\n", dice_roll, checkpoint  );
-			if (checkpoint >=  dice_roll){
-				picked_r = r;
-				break;
-			}
-
-		}
-		
-		// Execute Reaction // 
-		for ( m = 0; m< num_molecules; ++m){
-			//printf("Current Concenration of molecule %d at lattice site (%d,%d), is %d \n", m, picked_x,picked_y,concentrations[INDEX3(max_x, max_y, num_molecules,picked_x,picked_y,m)]);
-			concentrations[INDEX3(max_x, max_y, num_molecules,picked_x,picked_y,m)] += reaction_arr[INDEX2(num_reactions, num_molecules,picked_r,m)];
-			//printf("updated Concenration of molecule %d at lattice site (%d,%d), is %d \n ", m, picked_x,picked_y,concentrations[INDEX3(max_x, max_y, num_molecules,picked_x,picked_y,m)]);
-			
-		}
-
-		// Iterate over all lattice sites and all reactions at each site
-		//printf("Updating Propensities \n");
-		Ap_tot = 0.0;
-		for ( x = 0; x< max_x; ++x){
-			//printf("Current x is %d \n",x );
-			for ( y = 0; y<max_y; ++y){
-				//printf("Current y is %d \n",y );
-				Ap_arr[INDEX2(max_x, max_y, x,y)] = 0.0;
-				for ( r = 0; r< num_reactions; ++r){
-					//printf("Current Reaction %d \n", r);
-					current_Ap =reaction_constants[r];
-					cat_enhance = 0.0;
-					if (rxn_props[r] == 0){
-						// The reaction has a standard propensity 
-						for ( m = 0; m< num_molecules; ++m){
-							// See if molecule is a reactant
-							if (reaction_arr[INDEX2(num_reactions, num_molecules,r,m)] < 0){
-								//printf("Molecule %d coefficient %d, abundance %d \n", m, -reaction_arr[INDEX2(num_reactions, num_molecules,r,m)], concentrations[INDEX3(max_x, max_y,num_molecules,x,y,m)]);
-							
-								// If molecule is a reactant add concentration^coefficient to current_Ap
-								current_Ap =  current_Ap*pow(concentrations[INDEX3(max_x, max_y, num_molecules,x,y,m)], -reaction_arr[INDEX2(num_reactions, num_molecules,r,m)]);
-							} 
-							if (catalyst_arr[INDEX2(num_reactions, num_molecules,r,m)]> 0){
-								// If the molcule is a catalsyt, include its effect
-								cat_enhance += catalyst_arr[INDEX2(num_reactions, num_molecules,r,m)]*concentrations[INDEX3(max_x, max_y, num_molecules,x,y,m)];
-							}
-						}
-						current_Ap = current_Ap*(1.0 + cat_enhance);
-						
-
-					}
-
-			// 		else if (propensity_function == 'RCM'){ //Only works for binary sequences
-				// 	int nA = -reaction_arr[r][0];
-				// 	double num_A = concentrations[x][y][0];
-				// 	int nB = -reaction_arr[r][1];
-				// 	double num_B = concentrations[x][y][1];
-				// 	for (int m = 0; m< num_molecules; ++m ){
-				// 		if (reaction_arr[r][m] > 0){
-				// 			double num_replicator = concentrations[x][y][m];
-				// 		}
-				// 	}
-				// 	checkpoint += replicator_composition_propensity_envMutation(constant, mu, num_replicator, num_A, num_B, nA, nB);
-			
-				// }
-
-					//printf("Current_Ap: %f \n", current_Ap );
-					Ap_arr[INDEX2(max_x, max_y, x,y)] += current_Ap;
-					Ap_tot += current_Ap;
-
-				}
-			}
-		}
-		
-		if (time_evolve == 1) { // Time measure
-			// Calculate next t	//
-			double dice_roll = r2();
-			if (Ap_tot == 0){
-				current_t = next_t;
-				}
-			tau_step = -(log(dice_roll)/Ap_tot);
-			// printf("Dice Roll %f \n", dice_roll);
-			// printf("Time Step %f\n", tau_step );
-			// printf("Ap_tot %f \n", Ap_tot );
-			current_t += tau_step;
-			if (tau_step < 0){
-				exit(0);
-				}
-			if (current_t >= next_t){
-				evolve = 0;
-			}
-			//printf("Time: %f \n", current_t);
-		}
-		if (time_evolve == 0) { // Reaction counting
-			rxn_count += 1;
-			//printf("%d \n", rxn_count );
-			if (rxn_count >= next_t){
-				evolve = 0;
-			}
-
-
-		}	
-	}
-	
-	return current_t;
-}
-
-// int main()
-// {
-//   return 0;}
-
+#include <math.h>
+#include <stdio.h>
+#include <stdlib.h>
+#include <stdint.h>
+#include <string.h>
+#include <limits.h>
+//#include "SSA.h"
+
+#define INDEX3(L,M,N, i,j,k) ((N) * ((M) * (i) + (j)) + (k))
+#define INDEX2(L,M, i,j) ( ((M) * (i)) + (j) )
+
+/* ######## OpenMP ######## */
+// Full-lattice propensity passes are split over lattice sites when the library is compiled with
+//     gcc -O2 -shared -fPIC -fopenmp SSA.c -o Linux-SSA.so -lm
+// and run serially otherwise, OMP_NUM_THREADS sets the number of threads. Threads only compute
+// the propensities of their own sites; totals, trees and random numbers are produced serially in
+// site order afterwards, so results are bit-identical for any number of threads.
+
+#define OMP_MIN_SITES 64 // Smaller lattices are not worth starting threads for
+#ifdef _OPENMP
+#define DO_PRAGMA(x) _Pragma(#x)
+#define OMP_PARALLEL_FOR(condition) DO_PRAGMA(omp parallel for schedule(static) if (condition))
+#else
+#define OMP_PARALLEL_FOR(condition)
+#endif
+
+/* ######## Mass-action combinatorics ######## */
+// Standard propensities count the distinct combinations of reactant molecules, n choose c for a
+// species with n copies consumed c at a time. The falling factorial n(n-1)...(n-c+1) is exact in
+// double precision for the coefficients of a CRS, so no pow is needed.
+
+#define MAX_TABLE_COEFF 8
+static const double inverse_factorial[MAX_TABLE_COEFF + 1] = {1.0, 1.0, 1.0/2.0, 1.0/6.0, 1.0/24.0,
+	1.0/120.0, 1.0/720.0, 1.0/5040.0, 1.0/40320.0};
+
+double reactant_combinations(const double n, const int c){
+	// Number of ways to choose c molecules out of n
+	double falling = n;
+	double inverse = 1.0;
+	int i;
+	if (n < c){
+		return 0.0;
+	}
+	switch (c){
+		case 0:
+			return 1.0;
+		case 1:
+			return n;
+		case 2:
+			return 0.5*n*(n - 1.0);
+		case 3:
+			return n*(n - 1.0)*(n - 2.0)*(1.0/6.0);
+	}
+	for (i = 1; i < c; ++i){
+		falling *= n - i;
+	}
+	if (c <= MAX_TABLE_COEFF){
+		return falling*inverse_factorial[c];
+	}
+	for (i = 2; i <= c; ++i){
+		inverse /= i;
+	}
+	return falling*inverse;
+}
+
+/* ######## Random numbers ######## */
+// PCG32 (O'Neill 2014), every simulation owns its generator so simulations can run concurrently.
+// The stream selects one of 2^63 independent sequences for the same seed.
+
+typedef struct {
+	uint64_t state;
+	uint64_t inc;
+} pcg32_random_t;
+
+uint32_t pcg32_random_r(pcg32_random_t *rng){
+	uint64_t oldstate = rng->state;
+	uint32_t xorshifted = (uint32_t)(((oldstate >> 18u) ^ oldstate) >> 27u);
+	uint32_t rot = (uint32_t)(oldstate >> 59u);
+	rng->state = oldstate * 6364136223846793005ULL + rng->inc;
+	return (xorshifted >> rot) | (xorshifted << ((-rot) & 31));
+}
+
+void pcg32_srandom_r(pcg32_random_t *rng, const uint64_t seed, const uint64_t stream){
+	rng->state = 0U;
+	rng->inc = (stream << 1u) | 1u;
+	pcg32_random_r(rng);
+	rng->state += seed;
+	pcg32_random_r(rng);
+}
+
+double rng_uniform(pcg32_random_t *rng){
+	// Uniform double in the open interval (0, 1) with 53 random bits
+	uint64_t a = pcg32_random_r(rng) >> 5;
+	uint64_t b = pcg32_random_r(rng) >> 6;
+	return ((double)((a << 26) + b) + 0.5) * (1.0 / 9007199254740992.0);
+}
+
+#define DENSE_REFRESH_INTERVAL 100000 // Events between re-summations of the total propensity
+
+double dense_site_propensity(const double *site_concentrations, const int num_molecules, const int num_reactions, const double *reaction_constants, const int *rxn_props, const int *reaction_arr, const double *catalyst_arr){
+	// Total propensity of all reactions at a single lattice site of the dense network
+	double site_Ap = 0.0;
+	double current_Ap;
+	double cat_enhance;
+	int r;
+	int m;
+	for (r = 0; r < num_reactions; ++r){
+		current_Ap = reaction_constants[r];
+		cat_enhance = 0.0;
+		if (rxn_props[r] == 0){
+			// The reaction has a standard propensity
+			for (m = 0; m < num_molecules; ++m){
+				if (reaction_arr[INDEX2(num_reactions, num_molecules,r,m)] < 0){
+					current_Ap = current_Ap*reactant_combinations(site_concentrations[m], -reaction_arr[INDEX2(num_reactions, num_molecules,r,m)]);
+				}
+				if (catalyst_arr[INDEX2(num_reactions, num_molecules,r,m)] > 0){
+					cat_enhance += catalyst_arr[INDEX2(num_reactions, num_molecules,r,m)]*site_concentrations[m];
+				}
+			}
+			current_Ap = current_Ap*(1.0 + cat_enhance);
+		}
+		site_Ap += current_Ap;
+	}
+	return site_Ap;
+}
+
+double SSA_update(double current_t, double  next_t, int const r_seed, const int max_x, const int max_y, const int num_molecules, const int num_reactions, double *concentrations, const double  *reaction_constants, const int  *rxn_props, const int  *reaction_arr, const double  *catalyst_arr){
+	double current_Ap = 0.0;
+	double cat_enhance = 0.0;
+	double* Ap_arr = malloc(max_x*max_y * sizeof(double));
+	double Ap_tot = 0.0;
+	double checkpoint = 0.0; 
+	double dice_roll = 0.0;
+	int x;
+	int y;
+	int r;
+	int m;
+	int picked_x;
+	int picked_y;
+	int picked_r;
+	int site_picked;
+	double tau_step;
+
+	int evolve = 1;
+	int time_evolve = 1;
+	int rxn_count = 0;
+	int events_since_refresh = 0;
+
+	if (next_t < current_t){
+		//printf("Next time is less than current time, assuming next is a number of reactions\n");
+		time_evolve = 0;
+		next_t = fabs(next_t);
+	}
+	// Initialize Random Number generator
+	pcg32_random_t rng;
+	pcg32_srandom_r(&rng, (uint64_t) r_seed, 0);
+	
+	/* ########  Initialize Propensities ######## */
+	// Every lattice site independently, then the total in site order
+	OMP_PARALLEL_FOR(max_x*max_y >= OMP_MIN_SITES)
+	for (m = 0; m < max_x*max_y; ++m){
+		Ap_arr[m] = dense_site_propensity(&concentrations[INDEX2(max_x*max_y, num_molecules, m, 0)], num_molecules, num_reactions, reaction_constants, rxn_props, reaction_arr, catalyst_arr);
+	}
+	for (m = 0; m < max_x*max_y; ++m){
+		Ap_tot += Ap_arr[m];
+	}
+	
+	/* ######## Main Loop ######## */ 
+	while (evolve == 1){
+
+		// Pick Reaction //
+		// Pick the Lattice site first. The incremental Ap_tot can drift above the sum of the
+		// site propensities, so a dice roll falling past the last site picks the last non-empty site
+		//printf("Pick Reaction \n");
+		dice_roll = Ap_tot*rng_uniform(&rng);
+		checkpoint = 0.0;
+		picked_x = -1;
+		picked_y = -1;
+		site_picked = 0;
+		//printf("Total Propensity is %f \n", Ap_tot);
+		//printf("Dice Roll is %f \n", dice_roll);
+		for ( x = 0; x < max_x && site_picked == 0; ++x){
+			//printf("Current x is %d \n",x );
+			for ( y = 0; y <max_y; ++y){
+				//printf("Current y is %d \n",x );
+				if (Ap_arr[INDEX2(max_x, max_y, x,y)] <= 0.0){
+					continue;
+				}
+				picked_x = x;
+				picked_y = y;
+				checkpoint += Ap_arr[INDEX2(max_x, max_y, x,y)];
+				if (checkpoint >= dice_roll) {
+					site_picked = 1;
+					break;
+				}
+			}
+		}
+		if (picked_x < 0){
+			// No lattice site can react
+			if (time_evolve == 1){
+				current_t = next_t;
+			}
+			break;
+		}
+		//printf("Picked x and y are (%d, %d) \n",picked_x, picked_y );
+		// Decide the reaction at that lattice site
+		dice_roll = Ap_arr[INDEX2(max_x, max_y, picked_x,picked_y)]*rng_uniform(&rng);
+		checkpoint = 0.0;
+		picked_r = -1;
+		//printf("Total Propensity is %f \n", Ap_arr[INDEX2(max_x, max_y, picked_x,picked_y)]);
+		//printf("Dice Roll is %f \n", dice_roll);
+		//printf("Picking Reaction \n");
+		for ( r = 0; r < num_reactions; ++r){
+			//printf("Current reaction is %d \n", r );
+			current_Ap =reaction_constants[r];
+  			cat_enhance = 0.0;
+  			if (rxn_props[r] == 0){
+  				// The reaction has a standard propensity 
+				for ( m = 0; m< num_molecules; ++m){
+					// See if molecule is a reactant
+					if (reaction_arr[INDEX2(num_reactions, num_molecules,r,m)] < 0){
+						//printf("Molecule %d coefficient %d, abundance %d \n", m, -reaction_arr[INDEX2(num_reactions, num_molecules,r,m)], concentrations[INDEX3(max_x, max_y,num_molecules,picked_x,picked_y,m)]);
+							
+						// If molecule is a reactant multiply current_Ap by its number of combinations
+						current_Ap =  current_Ap*reactant_combinations(concentrations[INDEX3(max_x, max_y, num_molecules,picked_x,picked_y,m)], -reaction_arr[INDEX2(num_reactions, num_molecules,r,m)]);
+					} 
+					if (catalyst_arr[INDEX2(num_reactions, num_molecules,r,m)]> 0){
+						// If the molcule is a catalsyt, include its effect
+						cat_enhance += catalyst_arr[INDEX2(num_reactions, num_molecules,r,m)]*concentrations[INDEX3(max_x, max_y, num_molecules,picked_x,picked_y,m)];
+					}
+				}
+				current_Ap = current_Ap*(1.0 + cat_enhance);
+				////printf("	The propensity is %f  \n", current_Ap);
+				
+
+			}
+
+  		// 		else if (propensity_function == 'RCM'){ //Only works for binary sequences
+				// 	int nA = -reaction_arr[r][0];
+				// 	double num_A = concentrations[x][y][0];
+				// 	int nB = -reaction_arr[r][1];
+				// 	double num_B = concentrations[x][y][1];
+				// 	for (int m = 0; m< num_molecules; ++m ){
+				// 		if (reaction_arr[r][m] > 0){
+				// 			double num_replicator = concentrations[x][y][m];
+				// 		}
+				// 	}
+				// 	checkpoint += replicator_composition_propensity_envMutation(constant, mu, num_replicator, num_A, num_B, nA, nB);
+			
+				// }
+
+			if (current_Ap <= 0.0){
+				continue;
+			}
+			// The last reaction which can fire is picked if round off leaves dice_roll above the total
+			picked_r = r;
+			checkpoint += current_Ap;
+			//printf("Dice Roll is %f, checkpoint is %f\n", dice_roll, checkpoint  );
+			if (checkpoint >=  dice_roll){
+				break;
+			}
+
+		}
+		
+		// Execute Reaction // 
+		for ( m = 0; m< num_molecules; ++m){
+			//printf("Current Concenration of molecule %d at lattice site (%d,%d), is %d \n", m, picked_x,picked_y,concentrations[INDEX3(max_x, max_y, num_molecules,picked_x,picked_y,m)]);
+			concentrations[INDEX3(max_x, max_y, num_molecules,picked_x,picked_y,m)] += reaction_arr[INDEX2(num_reactions, num_molecules,picked_r,m)];
+			//printf("updated Concenration of molecule %d at lattice site (%d,%d), is %d \n ", m, picked_x,picked_y,concentrations[INDEX3(max_x, max_y, num_molecules,picked_x,picked_y,m)]);
+			
+		}
+
+		// Only the picked lattice site changed, recompute its propensity and update the total
+		Ap_tot -= Ap_arr[INDEX2(max_x, max_y, picked_x,picked_y)];
+		Ap_arr[INDEX2(max_x, max_y, picked_x,picked_y)] = dense_site_propensity(&concentrations[INDEX3(max_x, max_y, num_molecules,picked_x,picked_y,0)], num_molecules, num_reactions, reaction_constants, rxn_props, reaction_arr, catalyst_arr);
+		Ap_tot += Ap_arr[INDEX2(max_x, max_y, picked_x,picked_y)];
+		events_since_refresh += 1;
+		if (events_since_refresh >= DENSE_REFRESH_INTERVAL){
+			// Re-sum the site totals to remove the round off of the incremental updates
+			Ap_tot = 0.0;
+			for (x = 0; x < max_x*max_y; ++x){
+				Ap_tot += Ap_arr[x];
+			}
+			events_since_refresh = 0;
+		}
+		
+		if (time_evolve == 1) { // Time measure
+			// Calculate next t	//
+			double dice_roll = rng_uniform(&rng);
+			if (Ap_tot == 0){
+				current_t = next_t;
+				}
+			tau_step = -(log(dice_roll)/Ap_tot);
+			// printf("Dice Roll %f \n", dice_roll);
+			// printf("Time Step %f\n", tau_step );
+			// printf("Ap_tot %f \n", Ap_tot );
+			current_t += tau_step;
+			if (tau_step < 0){
+				exit(0);
+				}
+			if (current_t >= next_t){
+				evolve = 0;
+			}
+			//printf("Time: %f \n", current_t);
+		}
+		if (time_evolve == 0) { // Reaction counting
+			rxn_count += 1;
+			//printf("%d \n", rxn_count );
+			if (rxn_count >= next_t){
+				evolve = 0;
+			}
+
+
+		}	
+	}
+
+	free(Ap_arr);
+	return current_t;
+}
+
+/* ######## Sparse (CSR) reaction network ######## */
+// Reaction r reads reactants reactant_idx[reactant_ptr[r] .. reactant_ptr[r+1]-1],
+// changes molecules stoich_idx[stoich_ptr[r] .. stoich_ptr[r+1]-1] by stoich_coeff
+// and is catalyzed by catalyst_idx[catalyst_ptr[r] .. catalyst_ptr[r+1]-1]
+
+double replicator_propensity(const int r, const double *site_concentrations, const double *reaction_constants, const int *replicator_species, const int *weight_ptr, const double *weights){
+	// Replicator with environmental mutation (RCM) propensity of reaction r,
+	// replicator*sum_j weights[j]*(k*A)^j*(k*B)^(R_L-j), evaluated with a homogeneous Horner scheme
+	const double a = reaction_constants[r]*site_concentrations[replicator_species[3*r]];
+	const double b = reaction_constants[r]*site_concentrations[replicator_species[3*r + 1]];
+	const double *w = &weights[weight_ptr[r]];
+	const int R_L = weight_ptr[r+1] - weight_ptr[r] - 1;
+	double b_power = 1.0;
+	double current_Ap = w[R_L];
+	int j;
+	for (j = R_L - 1; j >= 0; --j){
+		b_power *= b;
+		current_Ap = current_Ap*a + w[j]*b_power;
+	}
+	return current_Ap*site_concentrations[replicator_species[3*r + 2]];
+}
+
+double sparse_propensity(const int r, const double *site_concentrations, const double *reaction_constants, const int *rxn_props, const int *reactant_ptr, const int *reactant_idx, const int *reactant_coeff, const int *catalyst_ptr, const int *catalyst_idx, const double *catalyst_constants, const int *replicator_species, const int *weight_ptr, const double *weights){
+	// Propensity of reaction r given the concentrations at a single lattice site
+	double current_Ap = reaction_constants[r];
+	double cat_enhance = 0.0;
+	int i;
+
+	if (rxn_props[r] == 0){
+		// The reaction has a standard (combinatorial mass-action) propensity
+		for (i = reactant_ptr[r]; i < reactant_ptr[r+1]; ++i){
+			current_Ap = current_Ap*reactant_combinations(site_concentrations[reactant_idx[i]], reactant_coeff[i]);
+		}
+		for (i = catalyst_ptr[r]; i < catalyst_ptr[r+1]; ++i){
+			cat_enhance += catalyst_constants[i]*site_concentrations[catalyst_idx[i]];
+		}
+		current_Ap = current_Ap*(1.0 + cat_enhance);
+	}
+	else if (rxn_props[r] == 1 && replicator_species != NULL){
+		// Replicator propensity, the copy can only be made if all of its resources are present
+		for (i = reactant_ptr[r]; i < reactant_ptr[r+1]; ++i){
+			if (site_concentrations[reactant_idx[i]] < reactant_coeff[i]){
+				return 0.0;
+			}
+		}
+		current_Ap = replicator_propensity(r, site_concentrations, reaction_constants, replicator_species, weight_ptr, weights);
+	}
+	else {
+		// Propensity function not implemented in C
+		current_Ap = 0.0;
+	}
+	return current_Ap;
+}
+
+/* ######## Propensity sum tree ######## */
+// A complete binary tree stored in an array of 2*num_leaves doubles, the root is tree[1] and the
+// children of node i are 2*i and 2*i + 1. Leaf j is tree[num_leaves + j]. Every internal node is
+// recomputed as the sum of its two children, so the totals never accumulate round off.
+
+int sumtree_leaves(const int n){
+	// Smallest power of two which can hold n leaves
+	int num_leaves = 1;
+	while (num_leaves < n){
+		num_leaves *= 2;
+	}
+	return num_leaves;
+}
+
+void sumtree_build(double *tree, const int num_leaves){
+	// Fill all internal nodes from the leaves
+	int i;
+	tree[0] = 0.0;
+	for (i = num_leaves - 1; i >= 1; --i){
+		tree[i] = tree[2*i] + tree[2*i + 1];
+	}
+}
+
+void sumtree_update(double *tree, const int num_leaves, const int leaf, const double value){
+	// Set a leaf and recompute the sums on the path to the root, O(log n)
+	int i = num_leaves + leaf;
+	tree[i] = value;
+	for (i = i/2; i >= 1; i = i/2){
+		tree[i] = tree[2*i] + tree[2*i + 1];
+	}
+}
+
+int sumtree_sample(const double *tree, const int num_leaves, double dice_roll){
+	// Find the leaf where the cumulative sum first passes dice_roll (0 <= dice_roll < tree[1]),
+	// equivalent to the linear checkpoint scan but O(log n)
+	int i = 1;
+	while (i < num_leaves){
+		if ((dice_roll < tree[2*i] || tree[2*i + 1] <= 0.0) && tree[2*i] > 0.0){
+			i = 2*i;
+		}
+		else {
+			dice_roll -= tree[2*i];
+			i = 2*i + 1;
+		}
+	}
+	return i - num_leaves;
+}
+
+/* ######## Indexed binary min-heap ######## */
+// heap[i] is the item stored at heap position i, pos[item] is the position of the item in the
+// heap and key[item] is its priority. The item with the smallest key is at heap[0].
+
+void heap_swap(int *heap, int *pos, const int i, const int j){
+	int item = heap[i];
+	heap[i] = heap[j];
+	heap[j] = item;
+	pos[heap[i]] = i;
+	pos[heap[j]] = j;
+}
+
+void heap_sift_up(int *heap, int *pos, const double *key, int i){
+	int parent;
+	while (i > 0){
+		parent = (i - 1)/2;
+		if (key[heap[parent]] <= key[heap[i]]){
+			break;
+		}
+		heap_swap(heap, pos, i, parent);
+		i = parent;
+	}
+}
+
+void heap_sift_down(int *heap, int *pos, const double *key, const int n, int i){
+	int child;
+	while (2*i + 1 < n){
+		child = 2*i + 1;
+		if (child + 1 < n && key[heap[child + 1]] < key[heap[child]]){
+			child += 1;
+		}
+		if (key[heap[i]] <= key[heap[child]]){
+			break;
+		}
+		heap_swap(heap, pos, i, child);
+		i = child;
+	}
+}
+
+void heap_build(int *heap, int *pos, const double *key, const int n){
+	int i;
+	for (i = 0; i < n; ++i){
+		heap[i] = i;
+		pos[i] = i;
+	}
+	for (i = n/2 - 1; i >= 0; --i){
+		heap_sift_down(heap, pos, key, n, i);
+	}
+}
+
+void heap_update(int *heap, int *pos, const double *key, const int n, const int item){
+	// Restore the heap property after key[item] changed
+	heap_sift_up(heap, pos, key, pos[item]);
+	heap_sift_down(heap, pos, key, n, pos[item]);
+}
+
+/* ######## Composition-Rejection ######## */
+// Channels are grouped into bins by the binary exponent of their propensity, bin b holds
+// propensities in [2^(b - CR_BIN_OFFSET - 1), 2^(b - CR_BIN_OFFSET)). A bin is picked from the
+// (few) occupied bins, then a member of the bin is accepted with probability a / bin_max, which
+// is at least 1/2. The cost per event does not depend on the number of channels.
+// occupied[0] and occupied[1] hold the lowest and highest occupied bin, the composition step
+// only scans the bins between them.
+
+#define CR_NUM_BINS 2200
+#define CR_BIN_OFFSET 1100
+#define REFRESH_INTERVAL 100000 // Events between full re-summations of the bin totals
+
+typedef struct {
+	int *members; // Channels in the bin
+	int size;
+	int capacity;
+	double Ap; // Sum of the member propensities
+} cr_bin;
+
+int cr_bin_index(const double Ap){
+	int exponent;
+	frexp(Ap, &exponent);
+	return exponent + CR_BIN_OFFSET;
+}
+
+void cr_bounds(const cr_bin *bins, int *occupied){
+	// Lowest and highest occupied bin, an empty range when all bins are empty
+	int b;
+	occupied[0] = CR_NUM_BINS;
+	occupied[1] = -1;
+	for (b = 0; b < CR_NUM_BINS; ++b){
+		if (bins[b].size > 0){
+			occupied[0] = (b < occupied[0]) ? b : occupied[0];
+			occupied[1] = b;
+		}
+	}
+}
+
+void cr_bin_insert(cr_bin *bins, int *occupied, int *channel_bin, int *channel_slot, const double *rxn_Ap,
+                   const int channel){
+	int b = cr_bin_index(rxn_Ap[channel]);
+	if (bins[b].size == bins[b].capacity){
+		bins[b].capacity = (bins[b].capacity > 0) ? 2*bins[b].capacity : 16;
+		bins[b].members = realloc(bins[b].members, bins[b].capacity * sizeof(int));
+	}
+	bins[b].members[bins[b].size] = channel;
+	channel_bin[channel] = b;
+	channel_slot[channel] = bins[b].size;
+	bins[b].size += 1;
+	bins[b].Ap += rxn_Ap[channel];
+	occupied[0] = (b < occupied[0]) ? b : occupied[0];
+	occupied[1] = (b > occupied[1]) ? b : occupied[1];
+}
+
+void cr_bin_remove(cr_bin *bins, int *occupied, int *channel_bin, int *channel_slot, const double *rxn_Ap,
+                   const int channel){
+	// Move the last member of the bin into the slot of the removed channel
+	int b = channel_bin[channel];
+	int last = bins[b].members[bins[b].size - 1];
+	bins[b].members[channel_slot[channel]] = last;
+	channel_slot[last] = channel_slot[channel];
+	bins[b].size -= 1;
+	bins[b].Ap -= rxn_Ap[channel];
+	if (bins[b].size == 0){
+		bins[b].Ap = 0.0;
+		// Shrink the occupied range past empty bins at its ends
+		while (occupied[1] >= occupied[0] && bins[occupied[1]].size == 0){
+			occupied[1] -= 1;
+		}
+		while (occupied[0] <= occupied[1] && bins[occupied[0]].size == 0){
+			occupied[0] += 1;
+		}
+		if (occupied[0] > occupied[1]){
+			occupied[0] = CR_NUM_BINS;
+			occupied[1] = -1;
+		}
+	}
+	channel_bin[channel] = -1;
+}
+
+double cr_refresh(cr_bin *bins, const double *rxn_Ap){
+	// Re-sum the bin totals from their members, removes the round off of the incremental updates
+	double Ap_tot = 0.0;
+	int b;
+	int i;
+	for (b = 0; b < CR_NUM_BINS; ++b){
+		bins[b].Ap = 0.0;
+		for (i = 0; i < bins[b].size; ++i){
+			bins[b].Ap += rxn_Ap[bins[b].members[i]];
+		}
+		Ap_tot += bins[b].Ap;
+	}
+	return Ap_tot;
+}
+
+/* ######## Adaptive tau-leaping ######## */
+// Cao, Gillespie and Petzold (2006) step size selection. Channels that could exhaust one of their
+// reactants within TAU_NUM_CRITICAL firings are critical, at most one critical event happens per
+// leap. When the leap would be shorter than a few exact steps the engine falls back to exact SSA.
+
+#define TAU_NUM_CRITICAL 10 // n_c, firings left before a channel is treated as critical
+#define TAU_SSA_FACTOR 10.0 // Leap only if tau is at least TAU_SSA_FACTOR/a0
+#define TAU_SSA_STEPS 100 // Exact steps taken when leaping is not worth it
+
+long poisson(pcg32_random_t *rng, const double mean){
+	// Poisson random number, multiplication method for small means and Hormann's transformed
+	// rejection (PTRS) for large means
+	long k;
+	double p;
+	double limit;
+	double slam, loglam, a, b, invalpha, vr, U, V, us;
+	if (mean <= 0.0){
+		return 0;
+	}
+	if (mean < 10.0){
+		limit = exp(-mean);
+		k = 0;
+		p = rng_uniform(rng);
+		while (p > limit){
+			k += 1;
+			p *= rng_uniform(rng);
+		}
+		return k;
+	}
+	slam = sqrt(mean);
+	loglam = log(mean);
+	b = 0.931 + 2.53*slam;
+	a = -0.059 + 0.02483*b;
+	invalpha = 1.1239 + 1.1328/(b - 3.4);
+	vr = 0.9277 - 3.6224/(b - 2.0);
+	while (1){
+		U = rng_uniform(rng) - 0.5;
+		V = rng_uniform(rng);
+		us = 0.5 - fabs(U);
+		k = (long)floor((2.0*a/us + b)*U + mean + 0.43);
+		if (us >= 0.07 && V <= vr){
+			return k;
+		}
+		if (k < 0 || (us < 0.013 && V > us)){
+			continue;
+		}
+		if (log(V) + log(invalpha) - log(a/(us*us) + b) <= -mean + k*loglam - lgamma(k + 1.0)){
+			return k;
+		}
+	}
+}
+
+double highest_order_factor(const int order, const int coeff, const double x){
+	// g_i from Cao et al. for a species with count x whose highest order reaction has the given
+	// order and needs coeff copies of the species
+	if (order <= 1){
+		return 1.0;
+	}
+	if (order == 2){
+		return (coeff >= 2 && x > 1.0) ? 2.0 + 1.0/(x - 1.0) : 2.0;
+	}
+	if (coeff == 2 && x > 1.0){
+		return 1.5*(2.0 + 1.0/(x - 1.0));
+	}
+	if (coeff >= 3 && x > 2.0){
+		return 3.0 + 1.0/(x - 1.0) + 2.0/(x - 2.0);
+	}
+	return (double) order;
+}
+
+/* ######## Persistent simulation state ######## */
+// SSA_create allocates the state of one simulation, SSA_advance evolves it to a later time and
+// SSA_destroy frees it. Propensities, the random number state and the indexes of the engine are
+// kept between calls, so frequent output costs nothing beyond reading the state. The
+// concentrations and the CRS arrays are borrowed from the caller and must outlive the state.
+
+#define ENGINE_DIRECT 0 // Direct method with propensity sum trees
+#define ENGINE_NRM 1 // Next reaction method
+#define ENGINE_CR 2 // Composition-rejection
+#define ENGINE_TAU 3 // Adaptive tau-leaping
+#define ENGINE_NSM 4 // Next subvolume method (reaction-diffusion)
+#define ENGINE_HYBRID 5 // Partitioned Langevin / exact SSA
+
+typedef struct {
+	int engine;
+	int max_x;
+	int max_y;
+	int num_sites;
+	int num_molecules;
+	int num_reactions;
+	int num_channels; // One channel per (lattice site, reaction)
+	double current_t; // Time of the state stored in concentrations
+	double next_event_t; // Time of the pending event of the exact engines
+	long rxn_count; // Number of reaction events so far
+	double epsilon; // Accuracy of the tau-leaping engine
+	pcg32_random_t rng; // Random number generator owned by this simulation
+	double *concentrations;
+	const double *reaction_constants;
+	const int *rxn_props;
+	const int *reactant_ptr;
+	const int *reactant_idx;
+	const int *reactant_coeff;
+	const int *stoich_ptr;
+	const int *stoich_idx;
+	const int *stoich_coeff;
+	const int *catalyst_ptr;
+	const int *catalyst_idx;
+	const double *catalyst_constants;
+	const int *replicator_species; // RCM tables, may be NULL if the CRS has no RCM reactions
+	const int *weight_ptr;
+	const double *weights;
+	const int *dependency_ptr;
+	const int *dependency_idx;
+	double *rxn_Ap; // Propensity of every channel (all engines but the direct method)
+	// Direct method
+	int site_leaves;
+	int rxn_leaves;
+	double *site_tree;
+	double *rxn_trees;
+	// Next reaction method
+	double *firing_t;
+	int *heap;
+	int *heap_pos;
+	// Composition-rejection
+	cr_bin *bins;
+	int occupied[2];
+	int *channel_bin;
+	int *channel_slot;
+	double Ap_tot;
+	int events_since_refresh;
+	// Tau-leaping
+	int *critical;
+	long *firings;
+	double *mu;
+	double *sigma2;
+	double *backup;
+	int *hor;
+	int *hor_coeff;
+	int *site_dirty; // Sites whose concentrations changed since their propensities were computed
+	int *touched; // Sites changed by the current leap
+	double *site_Ap;
+	double *site_Ap_critical;
+	double *site_tau; // Largest noncritical leap allowed by the species of each site
+	// Hybrid, reuses the tau-leaping arrays
+	int *fast; // Channels which may be integrated as Langevin (fast) channels
+	double *site_Ap_fast; // Total propensity of the fast candidates of each site
+	double *outflow; // Rate at which the fast candidates consume each species
+	int slow_leaves;
+	double *slow_tree; // Sum tree over the propensities of the slow channels of the current step
+	double slow_integral; // Integral of the total slow propensity since the last slow event
+	double slow_threshold; // Exponential random number, a slow event fires when the integral reaches it
+	// Next subvolume method
+	const double *diffusion_rates; // Jump rate of a single molecule to each neighbour, may be NULL
+	int num_neighbours;
+	int *neighbours; // Neighbouring sites of site s are neighbours[4*s .. 4*s + num_neighbours - 1]
+	int *reader_ptr; // Reactions which read molecule m are reader_idx[reader_ptr[m] .. reader_ptr[m+1]-1]
+	int *reader_idx;
+	int diff_leaves;
+	double *diff_trees; // Sum tree over the jump propensities D_m n_m of the molecules of each site
+	double *site_diff_Ap; // Total diffusion propensity of each site
+	double *site_t; // Next event time of each site
+} ssa_state;
+
+double *site_concentrations(const ssa_state *st, const int site){
+	return &st->concentrations[INDEX2(st->num_sites, st->num_molecules, site, 0)];
+}
+
+double channel_propensity(const ssa_state *st, const int site, const int r){
+	return sparse_propensity(r, site_concentrations(st, site), st->reaction_constants, st->rxn_props, st->reactant_ptr, st->reactant_idx, st->reactant_coeff, st->catalyst_ptr, st->catalyst_idx, st->catalyst_constants, st->replicator_species, st->weight_ptr, st->weights);
+}
+
+void execute_channel(ssa_state *st, const int site, const int r, const long times){
+	// Fire reaction r at a lattice site a number of times
+	double *site_conc = site_concentrations(st, site);
+	int i;
+	for (i = st->stoich_ptr[r]; i < st->stoich_ptr[r+1]; ++i){
+		site_conc[st->stoich_idx[i]] += times*st->stoich_coeff[i];
+	}
+}
+
+double exponential_wait(pcg32_random_t *rng, const double Ap){
+	return (Ap > 0.0) ? -log(rng_uniform(rng))/Ap : INFINITY;
+}
+
+void compute_channel_propensities(ssa_state *st){
+	// Propensity of every channel into rxn_Ap, lattice sites are split over threads
+	int site;
+	OMP_PARALLEL_FOR(st->num_sites >= OMP_MIN_SITES)
+	for (site = 0; site < st->num_sites; ++site){
+		int r;
+		for (r = 0; r < st->num_reactions; ++r){
+			st->rxn_Ap[INDEX2(st->num_sites, st->num_reactions, site, r)] = channel_propensity(st, site, r);
+		}
+	}
+}
+
+void build_site_trees(ssa_state *st){
+	// Sum tree over the reaction propensities of every lattice site, sites are split over threads
+	int site;
+	OMP_PARALLEL_FOR(st->num_sites >= OMP_MIN_SITES)
+	for (site = 0; site < st->num_sites; ++site){
+		double *rxn_tree = &st->rxn_trees[2*st->rxn_leaves*site];
+		int r;
+		for (r = 0; r < st->num_reactions; ++r){
+			rxn_tree[st->rxn_leaves + r] = channel_propensity(st, site, r);
+		}
+		sumtree_build(rxn_tree, st->rxn_leaves);
+	}
+}
+
+/* ######## Direct method ######## */
+// Each lattice site keeps a sum tree over its reaction propensities and the site totals form
+// another sum tree, so picking the site and the reaction and updating the dependents of the
+// fired reaction are all O(log n)
+
+void direct_init(ssa_state *st){
+	int site;
+	if (st->site_tree == NULL){
+		st->site_leaves = sumtree_leaves(st->num_sites);
+		st->rxn_leaves = sumtree_leaves(st->num_reactions);
+		st->site_tree = calloc(2*st->site_leaves, sizeof(double));
+		st->rxn_trees = calloc(2*st->rxn_leaves*st->num_sites, sizeof(double));
+	}
+	build_site_trees(st);
+	for (site = 0; site < st->num_sites; ++site){
+		st->site_tree[st->site_leaves + site] = st->rxn_trees[2*st->rxn_leaves*site + 1];
+	}
+	sumtree_build(st->site_tree, st->site_leaves);
+	st->next_event_t = st->current_t + exponential_wait(&st->rng, st->site_tree[1]);
+}
+
+void direct_fire(ssa_state *st){
+	// Pick the Lattice site first, then the reaction at that lattice site
+	int picked_site = sumtree_sample(st->site_tree, st->site_leaves, st->site_tree[1]*rng_uniform(&st->rng));
+	double *rxn_tree = &st->rxn_trees[2*st->rxn_leaves*picked_site];
+	int picked_r = sumtree_sample(rxn_tree, st->rxn_leaves, rxn_tree[1]*rng_uniform(&st->rng));
+	int i;
+	int r;
+
+	st->current_t = st->next_event_t;
+	execute_channel(st, picked_site, picked_r, 1);
+	// Update only the reactions which read a molecule changed by the picked reaction
+	for (i = st->dependency_ptr[picked_r]; i < st->dependency_ptr[picked_r+1]; ++i){
+		r = st->dependency_idx[i];
+		sumtree_update(rxn_tree, st->rxn_leaves, r, channel_propensity(st, picked_site, r));
+	}
+	sumtree_update(st->site_tree, st->site_leaves, picked_site, rxn_tree[1]);
+	st->next_event_t = st->current_t + exponential_wait(&st->rng, st->site_tree[1]);
+}
+
+/* ######## Next Reaction Method ######## */
+// Gibson-Bruck Next Reaction Method. Every channel holds an absolute putative firing time in an
+// indexed min-heap. After an event the fired channel draws a new time and its dependents rescale
+// their old times, so only one random number is used per event.
+
+void nrm_init(ssa_state *st){
+	int channel;
+	if (st->firing_t == NULL){
+		st->rxn_Ap = malloc(st->num_channels * sizeof(double));
+		st->firing_t = malloc(st->num_channels * sizeof(double));
+		st->heap = malloc(st->num_channels * sizeof(int));
+		st->heap_pos = malloc(st->num_channels * sizeof(int));
+	}
+	compute_channel_propensities(st);
+	for (channel = 0; channel < st->num_channels; ++channel){
+		st->firing_t[channel] = st->current_t + exponential_wait(&st->rng, st->rxn_Ap[channel]);
+	}
+	heap_build(st->heap, st->heap_pos, st->firing_t, st->num_channels);
+	st->next_event_t = (st->num_channels > 0) ? st->firing_t[st->heap[0]] : INFINITY;
+}
+
+void nrm_fire(ssa_state *st){
+	int picked_channel = st->heap[0];
+	int picked_site = picked_channel/st->num_reactions;
+	int picked_r = picked_channel - picked_site*st->num_reactions;
+	int picked_updated = 0;
+	double current_Ap;
+	int channel;
+	int i;
+	int r;
+
+	st->current_t = st->firing_t[picked_channel];
+	execute_channel(st, picked_site, picked_r, 1);
+	// Update the dependents of the picked reaction at the picked site
+	for (i = st->dependency_ptr[picked_r]; i < st->dependency_ptr[picked_r+1]; ++i){
+		r = st->dependency_idx[i];
+		channel = INDEX2(st->num_sites, st->num_reactions, picked_site, r);
+		current_Ap = channel_propensity(st, picked_site, r);
+		if (channel == picked_channel){
+			// The fired channel needs a fresh random number
+			picked_updated = 1;
+			st->firing_t[channel] = st->current_t + exponential_wait(&st->rng, current_Ap);
+		}
+		else if (current_Ap <= 0.0){
+			st->firing_t[channel] = INFINITY;
+		}
+		else if (st->rxn_Ap[channel] > 0.0){
+			// Reuse the old random number by rescaling the remaining waiting time
+			st->firing_t[channel] = st->current_t + (st->rxn_Ap[channel]/current_Ap)*(st->firing_t[channel] - st->current_t);
+		}
+		else {
+			st->firing_t[channel] = st->current_t + exponential_wait(&st->rng, current_Ap);
+		}
+		st->rxn_Ap[channel] = current_Ap;
+		heap_update(st->heap, st->heap_pos, st->firing_t, st->num_channels, channel);
+	}
+	if (picked_updated == 0){
+		// The picked reaction does not read any molecule it changes
+		st->firing_t[picked_channel] = st->current_t + exponential_wait(&st->rng, st->rxn_Ap[picked_channel]);
+		heap_update(st->heap, st->heap_pos, st->firing_t, st->num_channels, picked_channel);
+	}
+	st->next_event_t = st->firing_t[st->heap[0]];
+}
+
+/* ######## Composition-Rejection engine ######## */
+
+void cr_init(ssa_state *st){
+	int b;
+	int channel;
+	if (st->bins == NULL){
+		st->rxn_Ap = malloc(st->num_channels * sizeof(double));
+		st->channel_bin = malloc(st->num_channels * sizeof(int));
+		st->channel_slot = malloc(st->num_channels * sizeof(int));
+		st->bins = calloc(CR_NUM_BINS, sizeof(cr_bin));
+	}
+	for (b = 0; b < CR_NUM_BINS; ++b){
+		st->bins[b].size = 0;
+		st->bins[b].Ap = 0.0;
+	}
+	cr_bounds(st->bins, st->occupied);
+	compute_channel_propensities(st);
+	for (channel = 0; channel < st->num_channels; ++channel){
+		st->channel_bin[channel] = -1;
+		if (st->rxn_Ap[channel] > 0.0){
+			cr_bin_insert(st->bins, st->occupied, st->channel_bin, st->channel_slot, st->rxn_Ap, channel);
+		}
+	}
+	st->Ap_tot = cr_refresh(st->bins, st->rxn_Ap);
+	st->events_since_refresh = 0;
+	st->next_event_t = st->current_t + exponential_wait(&st->rng, st->Ap_tot);
+}
+
+void cr_fire(ssa_state *st){
+	cr_bin *bins = st->bins;
+	double current_Ap;
+	double checkpoint;
+	double dice_roll;
+	int picked_channel;
+	int picked_site;
+	int picked_r;
+	int channel;
+	int b;
+	int i;
+	int r;
+
+	// Composition step, pick an occupied bin starting from the largest propensities
+	while (1){
+		dice_roll = st->Ap_tot*rng_uniform(&st->rng);
+		checkpoint = 0.0;
+		for (b = st->occupied[1]; b >= st->occupied[0]; --b){
+			if (bins[b].size > 0){
+				checkpoint += bins[b].Ap;
+				if (checkpoint >= dice_roll){
+					break;
+				}
+			}
+		}
+		if (b >= st->occupied[0]){
+			break;
+		}
+		// Round off pushed the dice roll past the last occupied bin
+		st->Ap_tot = cr_refresh(bins, st->rxn_Ap);
+		st->events_since_refresh = 0;
+		if (st->Ap_tot <= 0.0){
+			st->next_event_t = INFINITY;
+			return;
+		}
+	}
+	// Rejection step, accept a uniformly chosen member with probability Ap/2^(bin exponent)
+	do {
+		picked_channel = bins[b].members[(int)(rng_uniform(&st->rng)*bins[b].size)];
+	} while (rng_uniform(&st->rng)*ldexp(1.0, b - CR_BIN_OFFSET) > st->rxn_Ap[picked_channel]);
+	picked_site = picked_channel/st->num_reactions;
+	picked_r = picked_channel - picked_site*st->num_reactions;
+
+	st->current_t = st->next_event_t;
+	execute_channel(st, picked_site, picked_r, 1);
+	// Update the dependents of the picked reaction at the picked site, moving them between bins
+	for (i = st->dependency_ptr[picked_r]; i < st->dependency_ptr[picked_r+1]; ++i){
+		r = st->dependency_idx[i];
+		channel = INDEX2(st->num_sites, st->num_reactions, picked_site, r);
+		current_Ap = channel_propensity(st, picked_site, r);
+		st->Ap_tot += current_Ap - st->rxn_Ap[channel];
+		if (st->channel_bin[channel] >= 0){
+			cr_bin_remove(bins, st->occupied, st->channel_bin, st->channel_slot, st->rxn_Ap, channel);
+		}
+		st->rxn_Ap[channel] = current_Ap;
+		if (current_Ap > 0.0){
+			cr_bin_insert(bins, st->occupied, st->channel_bin, st->channel_slot, st->rxn_Ap, channel);
+		}
+	}
+	st->events_since_refresh += 1;
+	if (st->events_since_refresh >= REFRESH_INTERVAL){
+		st->Ap_tot = cr_refresh(bins, st->rxn_Ap);
+		st->events_since_refresh = 0;
+	}
+	st->next_event_t = st->current_t + exponential_wait(&st->rng, st->Ap_tot);
+}
+
+/* ######## Tau-leaping engine ######## */
+
+void tau_init(ssa_state *st){
+	const int num_species = st->num_sites*st->num_molecules;
+	int order;
+	int site;
+	int r;
+	int m;
+	int i;
+	if (st->critical == NULL){
+		st->rxn_Ap = malloc(st->num_channels * sizeof(double));
+		st->critical = malloc(st->num_channels * sizeof(int));
+		st->firings = malloc(st->num_channels * sizeof(long));
+		st->mu = malloc(num_species * sizeof(double));
+		st->sigma2 = malloc(num_species * sizeof(double));
+		st->backup = malloc(num_species * sizeof(double));
+		st->site_dirty = malloc(st->num_sites * sizeof(int));
+		st->touched = malloc(st->num_sites * sizeof(int));
+		st->site_Ap = malloc(st->num_sites * sizeof(double));
+		st->site_Ap_critical = malloc(st->num_sites * sizeof(double));
+		st->site_tau = malloc(st->num_sites * sizeof(double));
+		st->hor = calloc(st->num_molecules, sizeof(int));
+		st->hor_coeff = calloc(st->num_molecules, sizeof(int));
+		// Highest order reaction of each molecule, needed for the step size bound
+		for (r = 0; r < st->num_reactions; ++r){
+			order = 0;
+			for (i = st->reactant_ptr[r]; i < st->reactant_ptr[r+1]; ++i){
+				order += st->reactant_coeff[i];
+			}
+			if (st->rxn_props[r] == 1 && st->replicator_species != NULL){
+				// Replication is first order in the replicator
+				order += 1;
+				m = st->replicator_species[3*r + 2];
+				if (order > st->hor[m]){
+					st->hor[m] = order;
+					st->hor_coeff[m] = 1;
+				}
+			}
+			for (i = st->reactant_ptr[r]; i < st->reactant_ptr[r+1]; ++i){
+				m = st->reactant_idx[i];
+				if (order > st->hor[m] || (order == st->hor[m] && st->reactant_coeff[i] > st->hor_coeff[m])){
+					st->hor[m] = order;
+					st->hor_coeff[m] = st->reactant_coeff[i];
+				}
+			}
+		}
+	}
+	for (site = 0; site < st->num_sites; ++site){
+		st->site_dirty[site] = 1;
+	}
+	st->next_event_t = st->current_t;
+}
+
+void tau_refresh_site(ssa_state *st, const int site){
+	// Recompute the propensities, critical channels and leap bound of a single lattice site
+	const double *site_conc = site_concentrations(st, site);
+	double *mu = &st->mu[INDEX2(st->num_sites, st->num_molecules, site, 0)];
+	double *sigma2 = &st->sigma2[INDEX2(st->num_sites, st->num_molecules, site, 0)];
+	double *rxn_Ap = st->rxn_Ap;
+	double site_Ap = 0.0;
+	double site_Ap_critical = 0.0;
+	double site_tau = INFINITY;
+	double bound;
+	double x;
+	int channel;
+	int r;
+	int m;
+	int i;
+
+	for (m = 0; m < st->num_molecules; ++m){
+		mu[m] = 0.0;
+		sigma2[m] = 0.0;
+	}
+	for (r = 0; r < st->num_reactions; ++r){
+		channel = INDEX2(st->num_sites, st->num_reactions, site, r);
+		rxn_Ap[channel] = channel_propensity(st, site, r);
+		site_Ap += rxn_Ap[channel];
+		st->critical[channel] = 0;
+		if (rxn_Ap[channel] <= 0.0){
+			continue;
+		}
+		for (i = st->stoich_ptr[r]; i < st->stoich_ptr[r+1]; ++i){
+			if (st->stoich_coeff[i] < 0 && site_conc[st->stoich_idx[i]] < -TAU_NUM_CRITICAL*st->stoich_coeff[i]){
+				st->critical[channel] = 1;
+				site_Ap_critical += rxn_Ap[channel];
+				break;
+			}
+		}
+		if (st->critical[channel] == 0){
+			for (i = st->stoich_ptr[r]; i < st->stoich_ptr[r+1]; ++i){
+				mu[st->stoich_idx[i]] += st->stoich_coeff[i]*rxn_Ap[channel];
+				sigma2[st->stoich_idx[i]] += st->stoich_coeff[i]*st->stoich_coeff[i]*rxn_Ap[channel];
+			}
+		}
+	}
+	// Largest leap which keeps the relative change of every propensity below epsilon
+	for (m = 0; m < st->num_molecules; ++m){
+		if (st->hor[m] == 0 || sigma2[m] <= 0.0){
+			continue;
+		}
+		x = site_conc[m];
+		bound = fmax(st->epsilon*x/highest_order_factor(st->hor[m], st->hor_coeff[m], x), 1.0);
+		if (mu[m] != 0.0){
+			site_tau = fmin(site_tau, bound/fabs(mu[m]));
+		}
+		site_tau = fmin(site_tau, bound*bound/sigma2[m]);
+	}
+	st->site_Ap[site] = site_Ap;
+	st->site_Ap_critical[site] = site_Ap_critical;
+	st->site_tau[site] = site_tau;
+	st->site_dirty[site] = 0;
+}
+
+int tau_pick_channel(const ssa_state *st, const double *site_Ap, double dice_roll, const int critical_only){
+	// Pick a lattice site by its total propensity, then a channel at that site. Falls back to the
+	// last channel with a positive propensity if round off leaves dice_roll above the total
+	int picked_site = -1;
+	int picked_channel = -1;
+	int channel;
+	int site;
+	int r;
+	for (site = 0; site < st->num_sites; ++site){
+		if (site_Ap[site] > 0.0){
+			picked_site = site;
+			if (dice_roll < site_Ap[site]){
+				break;
+			}
+			dice_roll -= site_Ap[site];
+		}
+	}
+	if (picked_site < 0){
+		return -1;
+	}
+	for (r = 0; r < st->num_reactions; ++r){
+		channel = INDEX2(st->num_sites, st->num_reactions, picked_site, r);
+		if (st->rxn_Ap[channel] > 0.0 && (critical_only == 0 || st->critical[channel] == 1)){
+			picked_channel = channel;
+			if (dice_roll < st->rxn_Ap[channel]){
+				break;
+			}
+			dice_roll -= st->rxn_Ap[channel];
+		}
+	}
+	return picked_channel;
+}
+
+void tau_touch_site(ssa_state *st, const int site, int *num_touched){
+	// Back up a site before the current leap first changes it
+	const int first = INDEX2(st->num_sites, st->num_molecules, site, 0);
+	if (st->site_dirty[site] == 0){
+		st->site_dirty[site] = 1;
+		st->touched[(*num_touched)++] = site;
+		memcpy(&st->backup[first], &st->concentrations[first], st->num_molecules*sizeof(double));
+	}
+}
+
+void tau_advance(ssa_state *st, const double next_t, const long max_count){
+	// Leap until next_t or until max_count reaction events have happened, epsilon bounds the
+	// expected relative change of every propensity per leap. Only the sites changed since the
+	// previous step are recomputed
+	double *rxn_Ap = st->rxn_Ap;
+	double *concentrations = st->concentrations;
+	double Ap_tot;
+	double Ap_critical;
+	double current_Ap;
+	double tau_noncritical;
+	double tau_critical;
+	double tau_step;
+	double horizon;
+	long leap_firings;
+	int num_touched;
+	int leap_critical;
+	int negative;
+	int steps;
+	int site;
+	int r;
+	int m;
+	int i;
+	int species;
+	int channel;
+	int picked_channel;
+
+	while (st->current_t < next_t && st->rxn_count < max_count){
+		OMP_PARALLEL_FOR(st->num_sites >= OMP_MIN_SITES)
+		for (site = 0; site < st->num_sites; ++site){
+			if (st->site_dirty[site] == 1){
+				tau_refresh_site(st, site);
+			}
+		}
+		Ap_tot = 0.0;
+		Ap_critical = 0.0;
+		tau_noncritical = INFINITY;
+		for (site = 0; site < st->num_sites; ++site){
+			Ap_tot += st->site_Ap[site];
+			Ap_critical += st->site_Ap_critical[site];
+			tau_noncritical = fmin(tau_noncritical, st->site_tau[site]);
+		}
+		if (Ap_tot <= 0.0){
+			// Nothing can happen anymore
+			if (next_t < INFINITY){
+				st->current_t = next_t;
+			}
+			break;
+		}
+
+		if (tau_noncritical < TAU_SSA_FACTOR/Ap_tot){
+			// Leaping is not worth it, take exact direct method steps instead
+			for (steps = 0; steps < TAU_SSA_STEPS && Ap_tot > 0.0 && st->rxn_count < max_count; ++steps){
+				tau_step = -log(rng_uniform(&st->rng))/Ap_tot;
+				if (st->current_t + tau_step >= next_t){
+					st->current_t = next_t;
+					break;
+				}
+				picked_channel = tau_pick_channel(st, st->site_Ap, Ap_tot*rng_uniform(&st->rng), 0);
+				st->current_t += tau_step;
+				site = picked_channel/st->num_reactions;
+				r = picked_channel - site*st->num_reactions;
+				execute_channel(st, site, r, 1);
+				for (i = st->dependency_ptr[r]; i < st->dependency_ptr[r+1]; ++i){
+					channel = INDEX2(st->num_sites, st->num_reactions, site, st->dependency_idx[i]);
+					current_Ap = channel_propensity(st, site, st->dependency_idx[i]);
+					Ap_tot += current_Ap - rxn_Ap[channel];
+					st->site_Ap[site] += current_Ap - rxn_Ap[channel];
+					rxn_Ap[channel] = current_Ap;
+				}
+				// Critical channels and the leap bound are recomputed before the next leap
+				st->site_dirty[site] = 1;
+				st->rxn_count += 1;
+			}
+			continue;
+		}
+
+		// Waiting time until the next critical event
+		tau_critical = exponential_wait(&st->rng, Ap_critical);
+		// Without an output time (SSA_advance_reactions) the leap is unbounded when no channel is
+		// limited by its reactants, e.g. pure sources. Cut it to the expected time of the
+		// remaining events so every Poisson mean is finite
+		horizon = next_t - st->current_t;
+		if (next_t == INFINITY){
+			horizon = (double)(max_count - st->rxn_count)/Ap_tot;
+		}
+		do {
+			leap_critical = (tau_critical <= tau_noncritical);
+			tau_step = leap_critical ? tau_critical : tau_noncritical;
+			if (next_t == INFINITY && tau_step > horizon){
+				tau_step = horizon;
+				leap_critical = 0;
+			}
+			if (st->current_t + tau_step > next_t){
+				// Stop exactly at the output time, the critical event has not happened yet
+				tau_step = next_t - st->current_t;
+				leap_critical = 0;
+			}
+			// Number of firings of each channel during the leap
+			picked_channel = -1;
+			if (leap_critical){
+				picked_channel = tau_pick_channel(st, st->site_Ap_critical, Ap_critical*rng_uniform(&st->rng), 1);
+			}
+			for (channel = 0; channel < st->num_channels; ++channel){
+				if (st->critical[channel] == 0){
+					st->firings[channel] = (rxn_Ap[channel] > 0.0) ? poisson(&st->rng, rxn_Ap[channel]*tau_step) : 0;
+				}
+				else {
+					st->firings[channel] = (channel == picked_channel) ? 1 : 0;
+				}
+			}
+			// Apply the leap, backing up every site it changes
+			num_touched = 0;
+			leap_firings = 0;
+			for (channel = 0; channel < st->num_channels; ++channel){
+				if (st->firings[channel] > 0){
+					site = channel/st->num_reactions;
+					tau_touch_site(st, site, &num_touched);
+					execute_channel(st, site, channel - site*st->num_reactions, st->firings[channel]);
+					leap_firings += st->firings[channel];
+				}
+			}
+			negative = 0;
+			for (i = 0; i < num_touched && negative == 0; ++i){
+				species = INDEX2(st->num_sites, st->num_molecules, st->touched[i], 0);
+				for (m = 0; m < st->num_molecules; ++m){
+					if (concentrations[species + m] < 0.0){
+						negative = 1;
+						break;
+					}
+				}
+			}
+			if (negative == 1){
+				// The leap was too long, undo it and try again with half the noncritical step.
+				// The restored sites match their cached propensities again
+				for (i = 0; i < num_touched; ++i){
+					species = INDEX2(st->num_sites, st->num_molecules, st->touched[i], 0);
+					memcpy(&concentrations[species], &st->backup[species], st->num_molecules*sizeof(double));
+					st->site_dirty[st->touched[i]] = 0;
+				}
+				tau_noncritical = 0.5*tau_noncritical;
+			}
+		} while (negative == 1);
+
+		st->current_t += tau_step;
+		st->rxn_count += leap_firings;
+		if (st->current_t >= next_t){
+			st->current_t = next_t;
+		}
+	}
+}
+
+/* ######## Next subvolume method ######## */
+// Elf and Ehrenberg's Next Subvolume Method for reaction-diffusion on the periodic lattice. Each
+// site holds a sum tree over its reaction propensities plus a diffusion propensity, and the next
+// event time of every site is kept in an indexed min-heap. An event is a reaction or the jump of a
+// single molecule to a neighbouring site. The jump propensities D_m n_m of each site are kept in a
+// sum tree over the molecules, so both kinds of events only touch one or two sites and cost
+// O(log sites + log reactions + log molecules). Jumps are counted in rxn_count like reactions.
+
+void nsm_update_diffusion(ssa_state *st, const int site, const int m){
+	// Refresh the jump propensity of molecule m at a site and the total diffusion propensity
+	double *diff_tree = &st->diff_trees[2*st->diff_leaves*site];
+	if (st->diffusion_rates == NULL){
+		return;
+	}
+	sumtree_update(diff_tree, st->diff_leaves, m, st->diffusion_rates[m]*site_concentrations(st, site)[m]);
+	st->site_diff_Ap[site] = diff_tree[1]*st->num_neighbours;
+}
+
+void nsm_schedule(ssa_state *st, const int site){
+	// Draw a new event time for a site from its current total propensity
+	const double Ap = st->rxn_trees[2*st->rxn_leaves*site + 1] + st->site_diff_Ap[site];
+	st->site_t[site] = st->current_t + exponential_wait(&st->rng, Ap);
+	heap_update(st->heap, st->heap_pos, st->site_t, st->num_sites, site);
+}
+
+void nsm_build_neighbours(ssa_state *st){
+	// Neighbours on the periodic lattice. In a dimension of size 2 both neighbours are the same
+	// site, it is listed twice so that it receives jumps through both faces (rate 2 D)
+	int x;
+	int y;
+	int n;
+	int site;
+	for (x = 0; x < st->max_x; ++x){
+		for (y = 0; y < st->max_y; ++y){
+			site = INDEX2(st->max_x, st->max_y, x, y);
+			n = 0;
+			if (st->max_x > 1){
+				st->neighbours[4*site + n++] = INDEX2(st->max_x, st->max_y, (x + 1) % st->max_x, y);
+			}
+			if (st->max_x > 1){
+				st->neighbours[4*site + n++] = INDEX2(st->max_x, st->max_y, (x + st->max_x - 1) % st->max_x, y);
+			}
+			if (st->max_y > 1){
+				st->neighbours[4*site + n++] = INDEX2(st->max_x, st->max_y, x, (y + 1) % st->max_y);
+			}
+			if (st->max_y > 1){
+				st->neighbours[4*site + n++] = INDEX2(st->max_x, st->max_y, x, (y + st->max_y - 1) % st->max_y);
+			}
+			st->num_neighbours = n;
+		}
+	}
+}
+
+int reaction_reads(const ssa_state *st, const int r, int *read){
+	// Write the molecules whose abundance the propensity of reaction r depends on into read,
+	// returns their number (a molecule may appear more than once)
+	int num_read = 0;
+	int i;
+	for (i = st->reactant_ptr[r]; i < st->reactant_ptr[r+1]; ++i){
+		read[num_read++] = st->reactant_idx[i];
+	}
+	for (i = st->catalyst_ptr[r]; i < st->catalyst_ptr[r+1]; ++i){
+		read[num_read++] = st->catalyst_idx[i];
+	}
+	if (st->rxn_props[r] == 1 && st->replicator_species != NULL){
+		for (i = 0; i < 3; ++i){
+			read[num_read++] = st->replicator_species[3*r + i];
+		}
+	}
+	return num_read;
+}
+
+void nsm_build_readers(ssa_state *st){
+	// Invert reaction_reads into the reactions reading each molecule, a CSR built in two passes
+	const int max_read = st->reactant_ptr[st->num_reactions] + st->catalyst_ptr[st->num_reactions] + 3;
+	int *read = malloc(max_read * sizeof(int));
+	int *last_reader = malloc(st->num_molecules * sizeof(int));
+	int *fill = malloc(st->num_molecules * sizeof(int));
+	int num_read;
+	int r;
+	int m;
+	int i;
+	st->reader_ptr = calloc(st->num_molecules + 1, sizeof(int));
+	for (m = 0; m < st->num_molecules; ++m){
+		last_reader[m] = -1;
+	}
+	for (r = 0; r < st->num_reactions; ++r){
+		num_read = reaction_reads(st, r, read);
+		for (i = 0; i < num_read; ++i){
+			if (last_reader[read[i]] != r){
+				last_reader[read[i]] = r;
+				st->reader_ptr[read[i] + 1] += 1;
+			}
+		}
+	}
+	for (m = 0; m < st->num_molecules; ++m){
+		st->reader_ptr[m + 1] += st->reader_ptr[m];
+		fill[m] = st->reader_ptr[m];
+		last_reader[m] = -1;
+	}
+	st->reader_idx = malloc((st->reader_ptr[st->num_molecules] + 1) * sizeof(int));
+	for (r = 0; r < st->num_reactions; ++r){
+		num_read = reaction_reads(st, r, read);
+		for (i = 0; i < num_read; ++i){
+			if (last_reader[read[i]] != r){
+				last_reader[read[i]] = r;
+				st->reader_idx[fill[read[i]]++] = r;
+			}
+		}
+	}
+	free(read);
+	free(last_reader);
+	free(fill);
+}
+
+void nsm_init(ssa_state *st){
+	double *diff_tree;
+	const double *site_conc;
+	int site;
+	int m;
+	if (st->site_t == NULL){
+		st->rxn_leaves = sumtree_leaves(st->num_reactions);
+		st->rxn_trees = calloc(2*st->rxn_leaves*st->num_sites, sizeof(double));
+		st->diff_leaves = sumtree_leaves(st->num_molecules);
+		st->diff_trees = calloc(2*st->diff_leaves*st->num_sites, sizeof(double));
+		st->site_diff_Ap = malloc(st->num_sites * sizeof(double));
+		st->site_t = malloc(st->num_sites * sizeof(double));
+		st->heap = malloc(st->num_sites * sizeof(int));
+		st->heap_pos = malloc(st->num_sites * sizeof(int));
+		st->neighbours = malloc(4*st->num_sites * sizeof(int));
+		nsm_build_neighbours(st);
+		nsm_build_readers(st);
+	}
+	build_site_trees(st);
+	for (site = 0; site < st->num_sites; ++site){
+		diff_tree = &st->diff_trees[2*st->diff_leaves*site];
+		site_conc = site_concentrations(st, site);
+		for (m = 0; m < st->num_molecules; ++m){
+			diff_tree[st->diff_leaves + m] = (st->diffusion_rates == NULL) ? 0.0 : st->diffusion_rates[m]*site_conc[m];
+		}
+		sumtree_build(diff_tree, st->diff_leaves);
+		st->site_diff_Ap[site] = diff_tree[1]*st->num_neighbours;
+		st->site_t[site] = st->current_t + exponential_wait(&st->rng, st->rxn_trees[2*st->rxn_leaves*site + 1] + st->site_diff_Ap[site]);
+	}
+	heap_build(st->heap, st->heap_pos, st->site_t, st->num_sites);
+	st->next_event_t = (st->num_sites > 0) ? st->site_t[st->heap[0]] : INFINITY;
+}
+
+void nsm_update_readers(ssa_state *st, const int site, const int m){
+	// Recompute the reactions at a site which read molecule m
+	double *rxn_tree = &st->rxn_trees[2*st->rxn_leaves*site];
+	int i;
+	for (i = st->reader_ptr[m]; i < st->reader_ptr[m+1]; ++i){
+		sumtree_update(rxn_tree, st->rxn_leaves, st->reader_idx[i], channel_propensity(st, site, st->reader_idx[i]));
+	}
+}
+
+void nsm_fire(ssa_state *st){
+	const int picked_site = st->heap[0];
+	double *rxn_tree = &st->rxn_trees[2*st->rxn_leaves*picked_site];
+	double *diff_tree = &st->diff_trees[2*st->diff_leaves*picked_site];
+	double *site_conc = site_concentrations(st, picked_site);
+	double dice_roll = (rxn_tree[1] + st->site_diff_Ap[picked_site])*rng_uniform(&st->rng);
+	int picked_r;
+	int picked_m = -1;
+	int destination;
+	int i;
+
+	st->current_t = st->site_t[picked_site];
+	if (dice_roll < rxn_tree[1]){
+		// Reaction, update the dependents of the picked reaction at the picked site
+		picked_r = sumtree_sample(rxn_tree, st->rxn_leaves, dice_roll);
+		execute_channel(st, picked_site, picked_r, 1);
+		for (i = st->dependency_ptr[picked_r]; i < st->dependency_ptr[picked_r+1]; ++i){
+			sumtree_update(rxn_tree, st->rxn_leaves, st->dependency_idx[i], channel_propensity(st, picked_site, st->dependency_idx[i]));
+		}
+		for (i = st->stoich_ptr[picked_r]; i < st->stoich_ptr[picked_r+1]; ++i){
+			nsm_update_diffusion(st, picked_site, st->stoich_idx[i]);
+		}
+	}
+	else {
+		// Diffusion, pick the molecule from the sum tree, then one of the neighbours uniformly
+		dice_roll = (dice_roll - rxn_tree[1])/st->num_neighbours;
+		if (diff_tree[1] > 0.0){
+			picked_m = sumtree_sample(diff_tree, st->diff_leaves, fmin(dice_roll, diff_tree[1]));
+		}
+		if (picked_m >= 0){
+			destination = st->neighbours[4*picked_site + (int)(st->num_neighbours*rng_uniform(&st->rng))];
+			site_conc[picked_m] -= 1.0;
+			st->concentrations[INDEX2(st->num_sites, st->num_molecules, destination, picked_m)] += 1.0;
+			nsm_update_readers(st, picked_site, picked_m);
+			nsm_update_readers(st, destination, picked_m);
+			nsm_update_diffusion(st, picked_site, picked_m);
+			nsm_update_diffusion(st, destination, picked_m);
+			if (destination != picked_site){
+				nsm_schedule(st, destination);
+			}
+		}
+	}
+	nsm_schedule(st, picked_site);
+	st->next_event_t = st->site_t[st->heap[0]];
+}
+
+/* ######## Hybrid engine ######## */
+// Haseltine and Rawlings (2002) partitioning. Before every step each channel is classified from
+// its current propensity and copy numbers. A channel is fast if every species it consumes has at
+// least HYBRID_MIN_COUNT copies and it fires at least HYBRID_MIN_FIRINGS times during the step;
+// fast channels are advanced with the Langevin (Gaussian) approximation of their number of
+// firings, rounded so that copy numbers stay whole. All other channels are slow and fire exactly:
+// a slow event happens when the integral of the total slow propensity reaches an exponential
+// random number. The step is the tau-leaping bound (epsilon) over the fast candidates, so the
+// partition follows the system as monomers are used up or oligomers accumulate.
+
+#define HYBRID_MIN_COUNT 100.0 // Copies of every consumed species needed for a fast channel
+#define HYBRID_MIN_FIRINGS 10.0 // Expected firings per step needed for a fast channel
+
+double normal(pcg32_random_t *rng){
+	// Standard normal random number, Box-Muller transform
+	return sqrt(-2.0*log(rng_uniform(rng)))*cos(2.0*M_PI*rng_uniform(rng));
+}
+
+void hybrid_init(ssa_state *st){
+	tau_init(st);
+	if (st->fast == NULL){
+		st->fast = malloc(st->num_channels * sizeof(int));
+		st->site_Ap_fast = malloc(st->num_sites * sizeof(double));
+		st->outflow = malloc(st->num_sites*st->num_molecules * sizeof(double));
+		st->slow_leaves = sumtree_leaves(st->num_channels);
+		st->slow_tree = calloc(2*st->slow_leaves, sizeof(double));
+	}
+	st->slow_integral = 0.0;
+	st->slow_threshold = -log(rng_uniform(&st->rng));
+}
+
+void hybrid_refresh_site(ssa_state *st, const int site){
+	// Recompute the propensities, fast candidates and step bound of a single lattice site
+	const double *site_conc = site_concentrations(st, site);
+	double *mu = &st->mu[INDEX2(st->num_sites, st->num_molecules, site, 0)];
+	double *sigma2 = &st->sigma2[INDEX2(st->num_sites, st->num_molecules, site, 0)];
+	double *outflow = &st->outflow[INDEX2(st->num_sites, st->num_molecules, site, 0)];
+	double *rxn_Ap = st->rxn_Ap;
+	double site_Ap = 0.0;
+	double site_Ap_fast = 0.0;
+	double site_tau = INFINITY;
+	double bound;
+	double x;
+	int channel;
+	int r;
+	int m;
+	int i;
+
+	for (m = 0; m < st->num_molecules; ++m){
+		mu[m] = 0.0;
+		sigma2[m] = 0.0;
+		outflow[m] = 0.0;
+	}
+	for (r = 0; r < st->num_reactions; ++r){
+		channel = INDEX2(st->num_sites, st->num_reactions, site, r);
+		rxn_Ap[channel] = channel_propensity(st, site, r);
+		site_Ap += rxn_Ap[channel];
+		st->fast[channel] = (rxn_Ap[channel] > 0.0);
+		for (i = st->stoich_ptr[r]; i < st->stoich_ptr[r+1] && st->fast[channel] == 1; ++i){
+			if (st->stoich_coeff[i] < 0 && site_conc[st->stoich_idx[i]] < HYBRID_MIN_COUNT){
+				st->fast[channel] = 0;
+			}
+		}
+		if (st->fast[channel] == 1){
+			site_Ap_fast += rxn_Ap[channel];
+			for (i = st->stoich_ptr[r]; i < st->stoich_ptr[r+1]; ++i){
+				mu[st->stoich_idx[i]] += st->stoich_coeff[i]*rxn_Ap[channel];
+				sigma2[st->stoich_idx[i]] += st->stoich_coeff[i]*st->stoich_coeff[i]*rxn_Ap[channel];
+				if (st->stoich_coeff[i] < 0){
+					outflow[st->stoich_idx[i]] -= st->stoich_coeff[i]*rxn_Ap[channel];
+				}
+			}
+		}
+	}
+	// Largest step which keeps the relative change of every propensity below epsilon. Near
+	// equilibrium the net drift vanishes, so the gross turnover of each species is bounded as
+	// well, which keeps the explicit step well inside the relaxation time of fast reversible pairs
+	for (m = 0; m < st->num_molecules; ++m){
+		if (st->hor[m] == 0 || sigma2[m] <= 0.0){
+			continue;
+		}
+		x = site_conc[m];
+		bound = fmax(st->epsilon*x/highest_order_factor(st->hor[m], st->hor_coeff[m], x), 1.0);
+		if (mu[m] != 0.0){
+			site_tau = fmin(site_tau, bound/fabs(mu[m]));
+		}
+		if (outflow[m] > 0.0){
+			site_tau = fmin(site_tau, bound/outflow[m]);
+		}
+		site_tau = fmin(site_tau, bound*bound/sigma2[m]);
+	}
+	st->site_Ap[site] = site_Ap;
+	st->site_Ap_fast[site] = site_Ap_fast;
+	st->site_tau[site] = site_tau;
+	st->site_dirty[site] = 0;
+}
+
+void hybrid_advance(ssa_state *st, const double next_t, const long max_count){
+	// Step until next_t or until max_count reaction events have happened. Within a step the slow
+	// channels are simulated exactly, then the fast channels fire over the whole step. Only the
+	// sites changed since the previous step are recomputed
+	double *rxn_Ap = st->rxn_Ap;
+	double *concentrations = st->concentrations;
+	double Ap_slow;
+	double dt;
+	double dt_limit = INFINITY;
+	double elapsed;
+	double wait;
+	double mean;
+	double start_integral;
+	double start_threshold;
+	long step_firings;
+	int num_fast;
+	int num_touched;
+	int slow_events;
+	int negative;
+	int site;
+	int r;
+	int m;
+	int i;
+	int species;
+	int channel;
+	int picked_channel;
+
+	while (st->current_t < next_t && st->rxn_count < max_count){
+		OMP_PARALLEL_FOR(st->num_sites >= OMP_MIN_SITES)
+		for (site = 0; site < st->num_sites; ++site){
+			if (st->site_dirty[site] == 1){
+				hybrid_refresh_site(st, site);
+			}
+		}
+		dt = fmin(next_t - st->current_t, dt_limit);
+		for (site = 0; site < st->num_sites; ++site){
+			if (st->site_Ap_fast[site] > 0.0){
+				dt = fmin(dt, st->site_tau[site]);
+			}
+		}
+		// Partition the channels for this step, critical marks the slow channels
+		num_fast = 0;
+		for (channel = 0; channel < st->num_channels; ++channel){
+			st->critical[channel] = (st->fast[channel] == 1 && dt < INFINITY && rxn_Ap[channel]*dt >= HYBRID_MIN_FIRINGS) ? 0 : 1;
+			st->slow_tree[st->slow_leaves + channel] = (st->critical[channel] == 1) ? rxn_Ap[channel] : 0.0;
+			num_fast += 1 - st->critical[channel];
+		}
+		sumtree_build(st->slow_tree, st->slow_leaves);
+		Ap_slow = st->slow_tree[1];
+		if (num_fast == 0){
+			if (Ap_slow <= 0.0){
+				// Nothing can happen anymore
+				if (next_t < INFINITY){
+					st->current_t = next_t;
+				}
+				break;
+			}
+			// Only slow channels, take exact steps until the partition is revisited
+			dt = fmin(next_t - st->current_t, dt_limit);
+		}
+
+		// Slow channels, an event fires whenever the integral of their total propensity reaches
+		// the threshold. Every site changed during the step is backed up first
+		num_touched = 0;
+		elapsed = 0.0;
+		slow_events = 0;
+		start_integral = st->slow_integral;
+		start_threshold = st->slow_threshold;
+		while (Ap_slow > 0.0){
+			wait = (st->slow_threshold - st->slow_integral)/Ap_slow;
+			if (elapsed + wait > dt){
+				st->slow_integral += Ap_slow*(dt - elapsed);
+				elapsed = dt;
+				break;
+			}
+			elapsed += wait;
+			picked_channel = sumtree_sample(st->slow_tree, st->slow_leaves, Ap_slow*rng_uniform(&st->rng));
+			site = picked_channel/st->num_reactions;
+			r = picked_channel - site*st->num_reactions;
+			tau_touch_site(st, site, &num_touched);
+			execute_channel(st, site, r, 1);
+			for (i = st->dependency_ptr[r]; i < st->dependency_ptr[r+1]; ++i){
+				channel = INDEX2(st->num_sites, st->num_reactions, site, st->dependency_idx[i]);
+				rxn_Ap[channel] = channel_propensity(st, site, st->dependency_idx[i]);
+				if (st->critical[channel] == 1){
+					sumtree_update(st->slow_tree, st->slow_leaves, channel, rxn_Ap[channel]);
+				}
+			}
+			Ap_slow = st->slow_tree[1];
+			slow_events += 1;
+			st->slow_integral = 0.0;
+			st->slow_threshold = -log(rng_uniform(&st->rng));
+			if (num_fast == 0 && (slow_events >= TAU_SSA_STEPS || st->rxn_count + slow_events >= max_count)){
+				break;
+			}
+		}
+		if (num_fast == 0){
+			dt = (Ap_slow > 0.0) ? elapsed : dt;
+		}
+
+		// Fast channels, Langevin number of firings over the whole step
+		step_firings = slow_events;
+		for (channel = 0; channel < st->num_channels && num_fast > 0; ++channel){
+			if (st->critical[channel] == 0){
+				mean = rxn_Ap[channel]*dt;
+				st->firings[channel] = (long)fmax(floor(mean + sqrt(mean)*normal(&st->rng) + 0.5), 0.0);
+				if (st->firings[channel] > 0){
+					site = channel/st->num_reactions;
+					tau_touch_site(st, site, &num_touched);
+					execute_channel(st, site, channel - site*st->num_reactions, st->firings[channel]);
+					step_firings += st->firings[channel];
+				}
+			}
+		}
+		negative = 0;
+		for (i = 0; i < num_touched && negative == 0; ++i){
+			species = INDEX2(st->num_sites, st->num_molecules, st->touched[i], 0);
+			for (m = 0; m < st->num_molecules; ++m){
+				if (concentrations[species + m] < 0.0){
+					negative = 1;
+					break;
+				}
+			}
+		}
+		if (negative == 1){
+			// The step was too long, undo it and repartition with at most half the step. The
+			// restored sites are recomputed since slow events changed their propensities
+			for (i = 0; i < num_touched; ++i){
+				species = INDEX2(st->num_sites, st->num_molecules, st->touched[i], 0);
+				memcpy(&concentrations[species], &st->backup[species], st->num_molecules*sizeof(double));
+			}
+			st->slow_integral = start_integral;
+			st->slow_threshold = start_threshold;
+			dt_limit = 0.5*dt;
+			continue;
+		}
+		dt_limit = INFINITY;
+		st->current_t += dt;
+		st->rxn_count += step_firings;
+		if (st->current_t >= next_t){
+			st->current_t = next_t;
+		}
+	}
+}
+
+/* ######## Simulation handle ######## */
+
+void engine_init(ssa_state *st){
+	// (Re)compute all propensities and the indexes of the engine from the concentrations
+	if (st->engine == ENGINE_NRM){
+		nrm_init(st);
+	}
+	else if (st->engine == ENGINE_CR){
+		cr_init(st);
+	}
+	else if (st->engine == ENGINE_TAU){
+		tau_init(st);
+	}
+	else if (st->engine == ENGINE_NSM){
+		nsm_init(st);
+	}
+	else if (st->engine == ENGINE_HYBRID){
+		hybrid_init(st);
+	}
+	else {
+		direct_init(st);
+	}
+}
+
+void engine_fire(ssa_state *st){
+	// Execute the pending event of an exact engine
+	if (st->engine == ENGINE_NRM){
+		nrm_fire(st);
+	}
+	else if (st->engine == ENGINE_CR){
+		cr_fire(st);
+	}
+	else if (st->engine == ENGINE_NSM){
+		nsm_fire(st);
+	}
+	else {
+		direct_fire(st);
+	}
+}
+
+void *SSA_create(const int engine, const double current_t, const uint64_t r_seed, const uint64_t r_stream, const int max_x, const int max_y, const int num_molecules, const int num_reactions, double *concentrations, const double  *reaction_constants, const int  *rxn_props, const int *reactant_ptr, const int *reactant_idx, const int *reactant_coeff, const int *stoich_ptr, const int *stoich_idx, const int *stoich_coeff, const int *catalyst_ptr, const int *catalyst_idx, const double *catalyst_constants, const int *dependency_ptr, const int *dependency_idx, const int *replicator_species, const int *weight_ptr, const double *weights, const double *diffusion_rates, const double epsilon){
+	// Returns a handle to a new simulation at time current_t, NULL if the engine is unknown
+	ssa_state *st;
+	if (engine < ENGINE_DIRECT || engine > ENGINE_HYBRID){
+		return NULL;
+	}
+	st = calloc(1, sizeof(ssa_state));
+	st->engine = engine;
+	st->max_x = max_x;
+	st->max_y = max_y;
+	st->num_sites = max_x*max_y;
+	st->num_molecules = num_molecules;
+	st->num_reactions = num_reactions;
+	st->num_channels = max_x*max_y*num_reactions;
+	st->current_t = current_t;
+	st->epsilon = epsilon;
+	st->concentrations = concentrations;
+	st->reaction_constants = reaction_constants;
+	st->rxn_props = rxn_props;
+	st->reactant_ptr = reactant_ptr;
+	st->reactant_idx = reactant_idx;
+	st->reactant_coeff = reactant_coeff;
+	st->stoich_ptr = stoich_ptr;
+	st->stoich_idx = stoich_idx;
+	st->stoich_coeff = stoich_coeff;
+	st->catalyst_ptr = catalyst_ptr;
+	st->catalyst_idx = catalyst_idx;
+	st->catalyst_constants = catalyst_constants;
+	st->dependency_ptr = dependency_ptr;
+	st->dependency_idx = dependency_idx;
+	st->replicator_species = replicator_species;
+	st->weight_ptr = weight_ptr;
+	st->weights = weights;
+	st->diffusion_rates = diffusion_rates;
+	// Initialize Random Number generator
+	pcg32_srandom_r(&st->rng, r_seed, r_stream);
+	engine_init(st);
+	return st;
+}
+
+double SSA_advance(void *handle, const double next_t){
+	// Evolve the simulation to next_t and return the new time. The exact engines keep the pending
+	// event, so the concentrations are the state at exactly next_t
+	ssa_state *st = handle;
+	if (st->engine == ENGINE_TAU){
+		tau_advance(st, next_t, LONG_MAX);
+		return st->current_t;
+	}
+	if (st->engine == ENGINE_HYBRID){
+		hybrid_advance(st, next_t, LONG_MAX);
+		return st->current_t;
+	}
+	while (st->next_event_t < next_t){
+		engine_fire(st);
+		st->rxn_count += 1;
+	}
+	if (next_t > st->current_t){
+		st->current_t = next_t;
+	}
+	return st->current_t;
+}
+
+double SSA_advance_reactions(void *handle, const long num_events){
+	// Evolve the simulation by (at least) num_events reaction events, returns the new time
+	ssa_state *st = handle;
+	long i;
+	if (st->engine == ENGINE_TAU){
+		tau_advance(st, INFINITY, st->rxn_count + num_events);
+		return st->current_t;
+	}
+	if (st->engine == ENGINE_HYBRID){
+		hybrid_advance(st, INFINITY, st->rxn_count + num_events);
+		return st->current_t;
+	}
+	for (i = 0; i < num_events && st->next_event_t < INFINITY; ++i){
+		engine_fire(st);
+		st->rxn_count += 1;
+	}
+	return st->current_t;
+}
+
+double SSA_run_schedule(void *handle, const int n_times, const double *times, double *out){
+	// Evolve the simulation through a non-decreasing schedule of output times, writing the state
+	// at each time into consecutive frames of out, which holds n_times*num_sites*num_molecules
+	// doubles. Returns the new time
+	ssa_state *st = handle;
+	const int frame_size = st->num_sites*st->num_molecules;
+	int i;
+	for (i = 0; i < n_times; ++i){
+		SSA_advance(handle, times[i]);
+		memcpy(&out[(long)i*frame_size], st->concentrations, frame_size*sizeof(double));
+	}
+	return st->current_t;
+}
+
+void SSA_refresh(void *handle){
+	// Recompute everything after the caller changed the concentrations
+	ssa_state *st = handle;
+	engine_init(st);
+}
+
+/* ######## Checkpoints ######## */
+// The state of a simulation beyond its concentrations, written as doubles: a header with the
+// clock and the incremental totals followed by the per channel or per site event times of the
+// engine. A simulation created from the same concentrations and loaded with this state and the
+// random number state continues bit-identically. Indexes rebuilt from the concentrations
+// (propensities, sum trees) come out identical and are not stored.
+
+#define STATE_HEADER 7
+
+long SSA_state_size(const void *handle){
+	// Number of doubles written by SSA_save_state
+	const ssa_state *st = handle;
+	if (st->engine == ENGINE_NRM){
+		return STATE_HEADER + st->num_channels;
+	}
+	if (st->engine == ENGINE_CR){
+		return STATE_HEADER + CR_NUM_BINS + 2L*st->num_channels;
+	}
+	if (st->engine == ENGINE_NSM){
+		return STATE_HEADER + st->num_sites;
+	}
+	return STATE_HEADER;
+}
+
+void SSA_save_state(const void *handle, uint64_t *rng_state, double *state){
+	const ssa_state *st = handle;
+	double *arrays = &state[STATE_HEADER];
+	int channel;
+	int b;
+	rng_state[0] = st->rng.state;
+	rng_state[1] = st->rng.inc;
+	state[0] = st->current_t;
+	state[1] = st->next_event_t;
+	state[2] = (double) st->rxn_count;
+	state[3] = st->slow_integral;
+	state[4] = st->slow_threshold;
+	state[5] = st->Ap_tot;
+	state[6] = st->events_since_refresh;
+	if (st->engine == ENGINE_NRM){
+		memcpy(arrays, st->firing_t, st->num_channels*sizeof(double));
+	}
+	else if (st->engine == ENGINE_CR){
+		// The order of the members of a bin decides which channel a rejection sample picks
+		for (b = 0; b < CR_NUM_BINS; ++b){
+			arrays[b] = st->bins[b].Ap;
+		}
+		for (channel = 0; channel < st->num_channels; ++channel){
+			arrays[CR_NUM_BINS + channel] = st->channel_bin[channel];
+			arrays[CR_NUM_BINS + st->num_channels + channel] = st->channel_slot[channel];
+		}
+	}
+	else if (st->engine == ENGINE_NSM){
+		memcpy(arrays, st->site_t, st->num_sites*sizeof(double));
+	}
+}
+
+void SSA_load_state(void *handle, const uint64_t *rng_state, const double *state){
+	// Restore a state saved by SSA_save_state into a simulation just created from the saved
+	// concentrations and time
+	ssa_state *st = handle;
+	const double *arrays = &state[STATE_HEADER];
+	int channel;
+	int b;
+	st->rng.state = rng_state[0];
+	st->rng.inc = rng_state[1];
+	st->current_t = state[0];
+	st->next_event_t = state[1];
+	st->rxn_count = (long) state[2];
+	st->slow_integral = state[3];
+	st->slow_threshold = state[4];
+	st->Ap_tot = state[5];
+	st->events_since_refresh = (int) state[6];
+	if (st->engine == ENGINE_NRM){
+		memcpy(st->firing_t, arrays, st->num_channels*sizeof(double));
+		heap_build(st->heap, st->heap_pos, st->firing_t, st->num_channels);
+	}
+	else if (st->engine == ENGINE_CR){
+		for (b = 0; b < CR_NUM_BINS; ++b){
+			st->bins[b].Ap = arrays[b];
+			st->bins[b].size = 0;
+		}
+		for (channel = 0; channel < st->num_channels; ++channel){
+			st->channel_bin[channel] = (int) arrays[CR_NUM_BINS + channel];
+			st->channel_slot[channel] = (int) arrays[CR_NUM_BINS + st->num_channels + channel];
+			b = st->channel_bin[channel];
+			if (b >= 0){
+				if (st->channel_slot[channel] >= st->bins[b].capacity){
+					st->bins[b].capacity = 2*st->channel_slot[channel] + 16;
+					st->bins[b].members = realloc(st->bins[b].members, st->bins[b].capacity * sizeof(int));
+				}
+				st->bins[b].members[st->channel_slot[channel]] = channel;
+				st->bins[b].size += 1;
+			}
+		}
+		cr_bounds(st->bins, st->occupied);
+	}
+	else if (st->engine == ENGINE_NSM){
+		memcpy(st->site_t, arrays, st->num_sites*sizeof(double));
+		heap_build(st->heap, st->heap_pos, st->site_t, st->num_sites);
+	}
+}
+
+void SSA_read_state(const void *handle, double *out){
+	// Copy the current concentrations into out
+	const ssa_state *st = handle;
+	memcpy(out, st->concentrations, st->num_sites*st->num_molecules*sizeof(double));
+}
+
+double SSA_get_time(const void *handle){
+	const ssa_state *st = handle;
+	return st->current_t;
+}
+
+long SSA_get_reaction_count(const void *handle){
+	const ssa_state *st = handle;
+	return st->rxn_count;
+}
+
+void SSA_destroy(void *handle){
+	ssa_state *st = handle;
+	int b;
+	if (st == NULL){
+		return;
+	}
+	if (st->bins != NULL){
+		for (b = 0; b < CR_NUM_BINS; ++b){
+			free(st->bins[b].members);
+		}
+	}
+	free(st->bins);
+	free(st->channel_bin);
+	free(st->channel_slot);
+	free(st->rxn_Ap);
+	free(st->site_tree);
+	free(st->rxn_trees);
+	free(st->firing_t);
+	free(st->heap);
+	free(st->heap_pos);
+	free(st->critical);
+	free(st->firings);
+	free(st->mu);
+	free(st->sigma2);
+	free(st->backup);
+	free(st->hor);
+	free(st->hor_coeff);
+	free(st->site_dirty);
+	free(st->touched);
+	free(st->site_Ap);
+	free(st->site_Ap_critical);
+	free(st->site_tau);
+	free(st->fast);
+	free(st->site_Ap_fast);
+	free(st->slow_tree);
+	free(st->outflow);
+	free(st->neighbours);
+	free(st->reader_ptr);
+	free(st->reader_idx);
+	free(st->diff_trees);
+	free(st->site_diff_Ap);
+	free(st->site_t);
+	free(st);
+}
+
+// int main()
+// {
+//   return 0;}
+
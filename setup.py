@@ -1,30 +1,73 @@
-# Copyright 2016 ELIFE. All rights reserved.
-# Use of this source code is governed by a MIT
-# license that can be found in the LICENSE file.
-from setuptools import setup,find_packages
-
-
-with open('docs/README.rst') as f:
-    readme = f.read()
-
-with open('LICENSE') as f:
-    license = f.read()
-
-setup(
-    name='chemevolve',
-    version='0.0.8',
-    description='Tools for Simulating Chemical Evoltion',
-    long_description=readme,
-    maintainer='Cole Mathis',
-    maintainer_email='cole.mathis@asu.edu',
-    url='https://github.com/elife-asu/chemevolve',
-    license=license,
-    install_requires=['numpy', 'matplotlib', 'seaborn'],
-    packages=find_packages(),
-    include_package_data = True
-   
-)
-
-
-
-
+# Copyright 2016 ELIFE. All rights reserved.
+# Use of this source code is governed by a MIT
+# license that can be found in the LICENSE file.
+import os
+import platform
+import subprocess
+import warnings
+from setuptools import setup,find_packages
+from setuptools.command.build_py import build_py
+
+SSA_LIBRARIES = {'Linux': 'Linux-SSA.so', 'Darwin': 'OSX-SSA.so', 'Windows': 'Win-SSA.so'}
+
+
+def compile_ssa_library(target):
+    ''' Compiles chemevolve/clibs/SSA.c into the shared library target, with OpenMP when the
+    compiler supports it (-fopenmp) and serially otherwise. The compiler is taken from $CC
+
+    Return:
+        - True if the library was built, False if no attempt succeeded
+    '''
+    compiler = os.environ.get('CC', 'cc')
+    source = os.path.join('chemevolve', 'clibs', 'SSA.c')
+    command = [compiler, '-O2', '-shared', '-fPIC', source, '-o', target, '-lm']
+    for flags in (['-fopenmp'], []):
+        try:
+            subprocess.check_call(command[:4] + flags + command[4:])
+            return True
+        except (OSError, subprocess.CalledProcessError):
+            continue
+    return False
+
+
+class build_py_ssa(build_py):
+    ''' build_py which also compiles the SSA library for the current platform '''
+    def run(self):
+        build_py.run(self)
+        library = SSA_LIBRARIES.get(platform.system())
+        if library is None:
+            return
+        clibs = os.path.join('chemevolve', 'clibs')
+        if not getattr(self, 'editable_mode', False):
+            clibs = os.path.join(self.build_lib, clibs)
+            self.mkpath(clibs)
+        if not compile_ssa_library(os.path.join(clibs, library)):
+            warnings.warn('Could not compile the SSA library, set $CC to a C compiler')
+
+
+with open('docs/README.rst') as f:
+    readme = f.read()
+
+with open('LICENSE') as f:
+    license = f.read()
+
+setup(
+    name='chemevolve',
+    version='0.0.8',
+    description='Tools for Simulating Chemical Evoltion',
+    long_description=readme,
+    maintainer='Cole Mathis',
+    maintainer_email='cole.mathis@asu.edu',
+    url='https://github.com/elife-asu/chemevolve',
+    license=license,
+    python_requires='>=3.3',
+    install_requires=['numpy', 'matplotlib', 'seaborn'],
+    packages=find_packages(),
+    include_package_data = True,
+    cmdclass={'build_py': build_py_ssa}
+   
+)
+
+
+
+
@@ -0,0 +1,17 @@
+import numpy as np
+import pytest
+
+from chemevolve import BinaryPolymer as BinPoly
+
+
+@pytest.fixture
+def binary_polymer_system():
+    '''Returns a function building a binary polymer CRS and a lattice seeded with A and B'''
+    def build(max_length=4, shape=(2, 2), monomers=150, fconstant=0.001, bconstant=1.0):
+        CRS = BinPoly.generate_all_binary_reactions(max_length, fconstant=fconstant,
+                                                    bconstant=bconstant)
+        concentrations = np.zeros(shape + (len(CRS.molecule_list),))
+        concentrations[..., CRS.molecule_dict['A']] = monomers
+        concentrations[..., CRS.molecule_dict['B']] = monomers
+        return CRS, concentrations
+    return build
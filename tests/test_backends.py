@@ -0,0 +1,27 @@
+import numpy as np
+import pytest
+
+import chemevolve as ce
+from chemevolve.ReactionFunctions import _SSA_LIB
+
+
+@pytest.mark.skipif(_SSA_LIB is None, reason='the SSA library is not built')
+def test_python_backend_matches_c_direct(tmp_path, monkeypatch, binary_polymer_system):
+    monkeypatch.chdir(tmp_path)
+    CRS, initial = binary_polymer_system()
+    final = {}
+    for backend in ('c', 'python'):
+        concentrations = initial.copy()
+        ce.SSA_evolve(0.0, 2.0, concentrations, CRS, 7, output_prefix=backend, t_out=0.25,
+                      backend=backend)
+        final[backend] = concentrations
+    np.testing.assert_array_equal(final['c'], final['python'])
+    times_c, snapshots_c = ce.load_trajectory(ce.trajectory_name('c'))
+    times_python, snapshots_python = ce.load_trajectory(ce.trajectory_name('python'))
+    np.testing.assert_array_equal(times_c, times_python)
+    np.testing.assert_array_equal(snapshots_c, snapshots_python)
+
+
+def test_unknown_backend_is_rejected():
+    with pytest.raises(ValueError):
+        ce.get_backend('fortran')
@@ -0,0 +1,49 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import chemevolve as ce
+from chemevolve.ReactionFunctions import _SSA_LIB
+
+pytestmark = pytest.mark.skipif(_SSA_LIB is None, reason='the SSA library is not built')
+
+
+class Preempted(Exception):
+    pass
+
+
+def read_tidy(prefix):
+    return pd.read_csv(prefix + '_time_series_df.csv')
+
+
+@pytest.mark.parametrize('engine', sorted(ce.SSA_ENGINES))
+def test_checkpoint_resume_is_identical(tmp_path, monkeypatch, binary_polymer_system, engine):
+    monkeypatch.chdir(tmp_path)
+    CRS, initial = binary_polymer_system()
+    settings = dict(t_out=0.25, engine=engine, diffusion_rates=0.3 if engine == 'nsm' else None)
+
+    plain = initial.copy()
+    ce.SSA_evolve(0.0, 3.0, plain, CRS, 5, output_prefix='plain', **settings)
+
+    # Stop the run while it writes the output at t = 1.5, the last checkpoint is at t = 1.0
+    append = ce.TrajectoryStore.append
+    calls = [0]
+
+    def preempted_append(*args, **kwargs):
+        calls[0] += 1
+        if calls[0] == 7:
+            raise Preempted()
+        append(*args, **kwargs)
+
+    monkeypatch.setattr(ce.TrajectoryStore, 'append', preempted_append)
+    with pytest.raises(Preempted):
+        ce.SSA_evolve(0.0, 3.0, initial.copy(), CRS, 5, output_prefix='resumed',
+                      checkpoint='run.ckpt', checkpoint_interval=0.5, **settings)
+    monkeypatch.setattr(ce.TrajectoryStore, 'append', append)
+    assert ce.load_checkpoint('run.ckpt')['tau'] == 1.0
+
+    resumed = initial.copy()
+    ce.SSA_evolve(0.0, 3.0, resumed, CRS, 5, output_prefix='resumed', checkpoint='run.ckpt',
+                  checkpoint_interval=0.5, **settings)
+    np.testing.assert_array_equal(plain, resumed)
+    pd.testing.assert_frame_equal(read_tidy('plain'), read_tidy('resumed'))
@@ -0,0 +1,86 @@
+import numpy as np
+import pytest
+
+import chemevolve as ce
+from chemevolve.CoreClasses import CRS, Reaction
+from chemevolve.ReactionFunctions import _SSA_LIB
+
+pytestmark = pytest.mark.skipif(_SSA_LIB is None, reason='the SSA library is not built')
+
+
+def residue_totals(CRS, concentrations):
+    '''Number of A and B residues on the lattice, conserved by ligation and degradation'''
+    totals = concentrations.reshape(-1, len(CRS.molecule_list)).sum(axis=0)
+    return [sum(m.count(residue) * n for m, n in zip(CRS.molecule_list, totals))
+            for residue in 'AB']
+
+
+def check_conserves_residues(binary_polymer_system, engine, **kwargs):
+    CRS, concentrations = binary_polymer_system()
+    expected = residue_totals(CRS, concentrations)
+    ce.SSA_evolve(0.0, 2.0, concentrations, CRS, 3, engine=engine, **kwargs)
+    assert concentrations[..., 2:].sum() > 0
+    assert np.all(concentrations >= 0)
+    np.testing.assert_allclose(residue_totals(CRS, concentrations), expected, rtol=1e-9)
+
+
+def test_nrm_conserves_residues(binary_polymer_system):
+    check_conserves_residues(binary_polymer_system, 'nrm')
+
+
+def test_direct_conserves_residues(binary_polymer_system):
+    check_conserves_residues(binary_polymer_system, 'direct')
+
+
+def test_cr_conserves_residues(binary_polymer_system):
+    check_conserves_residues(binary_polymer_system, 'cr')
+
+
+def test_tau_leap_conserves_residues(binary_polymer_system):
+    check_conserves_residues(binary_polymer_system, 'tau_leap')
+
+
+def test_tau_leap_moments_match_direct():
+    # Dimerisation A + A <-> D is nonlinear, so tau-leaping with a large epsilon biases the moments
+    reactions = [Reaction(0, reactants=[0], reactant_coeff=[2], products=[1], product_coeff=[1],
+                          constant=0.001, prop='STD'),
+                 Reaction(1, reactants=[1], reactant_coeff=[1], products=[0], product_coeff=[2],
+                          constant=1.0, prop='STD')]
+    system = CRS(molecule_list=['A', 'D'], molecule_dict={'A': 0, 'D': 1}, reactions=reactions)
+    concentrations = np.zeros((1, 1, 2))
+    concentrations[0, 0, 0] = 2000
+    num_replicates = 2000
+    dimers = {}
+    for seed, engine in enumerate(['direct', 'tau_leap']):
+        _, trajectories, _ = ce.SSA_ensemble(0.0, 0.5, concentrations, system, seed,
+                                             num_replicates=num_replicates, engine=engine,
+                                             epsilon=0.003)
+        dimers[engine] = trajectories[:, -1, 0, 1]
+    standard_error = np.sqrt((dimers['direct'].var() + dimers['tau_leap'].var()) / num_replicates)
+    assert abs(dimers['direct'].mean() - dimers['tau_leap'].mean()) < 4 * standard_error
+    np.testing.assert_allclose(dimers['tau_leap'].var(), dimers['direct'].var(), rtol=0.1)
+
+
+def test_nsm_conserves_residues(binary_polymer_system):
+    check_conserves_residues(binary_polymer_system, 'nsm', diffusion_rates=0.5)
+
+
+def test_legacy_update_conserves_residues_and_stops_when_empty(binary_polymer_system):
+    CRS, concentrations = binary_polymer_system(shape=(3, 2))
+    concentrations[2, 1] = 0.0
+    expected = residue_totals(CRS, concentrations)
+    arrays = ce.convert_CRS_to_npArrays(CRS)
+    num_molecules, num_reactions = len(CRS.molecule_list), len(CRS.reactions)
+    ce.SSA_update(0.0, 2.0, 3, 3, 2, num_molecules, num_reactions,
+                  *ce.get_c_pointers(concentrations, *arrays))
+    assert concentrations[..., 2:].sum() > 0
+    assert np.all(concentrations[2, 1] == 0.0)
+    np.testing.assert_allclose(residue_totals(CRS, concentrations), expected, rtol=1e-9)
+
+    empty = np.zeros_like(concentrations)
+    assert ce.SSA_update(0.0, 2.0, 3, 3, 2, num_molecules, num_reactions,
+                         *ce.get_c_pointers(empty, *arrays)) == 2.0
+
+
+def test_hybrid_conserves_residues(binary_polymer_system):
+    check_conserves_residues(binary_polymer_system, 'hybrid')
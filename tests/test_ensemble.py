@@ -0,0 +1,30 @@
+import numpy as np
+import pytest
+
+import chemevolve as ce
+from chemevolve.ReactionFunctions import _SSA_LIB
+
+pytestmark = pytest.mark.skipif(_SSA_LIB is None, reason='the SSA library is not built')
+
+
+def test_seed_list_reproduces_ssa_evolve(binary_polymer_system):
+    CRS, initial = binary_polymer_system(fconstant=0.01, monomers=100)
+    seeds = [5, 6, 7]
+    times, trajectories, metadata = ce.SSA_ensemble(0.0, 1.0, initial, CRS, seeds, t_out=0.25)
+    np.testing.assert_allclose(times, [0.0, 0.25, 0.5, 0.75, 1.0])
+    assert trajectories.shape == (len(seeds), len(times), 4, len(CRS.molecule_list))
+    assert list(metadata['random_seed']) == seeds
+    for replicate, seed in enumerate(seeds):
+        concentrations = initial.copy()
+        ce.SSA_evolve(0.0, 1.0, concentrations, CRS, seed)
+        np.testing.assert_array_equal(trajectories[replicate, -1].reshape(initial.shape),
+                                      concentrations)
+
+
+def test_replicates_do_not_depend_on_thread_count(binary_polymer_system):
+    CRS, initial = binary_polymer_system(fconstant=0.01, monomers=100)
+    results = [ce.SSA_ensemble(0.0, 1.0, initial, CRS, 11, num_replicates=20, t_out=0.5,
+                               num_threads=num_threads)[1] for num_threads in (1, 4)]
+    np.testing.assert_array_equal(results[0], results[1])
+    # Replicates sharing a seed run on different random number streams
+    assert len({replicate[-1].tobytes() for replicate in results[0]}) == 20
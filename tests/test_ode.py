@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+
+import chemevolve as ce
+from chemevolve.CoreClasses import CRS, Reaction
+
+pytest.importorskip('scipy')
+
+
+def make_system(molecules, reactions):
+    return CRS(molecule_list=molecules, molecule_dict={m: i for i, m in enumerate(molecules)},
+               reactions=reactions)
+
+
+def test_jacobian_matches_finite_differences():
+    reactions = [Reaction(0, reactants=[0], reactant_coeff=[2], products=[3], product_coeff=[1],
+                          constant=0.3, catalysts=[2], catalyzed_constants=[0.5], prop='STD'),
+                 Reaction(1, reactants=[0, 1], reactant_coeff=[1, 2], products=[2],
+                          product_coeff=[1], constant=0.2, catalysts=[2, 3],
+                          catalyzed_constants=[0.1, 2.0], prop='STD'),
+                 Reaction(2, reactants=[3], reactant_coeff=[1], products=[0], product_coeff=[2],
+                          constant=1.5, prop='STD')]
+    system = ce.MassActionODE(make_system(['A', 'B', 'C', 'D'], reactions))
+    # Two lattice sites, the Jacobian is block diagonal
+    y = np.random.RandomState(1).uniform(1.0, 5.0, size=8)
+    jacobian = system.jacobian(0.0, y).toarray()
+    step = 1e-6
+    finite_differences = np.zeros_like(jacobian)
+    for i in range(len(y)):
+        dy = np.zeros_like(y)
+        dy[i] = step
+        finite_differences[:, i] = (system.rhs(0.0, y + dy) - system.rhs(0.0, y - dy)) / (2 * step)
+    assert np.all(jacobian[:4, 4:] == 0.0) and np.all(jacobian[4:, :4] == 0.0)
+    np.testing.assert_allclose(jacobian, finite_differences, rtol=1e-6, atol=1e-8)
+
+
+@pytest.mark.parametrize('method', ['BDF', 'Radau', 'LSODA'])
+def test_linear_isomerisation_reaches_steady_state(method):
+    # A <-> B relaxes to A = total k2 / (k1 + k2) with rate k1 + k2
+    k1, k2, total = 2.0, 0.5, 1000.0
+    reactions = [Reaction(0, reactants=[0], reactant_coeff=[1], products=[1], product_coeff=[1],
+                          constant=k1, prop='STD'),
+                 Reaction(1, reactants=[1], reactant_coeff=[1], products=[0], product_coeff=[1],
+                          constant=k2, prop='STD')]
+    concentrations = np.zeros((1, 2, 2))
+    concentrations[0, 0] = [total, 0.0]
+    concentrations[0, 1] = [0.0, total]
+    ce.ODE_evolve(0.0, 20.0 / (k1 + k2), concentrations, make_system(['A', 'B'], reactions),
+                  method=method)
+    steady_A = total * k2 / (k1 + k2)
+    np.testing.assert_allclose(concentrations[..., 0], steady_A, rtol=1e-5)
+    np.testing.assert_allclose(concentrations.sum(axis=-1), total, rtol=1e-9)
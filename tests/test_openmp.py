@@ -0,0 +1,46 @@
+import os
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+
+import chemevolve as ce
+from chemevolve.ReactionFunctions import _SSA_LIB
+
+pytestmark = pytest.mark.skipif(_SSA_LIB is None, reason='the SSA library is not built')
+
+# Runs every engine on a 12 x 12 lattice, above the size at which the per-site loops go parallel
+SCRIPT = '''
+import sys
+import numpy as np
+import chemevolve as ce
+from chemevolve import BinaryPolymer as BinPoly
+
+CRS = BinPoly.generate_all_binary_reactions(4, fconstant=0.01, bconstant=1.0)
+results = {}
+for engine in ce.SSA_ENGINES:
+    concentrations = np.zeros((12, 12, len(CRS.molecule_list)))
+    concentrations[..., :2] = 40
+    diffusion_rates = 0.3 if engine == 'nsm' else None
+    ce.SSA_evolve(0.0, 0.3, concentrations, CRS, 7, engine=engine,
+                  diffusion_rates=diffusion_rates)
+    results[engine] = concentrations
+np.savez(sys.argv[1], **results)
+'''
+
+
+def run_with_threads(path, num_threads):
+    package_root = os.path.dirname(os.path.dirname(os.path.abspath(ce.__file__)))
+    python_path = os.pathsep.join([package_root, os.environ.get('PYTHONPATH', '')])
+    env = dict(os.environ, OMP_NUM_THREADS=str(num_threads), PYTHONPATH=python_path)
+    subprocess.check_call([sys.executable, '-c', SCRIPT, str(path)], env=env)
+    return np.load(str(path))
+
+
+def test_trajectories_do_not_depend_on_thread_count(tmp_path):
+    serial = run_with_threads(tmp_path / 'serial.npz', 1)
+    parallel = run_with_threads(tmp_path / 'parallel.npz', 4)
+    assert sorted(serial.files) == sorted(ce.SSA_ENGINES)
+    for engine in serial.files:
+        np.testing.assert_array_equal(serial[engine], parallel[engine], err_msg=engine)
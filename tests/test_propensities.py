@@ -0,0 +1,81 @@
+import numpy as np
+import pytest
+
+import chemevolve as ce
+from chemevolve import PropensityFunctions as PropFun
+from chemevolve.CoreClasses import CRS, Reaction
+from chemevolve.ReactionFunctions import _SSA_LIB
+
+requires_library = pytest.mark.skipif(_SSA_LIB is None, reason='the SSA library is not built')
+
+# Index of the total propensity in the engine state saved by SSASimulation.get_state
+TOTAL_PROPENSITY = 5
+
+
+def catalysed_system():
+    '''Mass-action reactions with a coefficient 2 reactant and catalysts'''
+    molecules = ['A', 'B', 'C', 'D']
+    reactions = [Reaction(0, reactants=[0], reactant_coeff=[2], products=[3], product_coeff=[1],
+                          constant=0.3, catalysts=[2], catalyzed_constants=[0.5], prop='STD'),
+                 Reaction(1, reactants=[0, 1], reactant_coeff=[1, 2], products=[2],
+                          product_coeff=[1], constant=0.2, catalysts=[2, 3],
+                          catalyzed_constants=[0.1, 2.0], prop='STD'),
+                 Reaction(2, reactants=[3], reactant_coeff=[1], products=[0], product_coeff=[2],
+                          constant=1.5, prop='STD'),
+                 Reaction(3, reactants=[2, 3], reactant_coeff=[1, 1], products=[1],
+                          product_coeff=[3], constant=0.7, catalysts=[0],
+                          catalyzed_constants=[0.05], prop='STD')]
+    return CRS(molecule_list=molecules, molecule_dict={m: i for i, m in enumerate(molecules)},
+               reactions=reactions)
+
+
+def replicator_system():
+    '''Two replicators AAB and ABBB copying themselves from the A and B monomers'''
+    molecules = ['A', 'B', 'AAB', 'ABBB']
+    reactions = [Reaction(0, reactants=[0, 1], reactant_coeff=[2, 1], products=[2],
+                          product_coeff=[1], constant=0.1, prop='RCM'),
+                 Reaction(1, reactants=[0, 1], reactant_coeff=[1, 3], products=[3],
+                          product_coeff=[1], constant=0.2, prop='RCM')]
+    return CRS(molecule_list=molecules, molecule_dict={m: i for i, m in enumerate(molecules)},
+               reactions=reactions)
+
+
+@requires_library
+@pytest.mark.parametrize('mu', [0.0, 0.001, 0.05])
+def test_c_replicator_propensity_matches_python(mu):
+    system = replicator_system()
+    concentrations = np.array([7.0, 5.0, 3.0, 2.0])
+    for reaction in system.reactions:
+        single = CRS(molecule_list=system.molecule_list, molecule_dict=system.molecule_dict,
+                     reactions=[reaction])
+        expected = PropFun.replicator_composition_propensity_envMutation(
+            reaction, single, concentrations, mu=mu)
+        # The composition-rejection engine keeps the exact total propensity in its state
+        simulation = ce.SSASimulation(concentrations.reshape(1, 1, -1).copy(), single, 1,
+                                      engine='cr', mu=mu)
+        _, engine_state = simulation.get_state()
+        simulation.close()
+        assert expected > 0
+        np.testing.assert_allclose(engine_state[TOTAL_PROPENSITY], expected, rtol=1e-12)
+
+
+def test_vectorized_propensities_match_standard_propensity():
+    system = catalysed_system()
+    # Abundances of 0 and 1 check that coefficient 2 reactants without a pair give no propensity
+    concentrations = np.random.RandomState(0).randint(0, 6, size=(3, 2, 4)).astype(float)
+    concentrations[0, 0] = [1, 1, 0, 1]
+    expected = np.array([[[PropFun.standard_propensity(reaction, system, site)
+                           for reaction in system.reactions] for site in row]
+                         for row in concentrations])
+    assert np.all(expected[0, 0, :2] == 0.0)
+    propensities = PropFun.calculate_reaction_propensities(system, concentrations)
+    np.testing.assert_allclose(propensities, expected, rtol=1e-12)
+    np.testing.assert_allclose(PropFun.calculate_propensities(system, concentrations),
+                               expected.sum(axis=-1), rtol=1e-12)
+
+    constants, propensity_ints, reactant_csr, _, catalyst_csr = \
+        ce.convert_CRS_to_sparse_arrays(system)
+    np.testing.assert_allclose(PropFun.sparse_propensities(concentrations, constants,
+                                                           propensity_ints, reactant_csr,
+                                                           catalyst_csr),
+                               expected, rtol=1e-12)
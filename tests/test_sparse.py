@@ -0,0 +1,48 @@
+import numpy as np
+
+import chemevolve as ce
+from chemevolve.CoreClasses import CRS, Reaction
+
+
+def expand(csr, num_reactions, num_molecules, dtype=int):
+    '''Dense num_reactions x num_molecules array of a (ptr, idx, values) CSR triple'''
+    ptr, idx, values = csr
+    dense = np.zeros((num_reactions, num_molecules), dtype=dtype)
+    for r in range(num_reactions):
+        dense[r, idx[ptr[r]:ptr[r + 1]]] += values[ptr[r]:ptr[r + 1]]
+    return dense
+
+
+def test_sparse_arrays_match_dense_arrays(binary_polymer_system):
+    system, _ = binary_polymer_system(max_length=5)
+    system.reactions[3].catalysts = [7]
+    system.reactions[3].catalyzed_constants = [0.3]
+    num_reactions, num_molecules = len(system.reactions), len(system.molecule_list)
+
+    constants, propensity_ints, reaction_arr, catalyst_arr = ce.convert_CRS_to_npArrays(system)
+    sparse_constants, sparse_ints, reactant_csr, stoich_csr, catalyst_csr = \
+        ce.convert_CRS_to_sparse_arrays(system)
+    np.testing.assert_array_equal(constants, sparse_constants)
+    np.testing.assert_array_equal(propensity_ints, sparse_ints)
+    np.testing.assert_array_equal(reaction_arr, expand(stoich_csr, num_reactions, num_molecules))
+    np.testing.assert_array_equal(np.clip(-reaction_arr, 0, None),
+                                  expand(reactant_csr, num_reactions, num_molecules))
+    np.testing.assert_array_equal(catalyst_arr,
+                                  expand(catalyst_csr, num_reactions, num_molecules, float))
+    # Only the nonzero entries are stored
+    assert len(stoich_csr[1]) == np.count_nonzero(reaction_arr)
+    assert len(catalyst_csr[1]) == np.count_nonzero(catalyst_arr)
+
+
+def test_sparse_stoichiometry_combines_repeated_molecules():
+    # A + B -> A + C, A is a reactant and a product so its net change is zero
+    reaction = Reaction(0, reactants=[0, 1], reactant_coeff=[1, 2], products=[0, 2],
+                        product_coeff=[1, 1], constant=1.0, prop='STD')
+    system = CRS(molecule_list=['A', 'B', 'C'], molecule_dict={'A': 0, 'B': 1, 'C': 2},
+                 reactions=[reaction])
+    _, _, reactant_csr, stoich_csr, _ = ce.convert_CRS_to_sparse_arrays(system)
+    np.testing.assert_array_equal(reactant_csr[1], [0, 1])
+    np.testing.assert_array_equal(reactant_csr[2], [1, 2])
+    np.testing.assert_array_equal(stoich_csr[0], [0, 2])
+    np.testing.assert_array_equal(stoich_csr[1], [1, 2])
+    np.testing.assert_array_equal(stoich_csr[2], [-2, 1])
@@ -0,0 +1,33 @@
+import numpy as np
+import pytest
+
+import chemevolve as ce
+from chemevolve.CoreClasses import CRS, Reaction
+
+
+def isomerisation_system(k1, k2):
+    reactions = [Reaction(0, reactants=[0], reactant_coeff=[1], products=[1], product_coeff=[1],
+                          constant=k1, prop='STD'),
+                 Reaction(1, reactants=[1], reactant_coeff=[1], products=[0], product_coeff=[1],
+                          constant=k2, prop='STD')]
+    return CRS(molecule_list=['A', 'B'], molecule_dict={'A': 0, 'B': 1}, reactions=reactions)
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_steady_state_stops_early_after_relaxation(seed):
+    # A <-> B relaxes with time 1/(k1 + k2) = 0.4, the initial excess of 800 A copies falls below
+    # the steady state fluctuations of about 13 copies after 0.4*ln(800/13) = 1.6
+    k1, k2, total = 2.0, 0.5, 1000
+    relaxation_time = 1.0 / (k1 + k2)
+    concentrations = np.zeros((1, 1, 2))
+    concentrations[0, 0, 0] = total
+    detector = ce.SteadyStateDetector(0.05, window=20)
+    ce.SSA_evolve(0.0, 50.0, concentrations, isomerisation_system(k1, k2), seed,
+                  steady_state=detector)
+
+    assert detector.detection_time < 10 * relaxation_time
+    assert 3 * relaxation_time <= detector.equilibration_time < detector.detection_time
+    # The newer window ends at the detection time
+    assert detector.detection_time == pytest.approx(detector.equilibration_time + 19 * 0.05)
+    steady_A = total * k2 / (k1 + k2)
+    assert abs(concentrations[0, 0, 0] - steady_A) < 5 * np.sqrt(total * k1 * k2) / (k1 + k2)
@@ -0,0 +1,42 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import chemevolve as ce
+from chemevolve.ReactionFunctions import _SSA_LIB
+
+pytestmark = pytest.mark.skipif(_SSA_LIB is None, reason='the SSA library is not built')
+
+
+def test_parquet_round_trip_matches_csv(tmp_path, monkeypatch, binary_polymer_system):
+    pytest.importorskip('pyarrow')
+    monkeypatch.chdir(tmp_path)
+    CRS, concentrations = binary_polymer_system(shape=(2, 3), monomers=100)
+    ce.SSA_evolve(0.0, 3.0, concentrations, CRS, 4, output_prefix='run', t_out=0.5)
+    # Small chunks spread the snapshots over several row groups
+    ce.tidy_timeseries(CRS.molecule_list, 'run', delete_dat=False, chunk_rows=500)
+    ce.tidy_timeseries(CRS.molecule_list, 'run', file_format='parquet', chunk_rows=500)
+
+    csv = ce.read_timeseries('run_time_series_df.csv')
+    parquet = ce.read_timeseries('run_time_series.parquet')
+    assert list(parquet.columns) == ['time', 'x', 'y', 'molecule', 'abundance']
+    assert isinstance(parquet['molecule'].dtype, pd.CategoricalDtype)
+    assert len(parquet) == len(csv) == 7 * 6 * len(CRS.molecule_list)
+    positions = csv['position'].str.strip('()').str.split(', ', expand=True).astype(int)
+    np.testing.assert_array_equal(parquet['time'], csv['time'])
+    np.testing.assert_array_equal(parquet['x'], positions[0])
+    np.testing.assert_array_equal(parquet['y'], positions[1])
+    np.testing.assert_array_equal(parquet['molecule'].astype(str), csv['molecule'])
+    np.testing.assert_array_equal(parquet['abundance'], csv['abundance'])
+
+    # Filtered reads return the same rows from both formats
+    selection = dict(molecules=['A', 'AB'], t_start=1.0, t_end=2.0,
+                     columns=['time', 'molecule', 'abundance'])
+    csv = ce.read_timeseries('run_time_series_df.csv', **selection).reset_index(drop=True)
+    parquet = ce.read_timeseries('run_time_series.parquet', **selection)
+    assert list(parquet.columns) == selection['columns']
+    assert sorted(parquet['time'].unique()) == [1.0, 1.5, 2.0]
+    assert set(parquet['molecule'].astype(str)) == {'A', 'AB'}
+    np.testing.assert_array_equal(parquet['time'], csv['time'])
+    np.testing.assert_array_equal(parquet['molecule'].astype(str), csv['molecule'])
+    np.testing.assert_array_equal(parquet['abundance'], csv['abundance'])
@@ -0,0 +1,32 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import chemevolve as ce
+from chemevolve.ReactionFunctions import _SSA_LIB
+
+pytestmark = pytest.mark.skipif(_SSA_LIB is None, reason='the SSA library is not built')
+
+
+def read_tidy(prefix):
+    return pd.read_csv(prefix + '_time_series_df.csv')
+
+
+@pytest.mark.parametrize('encoding', ['sparse', 'delta'])
+def test_trajectory_encodings_round_trip(tmp_path, monkeypatch, binary_polymer_system, encoding):
+    monkeypatch.chdir(tmp_path)
+    CRS, initial = binary_polymer_system()
+    ce.SSA_evolve(0.0, 2.0, initial.copy(), CRS, 9, output_prefix='dense', t_out=0.1)
+    ce.SSA_evolve(0.0, 2.0, initial.copy(), CRS, 9, output_prefix=encoding, t_out=0.1,
+                  output_encoding=encoding)
+    assert ce.find_trajectory(encoding) == ce.trajectory_name(encoding, encoding)
+
+    dense_times, dense = ce.load_trajectory(ce.trajectory_name('dense'))
+    times, snapshots = ce.load_trajectory(ce.trajectory_name(encoding, encoding))
+    np.testing.assert_array_equal(dense_times, times)
+    np.testing.assert_array_equal(dense, np.asarray(snapshots))
+    # Partial reads decode from the nearest keyframe
+    _, window = ce.load_trajectory(ce.trajectory_name(encoding, encoding), t_start=0.55, t_end=1.25)
+    np.testing.assert_array_equal(dense[(dense_times >= 0.55) & (dense_times <= 1.25)],
+                                  np.asarray(window))
+    pd.testing.assert_frame_equal(read_tidy('dense'), read_tidy(encoding))